@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# bench.py                                                                     #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import re
+import sys
+import pty
+import json
+import time
+import glob
+import getopt
+import shutil
+import tempfile
+import threading
+import subprocess
+import psutil
+
+
+# own imports
+
+
+# nullscan's root and source path
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_PATH = os.path.join(ROOT_PATH, 'src')
+
+# ports of the synthetic targets (first M are used)
+PORTS = (
+  (80, 'http'), (22, 'ssh'), (443, 'https'), (21, 'ftp'), (25, 'smtp'),
+  (53, 'domain'), (110, 'pop3'), (143, 'imap'), (445, 'microsoft-ds'),
+  (3306, 'mysql'), (5432, 'postgresql'), (8080, 'http-proxy'),
+  (139, 'netbios-ssn'), (111, 'rpcbind'), (3389, 'ms-wbt-server'),
+  (5900, 'vnc'),
+)
+
+# binaries stubbed in any case, besides the ones of the manifest
+BINS = ('nmap', 'curl', 'ncat', 'nc', 'nikto')
+
+# config overrides: no circuit breaker (the targets are down) and no stall
+# detection
+CONF = {'breaker': '0', 'stall_idle': '0', 'stall_tools': ''}
+
+# seconds between two samples of the process tree
+SAMPLE = 0.1
+
+# fake binary: logs its start, sleeps, writes output and exits
+STUB = '''#!/bin/sh
+echo "$(date +%s.%N) {name}" >> {log}
+sleep {sleep}
+head -c {size} /dev/zero | tr '\\0' 'x'
+exit {code}
+'''
+
+
+def usage():
+  """ print usage and exit """
+
+  print('usage\n\n'
+    '  bench.py [options]\n\n'
+    'options\n\n'
+    '  -n <num>     - synthetic targets (default: 10)\n'
+    '  -m <num>     - open tcp ports per target (default: 3, max: 16)\n'
+    '  -P <num>     - nullscan workers (default: 50)\n'
+    '  -s <sec>     - seconds each fake binary sleeps (default: 0.0)\n'
+    '  -b <bytes>   - bytes each fake binary writes (default: 128)\n'
+    '  -e <code>    - exit code of the fake binaries (default: 0)\n'
+    '  -t <tool:sec:bytes:code> - fake binary with own values (repeatable)\n'
+    '  -k <sec>     - nullscan tool timeout (default: 60)\n'
+    '  -x <args>    - extra nullscan args, e.g.: "-i tcp.http"\n'
+    '  -o <file>    - write results as json to file\n'
+    '  -K           - keep the bench dir\n'
+    '  -H           - print this help and exit\n')
+  sys.exit(0)
+
+
+class Bench:
+  """ benchmark of the orchestration: runs the real controller end to end
+  against N synthetic targets with M open ports each (nmap xml, -l). all
+  binaries of the tools are fake ones on PATH, so it runs offline and the
+  numbers show the cost of nullscan itself. internal (python) tools run for
+  real against the (down) loopback targets """
+
+
+  def __init__(self, opts):
+    """ constructor """
+
+    self.opts = opts
+    self.dir = tempfile.mkdtemp(prefix='nullscan-bench-')
+    self.bin = f'{self.dir}/bin'
+    self.log = f'{self.dir}/launches.log'
+    self.env = dict(os.environ, HOME=f'{self.dir}/home',
+      PATH=f'{self.dir}/bin:' + os.environ.get('PATH', ''))
+
+    self.peak_procs = 0
+    self.peak_rss = 0
+    self.done = threading.Event()
+
+    return
+
+
+  def get_bins(self):
+    """ all binaries run by the tools. builds the manifest in the bench's home
+    dir, so it's not part of the benchmark """
+
+    sys.path.insert(0, SRC_PATH)
+    from core.manifest import Manifest
+    from core.constants import MOD_PATH
+
+    bins = set(BINS)
+    path = f"{self.env['HOME']}/.cache/nullscan/manifest.json"
+    for entry in Manifest(MOD_PATH, path).load().values():
+      for tool in entry['tools'].values():
+        bins.update(tool['tools'])
+
+    return sorted(b for b in bins if re.match(r'^[\w.+-]+$', b))
+
+
+  def make_stubs(self):
+    """ put fake binaries on PATH """
+
+    os.makedirs(self.bin)
+    values = {'sleep': self.opts['sleep'], 'size': self.opts['size'],
+      'code': self.opts['code']}
+
+    for name in self.get_bins():
+      v = dict(values, **self.opts['stubs'].get(name, {}))
+      path = f'{self.bin}/{name}'
+      with open(path, 'w') as f:
+        f.write(STUB.format(name=name, log=self.log, **v))
+      os.chmod(path, 0o755)
+
+    return
+
+
+  def make_targets(self):
+    """ synthetic nmap xml logfile: N hosts (loopback) with M open ports """
+
+    hosts = []
+    for i in range(self.opts['hosts']):
+      addr = f'127.{1 + i // 65025}.{i // 255 % 255}.{1 + i % 255}'
+      ports = ''.join(f'<port protocol="tcp" portid="{p}"><state state="open"'
+        f' reason="syn-ack" reason_ttl="0"/><service name="{s}" method="table"'
+        f' conf="3"/></port>' for p, s in PORTS[:self.opts['ports']])
+      hosts.append('<host starttime="0" endtime="0"><status state="up" '
+        f'reason="syn-ack" reason_ttl="0"/><address addr="{addr}" '
+        f'addrtype="ipv4"/><hostnames/><ports>{ports}</ports></host>')
+
+    path = f'{self.dir}/targets.xml'
+    with open(path, 'w') as f:
+      f.write('<?xml version="1.0" encoding="UTF-8"?>\n<nmaprun scanner="nmap"'
+        ' args="nmap" start="0" startstr="" version="7.94" '
+        f'xmloutputversion="1.05">{"".join(hosts)}<runstats><finished time="0"'
+        ' timestr="" elapsed="0" summary="" exit="success"/><hosts '
+        f'up="{len(hosts)}" down="0" total="{len(hosts)}"/></runstats>'
+        '</nmaprun>\n')
+
+    return path
+
+
+  def make_config(self):
+    """ copy of nullscan.conf with the bench overrides """
+
+    with open(f'{ROOT_PATH}/conf/nullscan.conf', 'r') as f:
+      conf = f.read()
+    for k, v in CONF.items():
+      conf = re.sub(rf'^{k} =.*$', f'{k} = {v}', conf, flags=re.M)
+
+    path = f'{self.dir}/nullscan.conf'
+    with open(path, 'w') as f:
+      f.write(conf)
+
+    return path
+
+
+  def sample(self, pid):
+    """ sample num processes and rss of the nullscan process tree (runs in a
+    thread) """
+
+    while not self.done.wait(SAMPLE):
+      try:
+        root = psutil.Process(pid)
+        procs = [root] + root.children(recursive=True)
+      except psutil.Error:
+        continue
+      rss = 0
+      for p in procs:
+        try:
+          rss += p.memory_info().rss
+        except psutil.Error:
+          pass
+      self.peak_procs = max(self.peak_procs, len(procs))
+      self.peak_rss = max(self.peak_rss, rss)
+
+    return
+
+
+  def run(self):
+    """ run nullscan against the synthetic targets. returns the results """
+
+    self.make_stubs()
+    targets = self.make_targets()
+    conf = self.make_config()
+
+    args = [sys.executable, __file__, '--nullscan', '-l', targets, '-c', conf,
+      '-R', f'{self.dir}/scan', '-P', str(self.opts['workers']), '-k',
+      str(self.opts['timeout']), '--no-cache'] + self.opts['extra']
+
+    # nullscan wants a terminal
+    master, slave = pty.openpty()
+    with open(f'{self.dir}/nullscan.out', 'w') as out:
+      start = time.time()
+      proc = subprocess.Popen(args, env=self.env, cwd=SRC_PATH, stdin=slave,
+        stdout=out, stderr=subprocess.STDOUT)
+      sampler = threading.Thread(target=self.sample, args=(proc.pid,))
+      sampler.start()
+      code = proc.wait()
+      end = time.time()
+      self.done.set()
+      sampler.join()
+    os.close(master)
+    os.close(slave)
+
+    return self.get_results(code, start, end)
+
+
+  def get_results(self, code, start, end):
+    """ results out of stats.jsonl of the scan and the launches of the fake
+    binaries """
+
+    runs = []
+    for path in glob.glob(f'{self.dir}/scan*/stats.jsonl'):
+      with open(path, 'r') as f:
+        runs += [json.loads(l) for l in f if l.strip()]
+
+    launches = []
+    if os.path.isfile(self.log):
+      with open(self.log, 'r') as f:
+        launches = [float(l.split()[0]) for l in f if l.strip()]
+
+    # worker-seconds not spent in tools per task: scheduling, dispatch,
+    # bookkeeping and workers idling on dependencies
+    tasks = len(runs)
+    overhead = None
+    if runs:
+      first = min(r['time'] - r['wall'] for r in runs)
+      last = max(r['time'] for r in runs)
+      overhead = max(0.0, (last - first) * self.opts['workers'] -
+        sum(r['wall'] for r in runs)) / tasks
+
+    return {
+      'exit': code, 'targets': self.opts['hosts'],
+      'ports': self.opts['ports'], 'workers': self.opts['workers'],
+      'wall': round(end - start, 3), 'tasks': tasks,
+      'tasks_per_sec': round(tasks / (end - start), 3),
+      'overhead_per_task': None if overhead is None else round(overhead, 4),
+      'commands': len(launches), 'peak_procs': self.peak_procs,
+      'peak_rss_mb': round(self.peak_rss / 1048576, 1),
+      'first_launch': round(min(launches) - start, 3) if launches else None,
+    }
+
+
+  def clean(self):
+    """ remove bench dir """
+
+    shutil.rmtree(self.dir, ignore_errors=True)
+
+    return
+
+
+def run_nullscan(argv):
+  """ run nullscan out of the source tree (python deps of docs/pydeps.txt) """
+
+  sys.path.insert(0, SRC_PATH)
+  sys.argv = [f'{SRC_PATH}/nullscan.py'] + argv
+
+  import core.controller
+  core.controller.PYDEPS = f'{ROOT_PATH}/docs/pydeps.txt'
+
+  ctrl = core.controller.Controller()
+  ctrl.prepare()
+  ctrl.run_misc()
+  ctrl.start()
+  ctrl.end()
+
+  return
+
+
+def parse_opts(argv):
+  """ parse cmdline of the bench """
+
+  opts = {'hosts': 10, 'ports': 3, 'workers': 50, 'sleep': 0.0, 'size': 128,
+    'code': 0, 'stubs': {}, 'timeout': 60, 'extra': [], 'out': None,
+    'keep': False}
+
+  try:
+    args, _ = getopt.getopt(argv, 'n:m:P:s:b:e:t:k:x:o:KH')
+    for o, a in args:
+      if o == '-n':
+        opts['hosts'] = int(a)
+      elif o == '-m':
+        opts['ports'] = min(int(a), len(PORTS))
+      elif o == '-P':
+        opts['workers'] = int(a)
+      elif o == '-s':
+        opts['sleep'] = float(a)
+      elif o == '-b':
+        opts['size'] = int(a)
+      elif o == '-e':
+        opts['code'] = int(a)
+      elif o == '-t':
+        name, sleep, size, code = a.split(':')
+        opts['stubs'][name] = {'sleep': float(sleep), 'size': int(size),
+          'code': int(code)}
+      elif o == '-k':
+        opts['timeout'] = float(a)
+      elif o == '-x':
+        opts['extra'] = a.split()
+      elif o == '-o':
+        opts['out'] = a
+      elif o == '-K':
+        opts['keep'] = True
+      elif o == '-H':
+        usage()
+  except (getopt.GetoptError, ValueError):
+    usage()
+
+  return opts
+
+
+def main(argv):
+  """ run the bench and print the results """
+
+  if argv[:1] == ['--nullscan']:
+    run_nullscan(argv[1:])
+    return
+
+  opts = parse_opts(argv)
+  bench = Bench(opts)
+
+  try:
+    res = bench.run()
+  finally:
+    if not opts['keep']:
+      bench.clean()
+
+  for k, v in res.items():
+    print(f'{k:<20} {v}')
+  if opts['keep']:
+    print(f"{'dir':<20} {bench.dir}")
+  if opts['out']:
+    with open(opts['out'], 'w') as f:
+      json.dump(res, f, indent=2)
+
+  sys.exit(0 if res['exit'] == 0 else 1)
+
+
+if __name__ == '__main__':
+  main(sys.argv[1:])
+
+
+# EOF
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# accounting.py                                                                #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import json
+import time
+import threading
+
+
+# own imports
+
+
+# num tools in the summary
+SUMMARY_TOOLS = 15
+
+
+class Accounting:
+  """ resource usage of every tool run of a scan: wall and cpu time, peak
+  rss, bytes read and written, exit status and why it was cancelled. every
+  run is appended to stats.jsonl in the working dir, a summary of the most
+  expensive tools is printed at the end of the scan """
+
+
+  def __init__(self, path):
+    """ constructor """
+
+    self.path = path            # stats.jsonl
+    self.tools = {}             # tool -> summed up usage of this run
+    self.lock = threading.Lock()
+
+    return
+
+
+  def get_record(self, task, state, stats=None, node=None):
+    """ build record of finished tool run (see add()) """
+
+    group = task.group
+    stats = stats or {}
+    rec = {
+      'time': round(time.time(), 3), 'target': group.host,
+      'module': group.module, 'tool': task.tool, 'state': state,
+      'node': node, 'wall': round(stats.get('wall', 0.0), 3),
+      'user': round(stats.get('user', 0.0), 3),
+      'sys': round(stats.get('sys', 0.0), 3), 'rss': stats.get('rss', 0),
+      'read': stats.get('read', 0), 'write': stats.get('write', 0),
+      'bytes': stats.get('bytes', 0), 'commands': stats.get('commands', 0),
+      'status': stats.get('status'), 'reason': stats.get('reason'),
+      'cached': stats.get('cached'),
+    }
+
+    return rec
+
+
+  def add(self, rec):
+    """ add record of finished tool run to the summary and stats.jsonl """
+
+    with self.lock:
+      t = self.tools.setdefault(rec['tool'], {'runs': 0, 'wall': 0.0,
+        'cpu': 0.0, 'rss': 0, 'io': 0, 'cancelled': 0, 'failed': 0})
+      t['runs'] += 1
+      t['wall'] += rec['wall']
+      t['cpu'] += rec['user'] + rec['sys']
+      t['rss'] = max(t['rss'], rec['rss'])
+      t['io'] += rec['read'] + rec['write']
+      t['cancelled'] += 1 if rec['reason'] else 0
+      t['failed'] += 1 if rec['state'] == 'failed' else 0
+      try:
+        with open(self.path, 'a') as f:
+          f.write(json.dumps(rec) + '\n')
+      except OSError:
+        pass
+
+    return
+
+
+  def summary(self, num=SUMMARY_TOOLS):
+    """ lines of the summary table: the num tools with the most wall time """
+
+    with self.lock:
+      tools = sorted(self.tools.items(), key=lambda t: -t[1]['wall'])
+
+    lines = [f"{'tool':<24} {'runs':>5} {'wall':>9} {'cpu':>9} " +
+      f"{'peak rss':>9} {'i/o':>9} {'cancel':>6} {'fail':>5}"]
+    for tool, t in tools[:num]:
+      lines.append(f"{tool[:24]:<24} {t['runs']:>5} {t['wall']:>8.1f}s " +
+        f"{t['cpu']:>8.1f}s {t['rss'] / 1048576:>7.1f}MB " +
+        f"{t['io'] / 1048576:>7.1f}MB {t['cancelled']:>6} {t['failed']:>5}")
+
+    return lines
+
+
+# EOF
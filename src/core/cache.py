@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# cache.py                                                                     #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+
+
+# own imports
+from core.constants import *
+
+
+# target options which never change the results of a tool
+VOLATILE_OPTS = ('nullscan_logdir', 'debug', 'timeout', 'stall')
+
+
+class Cache:
+  """ content-addressed cache of tool results across scans.
+
+  a result is keyed by the tool, its target, the target options, the content
+  of the logfiles it reads and the version of the module and the binaries it
+  runs. logfiles are stored once by their sha256 (blobs/), results refer to
+  them (entries/). a hit copies the logfiles into the module's working dir
+  instead of running the tool. only tools with a ttl are cached.
+  """
+
+
+  def __init__(self, ttls, max_size=0, max_age=0, path=RESULT_CACHE):
+    """ constructor """
+
+    self.ttls = ttls            # tool -> ttl in seconds
+    self.max_size = max_size    # max size of all blobs in bytes (0 -> any)
+    self.max_age = max_age      # max age of results in seconds (0 -> any)
+    self.path = path
+
+    return
+
+
+  def enabled(self, tool):
+    """ check if results of given tool are cached """
+
+    return self.ttls.get(tool, 0) > 0
+
+
+  def get_key(self, mod, tool, target, opts, wdir, entry):
+    """ build cache key of a tool run """
+
+    h = hashlib.sha256()
+    t = entry['tools'][tool]
+
+    def add(*items):
+      for i in items:
+        h.update(str(i).encode('utf-8', 'replace') + b'\0')
+
+    add(mod, tool, json.dumps(target, sort_keys=True, default=str))
+    add(json.dumps({k: v for k, v in opts.items() if k not in VOLATILE_OPTS},
+      sort_keys=True, default=str))
+
+    # version of the module and the binaries it runs
+    add(entry['mtime'])
+    for b in t['tools']:
+      path = shutil.which(b)
+      if path:
+        st = os.stat(path)
+        add(b, path, st.st_mtime_ns, st.st_size)
+
+    # content of the logfiles the tool reads (any module of the target)
+    root = self.get_target_dir(opts, wdir)
+    for d in t['deps']:
+      for log in sorted(glob.glob(f'{root}/**/{d}.log', recursive=True)):
+        add(os.path.relpath(log, root), self.hash_file(log))
+
+    return h.hexdigest()
+
+
+  def get_target_dir(self, opts, wdir):
+    """ get target's logdir out of the module's working dir """
+
+    logdir = opts.get('nullscan_logdir') or os.path.dirname(wdir)
+    host = os.path.relpath(wdir, logdir).split(os.sep)[0]
+
+    return os.path.join(logdir, host)
+
+
+  def hash_file(self, path):
+    """ sha256 of given file """
+
+    h = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+      for chunk in iter(lambda: f.read(1 << 16), b''):
+        h.update(chunk)
+
+    return h.hexdigest()
+
+
+  def get_logs(self, tool, tools, wdir, since):
+    """ get logfiles written by tool in wdir since given time. tools of a
+    module share its working dir, so only <tool>.log and <tool>_*.log files
+    count, but never the logfile of another tool """
+
+    logs = []
+    others = {f'{t}.log' for t in tools if t != tool}
+
+    for f in os.listdir(wdir):
+      if f in others or not (f == f'{tool}.log' or (f.startswith(f'{tool}_')
+        and f.endswith('.log'))):
+          continue
+      path = os.path.join(wdir, f)
+      if os.path.isfile(path) and os.path.getmtime(path) >= since:
+        logs.append(f)
+
+    return logs
+
+
+  def lookup(self, key, tool):
+    """ get cached result of key if it's not older than the tool's ttl """
+
+    try:
+      with open(f'{self.path}/entries/{key}.json', 'r') as f:
+        res = json.load(f)
+    except (OSError, ValueError):
+      return None
+
+    if time.time() - res['time'] > self.ttls.get(tool, 0):
+      return None
+    for blob in res['files'].values():
+      if not os.path.isfile(self.get_blob(blob)):
+        return None
+
+    return res
+
+
+  def get_blob(self, blob):
+    """ path of blob """
+
+    return f'{self.path}/blobs/{blob[:2]}/{blob}'
+
+
+  def materialize(self, res, wdir):
+    """ copy logfiles of cached result into working dir """
+
+    for name, blob in res['files'].items():
+      shutil.copyfile(self.get_blob(blob), os.path.join(wdir, name))
+
+    # results in use are evicted last
+    os.utime(f"{self.path}/entries/{res['key']}.json")
+
+    return
+
+
+  def store(self, key, tool, wdir, logs):
+    """ store logfiles of a tool run. a non-writable cache is not fatal """
+
+    res = {'key': key, 'tool': tool, 'time': time.time(), 'files': {}}
+
+    try:
+      for name in logs:
+        path = os.path.join(wdir, name)
+        blob = self.hash_file(path)
+        dst = self.get_blob(blob)
+        if not os.path.isfile(dst):
+          os.makedirs(os.path.dirname(dst), exist_ok=True)
+          tmp = f'{dst}.{os.getpid()}'
+          shutil.copyfile(path, tmp)
+          os.replace(tmp, dst)
+        res['files'][name] = blob
+      os.makedirs(f'{self.path}/entries', exist_ok=True)
+      tmp = f'{self.path}/entries/{key}.json.{os.getpid()}'
+      with open(tmp, 'w') as f:
+        json.dump(res, f)
+      os.replace(tmp, f'{self.path}/entries/{key}.json')
+    except OSError:
+      pass
+
+    return
+
+
+  def run(self, mod, tool, target, opts, wdir, entry, func, keep, commit):
+    """ run tool via func() unless a cached result exists. the result is only
+    stored if keep() says so (e.g. not for failed tools). a hit is committed
+    via commit() like a tool run. returns 'hit' or 'miss' """
+
+    key = self.get_key(mod, tool, target, opts, wdir, entry)
+
+    res = self.lookup(key, tool)
+    if res:
+      try:
+        self.materialize(res, wdir)
+      except OSError:
+        pass
+      else:
+        commit()
+        return 'hit'
+
+    since = time.time() - 1
+    func()
+    if keep():
+      self.store(key, tool, wdir, self.get_logs(tool, entry['tools'], wdir,
+        since))
+
+    return 'miss'
+
+
+  def evict(self):
+    """ remove results older than max age and the least recently used ones
+    until the blobs fit into max size. unreferenced blobs are removed """
+
+    now = time.time()
+    results = []
+
+    for path in glob.glob(f'{self.path}/entries/*.json'):
+      try:
+        with open(path, 'r') as f:
+          res = json.load(f)
+        used = os.path.getmtime(path)
+      except (OSError, ValueError):
+        self.remove(path)
+        continue
+      if self.max_age and now - res['time'] > self.max_age:
+        self.remove(path)
+        continue
+      results.append((used, path, res))
+
+    sizes = {}
+    for path in glob.glob(f'{self.path}/blobs/*/*'):
+      try:
+        sizes[os.path.basename(path)] = os.path.getsize(path)
+      except OSError:
+        pass
+
+    # least recently used first
+    results.sort(key=lambda r: r[0])
+    refs = {}
+    for _, _, res in results:
+      for blob in res['files'].values():
+        refs[blob] = refs.get(blob, 0) + 1
+    total = sum(sizes.get(b, 0) for b in refs)
+
+    for _, path, res in results:
+      if not self.max_size or total <= self.max_size:
+        break
+      self.remove(path)
+      for blob in res['files'].values():
+        refs[blob] -= 1
+        if refs[blob] == 0:
+          total -= sizes.get(blob, 0)
+
+    for blob in sizes:
+      if refs.get(blob, 0) == 0:
+        self.remove(self.get_blob(blob))
+
+    return
+
+
+  def remove(self, path):
+    """ remove cache file """
+
+    try:
+      os.unlink(path)
+    except OSError:
+      pass
+
+    return
+
+
+# EOF
@@ -21,6 +21,7 @@
 # sys imports
 import os
 import re
+import glob
 import itertools
 import importlib
 
@@ -145,6 +146,11 @@ class Check:
       if opts['t_workers'] > WORKERS_MAX or opts['m_workers'] > WORKERS_MAX \
         or opts['p_workers'] > WORKERS_MAX:
           self.log('workers', _type='warn', end='\n')
+      if opts['worker_tools'] < 1:
+        raise ValueError
+      for c_workers in opts['c_workers'].values():
+        if int(c_workers) < 1:
+          raise ValueError
     except:
       self.log('workers', _type='err', end='\n')
 
@@ -155,6 +161,42 @@ class Check:
     except:
       self.log('timeout', _type='err', end='\n')
 
+    # budgets
+    try:
+      for b in ('t_budget', 'm_budget'):
+        if float(opts[b]) < 0:
+          raise ValueError
+    except:
+      self.log('budget', _type='err', end='\n')
+
+    # circuit breaker
+    if opts['breaker'] < 0 or opts['probe_interval'] < 0:
+      self.log('breaker', _type='err', end='\n')
+
+    # stall detection
+    stall = opts['targets_opts']['stall']
+    for idle, action in [(stall['idle'], stall['action'])] + \
+      list(stall['tools'].values()):
+        if idle < 0 or action not in ('kill', 'flag'):
+          self.log('stall', _type='err', end='\n')
+
+    # scan deadline
+    if opts['deadline'] < 0:
+      self.log('deadline', _type='err', end='\n')
+
+    # record and replay of the commands
+    tape = opts['tape']
+    if tape['scale'] < 0:
+      self.log('tape_scale', _type='err', end='\n')
+    if tape['mode'] == 'replay' and not glob.glob(f"{tape['path']}/*.jsonl"):
+      self.log('tape_replay', eargs=tape['path'], _type='err', end='\n')
+
+    # distributed scan
+    if opts['worker'] and not opts['connect']:
+      self.log('connect', _type='err', end='\n')
+    if (opts['worker'] or opts['listen']) and not opts['remote_key']:
+      self.log('remote_key', _type='err', end='\n')
+
     # -i + -x are not allowed at the same time
     if opts['modules']['in_modules'] and opts['modules']['ex_modules']:
       self.log('mod_opts', _type='err', end='\n')
@@ -233,7 +275,7 @@ class Check:
 
     # at least one of these options is needed otherwise exit
     needed = ['-t', '-u', '-l', '-o', '-i', '-I', '-x', '-X', '-C', '-p', '-m',
-      '-a', '-V', '-H']
+      '-a', '-V', '-H', '--worker']
 
     # check if argv has options in needed
     if set(needed).isdisjoint(set(argv)):
@@ -67,5 +67,17 @@ NULLSCAN_DIR = f'{os.getcwd()}/nullscan-{TODAY}'
 # pydeps.txt
 PYDEPS = f'{DOC_PATH}/pydeps.txt'
 
+# nullscan's cache path
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache/nullscan')
+
+# precomputed manifest of all modules and tools
+MANIFEST = f'{CACHE_PATH}/manifest.json'
+
+# content-addressed cache of tool results
+RESULT_CACHE = f'{CACHE_PATH}/results'
+
+# runtime history of all tools
+HISTORY = f'{CACHE_PATH}/history.json'
+
 
 # EOF
@@ -23,8 +23,9 @@ import sys
 import os
 import time
 import glob
+import json
+import threading
 import requests
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 
 # own imports
@@ -34,6 +35,18 @@ from core.checks import Check
 from core.file import File
 from core.constants import *
 from core.modules import Module
+from core.scheduler import Scheduler
+from core.notify import Notify
+from core.pool import Pool
+from core.registry import Registry
+from core.journal import Journal
+from core.cache import Cache
+from core.remote import Hub, Coordinator, Node
+from core.planner import Planner
+from core.metrics import Metrics
+from core.tracer import Tracer, span
+from core.accounting import Accounting
+from core.tape import Tape
 from core.misc import Misc
 from core.logger import Logger
 from core.nmap import Nmap
@@ -47,9 +60,21 @@ class Controller:
   def __init__(self):
     """ constructor """
 
-    # options and modules
+    # options, modules, task scheduler, worker pool, tool dependency
+    # notifications, registry of all workers and running commands
     self.opt = None
     self.mod = Module(MOD_PATH)
+    self.sched = None
+    self.pool = None
+    self.notify = Notify()
+    self.registry = Registry()
+
+    # cached tool results and their hits and misses of this scan
+    self.cache = None
+    self.cache_stats = {'hit': 0, 'miss': 0}
+
+    # resource usage of all tools (stats.jsonl)
+    self.accounting = None
 
     # logger
     self.logger = Logger()
@@ -64,18 +89,39 @@ class Controller:
     # nullscan working dir
     self.nullscan_dir = None
 
+    # session journal and working dir of the scan to resume (--resume)
+    self.journal = None
+    self.resume = None
+
+    # distributed scan: coordinator serving worker nodes or own worker node
+    self.coord = None
+    self.node = None
+
+    # live metrics endpoint (--metrics) and tracer (--trace)
+    self.metrics = None
+    self.tracer = None
+
+    # recorded or replayed commands (--record, --replay)
+    self.tape = None
+
+    # start of scan (deadline)
+    self.started = time.monotonic()
+
     return
 
 
   def prepare(self):
     """ preparation/initialization of opts and env: parsing & checks """
 
+    # resume an interrupted scan with its original cmdline
+    argv = self.get_resume_argv(sys.argv)
+
     # declare nullscan options
-    self.opt = Option(sys.argv)
+    self.opt = Option(argv)
 
     # check argc and argc (usage)
-    self.check.check_argc(len(sys.argv))
-    self.check.check_argv(sys.argv)
+    self.check.check_argc(len(argv))
+    self.check.check_argv(argv)
 
     # check for missing libraries / deps / python modules
     self.check.check_deps(self.file.read_file(PYDEPS))
@@ -95,25 +141,34 @@ class Controller:
     # further checks for usage, options, env, etc.
     self.check.check_opts(self.opt.opts)
 
-    # collect all py-files and grep the tools out of the py-files
-    tools = []
-    py_files = self.misc.find_py_files(MOD_PATH)
-    for py in py_files:
-      tools.append(self.misc.grep_tools(py))
-    tools = [x for sublist in tools for x in sublist]
-
-    # create the locks for each tool except for excluded ones
-    with ThreadPoolExecutor(50) as exe:
-      for tool in tools:
-        if tool not in self.opt.opts['tools']['ex_tools']:
-          exe.submit(self.file.create_lock, tool)
-
     # copy debug flag to target_opts (for nullscan tools)
     self.opt.opts['targets_opts']['debug'] = self.opt.opts['debug']
 
     return
 
 
+  def get_resume_argv(self, argv):
+    """ get cmdline of the scan to resume (--resume <dir>) out of its
+    journal. returns given argv if there is nothing to resume """
+
+    for i, a in enumerate(argv):
+      if a == '--resume' and i + 1 < len(argv):
+        resume = argv[i + 1]
+      elif a.startswith('--resume='):
+        resume = a.split('=', 1)[1]
+      else:
+        continue
+      self.resume = os.path.abspath(resume)
+      self.journal = Journal(self.resume).load()
+      if not self.journal.argv:
+        self.log('resume', eargs=resume, _type='err', end='\n')
+      # relative paths of the cmdline (-l, -c, ...)
+      os.chdir(self.journal.cwd)
+      return self.journal.argv
+
+    return argv
+
+
   def run_misc(self):
     """ run chosen misc options """
 
@@ -157,8 +212,15 @@ class Controller:
     self.file.make_dir(logpath)
     nmap.set_logfile(logfile)
 
-    # build nmap command line
-    nmap.build_cmd()
+    # nmap phase of resumed scan is done already
+    if self.journal.nmap == 'done':
+      return f'{logfile}.xml'
+
+    # build nmap command line. continue an interrupted nmap run
+    if self.journal.nmap == 'start' and os.path.isfile(f'{logfile}.gnmap'):
+      nmap.build_resume_cmd()
+    else:
+      nmap.build_cmd()
 
     # start scans
     self.log('NMAP mode activated\n', _type='msg', color='blue')
@@ -166,153 +228,297 @@ class Controller:
       self.opt.opts['targets']['nmap']['hosts'])), _type='msg')
     if self.opt.opts['verbose']:
       self.log('\n')
-      for target in self.opt.opts['targets']['nmap']['hosts']:
+      for target in self.opt.opts['targets']['nmap']['hosts'].specs():
         self.log(f'{target}\n', _type='msg')
+    self.journal.write('nmap', state='start')
     nmap.scan(debug=self.opt.opts['debug'])
+    self.journal.write('nmap', state='done')
 
     return f'{logfile}.xml'
 
 
+  def new_scheduler(self):
+    """ create scheduler for the next run of tasks. the plan mode expands all
+    tasks into a single scheduler """
+
+    if self.opt.opts['plan']:
+      if not self.sched:
+        self.sched = Scheduler(self.mod, self.opt.opts, None)
+      return
+
+    self.sched = Scheduler(self.mod, self.opt.opts, self.pool, self.notify,
+      self.journal)
+
+    # worker nodes take tasks of the new scheduler
+    if self.coord:
+      self.coord.hub.set_scheduler(self.sched)
+
+    if self.metrics:
+      self.sched.metrics = self.metrics
+      self.metrics.set_scheduler(self.sched)
+    self.sched.accounting = self.accounting
+
+    return
+
+
+  def run_tasks(self):
+    """ plan and run all tasks of the scheduler. nothing is run in plan mode
+    (--plan) """
+
+    if self.opt.opts['plan']:
+      return
+
+    self.plan_tools()
+    self.log('Shooting tools\n\n', color='green', _type='msg')
+    with span('tools', 'scheduler', tasks=self.sched.num_tasks):
+      self.sched.run()
+    self.count_cache()
+    self.log('\n')
+    if not self.opt.opts['verbose']:
+      self.log('\n')
+    self.log('Tools done\n\n', _type='msg', color='green')
+
+    return
+
+
+  def run_plan_mode(self):
+    """ expand all targets, ports, modules and tools into the task graph
+    without running anything (--plan). prints a summary and writes the plan
+    as json """
+
+    self.log('PLAN mode activated\n\n', _type='msg', color='blue')
+
+    self.nullscan_dir = os.path.abspath(self.opt.opts['nullscan_dir'])
+    self.opt.opts['targets_opts']['nullscan_logdir'] = \
+      f'{self.nullscan_dir}/logs/targets/'
+
+    # open ports of nmap targets are unknown before the scan
+    for host in self.opt.opts['targets']['nmap'].get('hosts', []):
+      self.opt.opts['targets']['tcp'].append({'host': host, 'ports': [],
+        'privip': False})
+    del self.opt.opts['targets']['nmap']
+
+    self.prepare_modules()
+    self.run_modes()
+    if self.sched is None:
+      self.new_scheduler()
+    self.plan_tools()
+
+    plan = self.get_plan()
+    self.log(f"Tasks: {plan['tasks']} ({plan['targets']} targets, " +
+      f"{plan['module_runs']} module runs, {plan['dropped']} dropped)\n",
+      _type='msg')
+    for mod, m in sorted(plan['modules'].items()):
+      self.log(f"{mod}: {m['runs']} runs, {m['tasks']} tasks, " +
+        f"{int(m['work'])}s\n", _type='vmsg')
+    eta = int(plan['runtime'])
+    self.log(f"Processes (est.): {plan['processes']} commands + " +
+      f"{plan['workers']} workers\n", _type='msg')
+    self.log(f"Expected concurrency: {plan['concurrency']}\n", _type='msg')
+    self.log(f'Expected runtime: {eta // 3600}:{eta // 60 % 60:02d}:' +
+      f"{eta % 60:02d} ({int(plan['work'])} worker-seconds)\n\n",
+      _type='msg')
+
+    if self.opt.opts['plan'] == '-':
+      print(json.dumps(plan, indent=2))
+    else:
+      self.file.write_file(self.opt.opts['plan'], json.dumps(plan, indent=2))
+      self.log(f"Plan written to: {self.opt.opts['plan']}\n\n", _type='msg')
+
+    return
+
+
+  def get_plan(self):
+    """ get task graph, counts and expected runtime of the planned scan """
+
+    manifest = self.mod.get_manifest()
+    workers = self.opt.opts['p_workers']
+    tasks = [t for g in self.sched.groups.values() for t in g.tasks]
+    pending = [t for t in tasks if not t.done]
+    plan = {
+      'targets': len({t.group.host for t in tasks}),
+      'module_runs': len(self.sched.groups), 'tasks': len(pending),
+      'dropped': len(tasks) - len(pending), 'processes': 0,
+      'workers': workers, 'work': 0.0, 'modules': {}, 'graph': [],
+    }
+
+    for t in pending:
+      group = t.group
+      m = plan['modules'].setdefault(group.mod, {'runs': 0, 'tasks': 0,
+        'work': 0.0, 'tools': {}})
+      m['tasks'] += 1
+      m['work'] += t.cost
+      m['tools'][t.tool] = m['tools'].get(t.tool, 0) + 1
+      plan['work'] += t.cost
+
+      # internal (python) tools don't run commands
+      entry = manifest[group.mod]['tools'][t.tool]
+      if entry['flag'] != 'int':
+        plan['processes'] += max(1, len(entry['tools']))
+
+      plan['graph'].append({
+        'target': group.host, 'module': group.module, 'mod': group.mod,
+        'tool': t.tool, 'cost': t.cost,
+        'after': sorted([a.group.host, a.group.module, a.tool]
+          for a in t.after if not a.done),
+        'after_modules': sorted([g.host, g.module] for g in group.after),
+      })
+    for g in self.sched.groups.values():
+      if g.mod in plan['modules']:
+        plan['modules'][g.mod]['runs'] += 1
+
+    plan['runtime'], plan['concurrency'] = Planner().simulate(pending,
+      workers)
+
+    return plan
+
+
+  def plan_tools(self):
+    """ drop the tools not fitting into the scan deadline (--deadline) and
+    print the plan """
+
+    if not self.opt.opts['deadline']:
+      return
+
+    left = self.opt.opts['deadline'] - (time.monotonic() - self.started)
+    planner = Planner(self.opt.opts['tool_values'])
+    plan = planner.plan(self.sched.get_pending(), left,
+      self.opt.opts['p_workers'])
+    self.sched.drop(plan['drop'])
+
+    finish = time.strftime('%H:%M:%S', time.localtime(time.time() +
+      plan['runtime']))
+    self.log(f"Planned tools: {len(plan['keep'])} of " +
+      f"{len(plan['keep']) + len(plan['drop'])} (+ default modules), " +
+      f'projected finish: {finish}\n', _type='msg')
+    if self.opt.opts['verbose']:
+      for tool in plan['keep'] + plan['drop']:
+        item = plan['items'][tool]
+        self.log(f"{'run ' if tool in plan['keep'] else 'drop'} {tool} " +
+          f"({item['tasks']} tasks, {int(item['work'])}s)\n", _type='vmsg')
+    elif plan['drop']:
+      self.log(f"Dropped tools: {', '.join(plan['drop'])}\n", _type='msg')
+    self.log('\n')
+
+    return
+
+
+  def add_module(self, mod, target, host, wdir, after=()):
+    """ add module run for target to the scheduler """
+
+    return self.sched.add(mod, target, host, wdir, after)
+
+
   def run_social_mode(self, target):
-    """ run social mode """
+    """ schedule social mode """
 
     if '.social.' in str(self.mod.mods):
       # availabel social modules to import and load
       mods = [i for i in self.mod.mods if '.social.' in i]
 
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for key in target.keys():
-          if target[key]:
-            for t in target[key]:
-              # default module
-              rdir = f'{self.nullscan_dir}/logs/targets/'
-              wdir = f"{rdir}{t}/social/{key}/default"
-              exe.submit(self.mod.run_module, 'modules.social.default', t,
-                self.opt.opts, wdir)
-
-              # non-default modules
-              for m in mods:
-                if 'default' not in m:
-                  splitted = m.split('.')
-                  moddir = splitted[1]
-                  modname = splitted[2]
-                  wdir = f"{rdir}{t}/{moddir}/{key}/{modname}"
-                  exe.submit(self.mod.run_module, m, t, self.opt.opts, wdir)
+      for key in target.keys():
+        if target[key]:
+          for t in target[key]:
+            # default module
+            rdir = f'{self.nullscan_dir}/logs/targets/'
+            wdir = f"{rdir}{t}/social/{key}/default"
+            self.add_module('modules.social.default', t, t, wdir)
+
+            # non-default modules
+            for m in mods:
+              if 'default' not in m:
+                splitted = m.split('.')
+                moddir = splitted[1]
+                modname = splitted[2]
+                wdir = f"{rdir}{t}/{moddir}/{key}/{modname}"
+                self.add_module(m, t, t, wdir)
 
     return
 
 
-  def run_wifi_mode(self, target):
-    """ run wifi mode """
+  def run_default_mode(self, moddir, target, host):
+    """ schedule default module first and non-default modules afterwards """
 
-    if '.wifi.' in str(self.mod.mods):
-      # available wifi modules to import and load
-      mods = [i for i in self.mod.mods if '.wifi.' in i]
+    if f'.{moddir}.' in str(self.mod.mods):
+      # available modules to import and load
+      mods = [i for i in self.mod.mods if f'.{moddir}.' in i]
 
       # default module first
       rdir = f'{self.nullscan_dir}/logs/targets/'
-      wdir = f'{rdir}{target}/wifi/default'
-      self.mod.run_module('modules.wifi.default', target, self.opt.opts, wdir)
+      wdir = f'{rdir}{host}/{moddir}/default'
+      default = self.add_module(f'modules.{moddir}.default', target, host,
+        wdir)
 
       # non-default modules
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for m in mods:
-          if 'default' not in m:
-            splitted = m.split('.')
-            moddir = splitted[1]
-            modname = splitted[2]
-            wdir = f'{rdir}{target}/{moddir}/{modname}'
-            exe.submit(self.mod.run_module, m, target, self.opt.opts, wdir)
+      for m in mods:
+        if 'default' not in m:
+          splitted = m.split('.')
+          moddir = splitted[1]
+          modname = splitted[2]
+          wdir = f'{rdir}{host}/{moddir}/{modname}'
+          self.add_module(m, target, host, wdir, after=[default])
 
     return
 
 
-  def run_lan_mode(self, target):
-    """ run lan mode """
+  def run_wifi_mode(self, target):
+    """ schedule wifi mode """
 
-    if '.lan.' in str(self.mod.mods):
-      # available lan modules to import and load
-      mods = [i for i in self.mod.mods if '.lan.' in i]
+    self.run_default_mode('wifi', target, target)
 
-      # default module first
-      rdir = f'{self.nullscan_dir}/logs/targets/'
-      wdir = f'{rdir}{target}/lan/default'
-      self.mod.run_module('modules.lan.default', target, self.opt.opts, wdir)
+    return
 
-      # non-default modules
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for m in mods:
-          if 'default' not in m:
-            splitted = m.split('.')
-            moddir = splitted[1]
-            modname = splitted[2]
-            wdir = f'{rdir}{target}/{moddir}/{modname}'
-            exe.submit(self.mod.run_module, m, target, self.opt.opts, wdir)
 
-    return
+  def run_lan_mode(self, target):
+    """ schedule lan mode """
 
+    self.run_default_mode('lan', target, target)
 
-  def run_web_mode(self, target):
-    """ run web mode """
+    return
 
-    if '.web.' in str(self.mod.mods):
-      # available web modules to import and load
-      mods = [i for i in self.mod.mods if '.web.' in i]
 
-      # we need host name for working directory
-      host = requests.utils.urlparse(target).netloc
+  def run_web_mode(self, target):
+    """ schedule web mode """
 
-      # default module first
-      rdir = f'{self.nullscan_dir}/logs/targets/'
-      wdir = f'{rdir}{host}/web/default'
-      self.mod.run_module('modules.web.default', target, self.opt.opts, wdir)
+    # we need host name for working directory
+    host = requests.utils.urlparse(target).netloc
 
-      # non-default modules
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for m in mods:
-          if 'default' not in m:
-            splitted = m.split('.')
-            moddir = splitted[1]
-            modname = splitted[2]
-            wdir = f'{rdir}{host}/{moddir}/{modname}'
-            exe.submit(self.mod.run_module, m, target, self.opt.opts, wdir)
+    self.run_default_mode('web', target, host)
 
     return
 
 
   def run_udp_mode(self, target):
-    """ run udp mode """
+    """ schedule udp mode """
 
-    # we need to run host modules before tcp and we need to run default
+    # we need to run host modules before udp and we need to run default
     # tool first
-    self.run_host_mode(target)
+    default = self.run_host_mode(target)
 
-    # now tcp modules
+    # now udp modules
     if '.udp.' in str(self.mod.mods):
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for p in target['ports']:
-          exe.submit(self.run_tcp_udp_mode, target, p, 'udp')
+      for p in target['ports']:
+        self.run_tcp_udp_mode(target, p, 'udp', default)
 
     return
 
 
   def run_tcp_mode(self, target):
-    """ run tcp mode """
+    """ schedule tcp mode """
 
     # we need to run host modules before tcp and we need to run default
     # module first
-    self.run_host_mode(target)
+    default = self.run_host_mode(target)
 
     # now tcp modules
     if '.tcp.' in str(self.mod.mods):
-      with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-        for p in target['ports']:
-          exe.submit(self.run_tcp_udp_mode, target, p, 'tcp')
+      for p in target['ports']:
+        self.run_tcp_udp_mode(target, p, 'tcp', default)
 
     return
 
 
-  def run_tcp_udp_mode(self, host, port, proto):
+  def run_tcp_udp_mode(self, host, port, proto, default):
     """ wrapper for tcp/udp mode """
 
     # available modules
@@ -325,21 +531,22 @@ class Controller:
     # new target dict as we only need the corresponding port
     t = {'host': host['host'], 'port': port[0]}
 
-    # default module first
+    # default module first, after host default module
     rdir = f'{self.nullscan_dir}/logs/targets/'
     wdir = f"{rdir}{t['host']}/{proto}/{port[0]}/default"
-    self.mod.run_module(f'modules.{proto}.default', t, self.opt.opts, wdir)
+    port_default = self.add_module(f'modules.{proto}.default', t, t['host'],
+      wdir, after=[default])
 
     # now non-default module
     if '.default' not in mod:
       wdir = f"{rdir}{t['host']}/{proto}/{port[0]}/{port[1]}"
-      self.mod.run_module(mod, t, self.opt.opts, wdir)
+      self.add_module(mod, t, t['host'], wdir, after=[port_default])
 
     return
 
 
   def run_host_mode(self, target):
-    """ run host mode """
+    """ schedule host mode. returns the host default module """
 
     # available host modules to import and load
     mods = [i for i in self.mod.mods if '.host.' in i]
@@ -347,19 +554,19 @@ class Controller:
     # default module
     rdir = f'{self.nullscan_dir}/logs/targets/'
     wdir = f"{rdir}{target['host']}/host/default"
-    self.mod.run_module('modules.host.default', target, self.opt.opts, wdir)
+    default = self.add_module('modules.host.default', target, target['host'],
+      wdir)
 
     # non-default modules
-    with ProcessPoolExecutor(self.opt.opts['m_workers']) as exe:
-      for m in mods:
-        if 'default' not in m:
-          splitted = m.split('.')
-          moddir = splitted[1]
-          modname = splitted[2]
-          wdir = f"{rdir}{target['host']}/{moddir}/{modname}"
-          exe.submit(self.mod.run_module, m, target, self.opt.opts, wdir)
+    for m in mods:
+      if 'default' not in m:
+        splitted = m.split('.')
+        moddir = splitted[1]
+        modname = splitted[2]
+        wdir = f"{rdir}{target['host']}/{moddir}/{modname}"
+        self.add_module(m, target, target['host'], wdir, after=[default])
 
-    return
+    return default
 
 
   def run_modes(self):
@@ -375,24 +582,17 @@ class Controller:
 
     # run lan mode first if requested
     if self.opt.opts['targets']['lan']:
-      ifaces = []
+      self.new_scheduler()
       self.log('LAN mode activated\n', color='blue', _type='msg')
       self.log(f"Targets added: {len(self.opt.opts['targets']['lan'])}\n\n",
         _type='msg')
       for iface in self.opt.opts['targets']['lan']:
         if self.opt.opts['verbose']:
           self.log(f'{iface}\n', _type='vmsg')
-        ifaces.append((self.run_lan_mode, iface))
+        self.run_lan_mode(iface)
       if self.opt.opts['verbose']:
         self.log('\n')
-      with ProcessPoolExecutor(self.opt.opts['t_workers']) as exe:
-        self.log('Shooting tools\n\n', color='green', _type='msg')
-        for iface in ifaces:
-          exe.submit(iface[0], iface[1])
-      self.log('\n')
-      if not self.opt.opts['verbose']:
-        self.log('\n')
-      self.log('Tools done\n\n', color='green', _type='msg')
+      self.run_tasks()
       for log in glob.glob('**/lan/portscan/*.xml', recursive=True):
         if log:
           self.parser.parse_nmap_logfile(log, lan=True)
@@ -424,17 +624,154 @@ class Controller:
           if self.opt.opts['verbose']:
             self.log('\n')
 
-    # start mode for each target
-    with ProcessPoolExecutor(self.opt.opts['t_workers']) as exe:
-      if scans:
-        self.log('Shooting tools\n\n', color='green', _type='msg')
-        for scan in scans:
-          exe.submit(scan[0], scan[1])
+    # schedule modes for each target and run all tasks
     if scans:
+      self.new_scheduler()
+      with span('schedule', 'mode', targets=len(scans)):
+        for scan in scans:
+          scan[0](scan[1])
+      self.run_tasks()
+
+    return
+
+
+  def count_cache(self):
+    """ add result cache hits and misses of the last scheduler run """
+
+    for k, v in self.sched.cache_stats.items():
+      self.cache_stats[k] += v
+
+    return
+
+
+  def start_pool(self, mods):
+    """ start tool dependency notification service, child registry and
+    worker pool running the tools """
+
+    self.notify.start()
+    self.registry.start(self.notify.mgr)
+
+    # result cache of tools with a ttl
+    cache = self.opt.opts['cache']
+    if cache['ttl']:
+      self.cache = Cache(cache['ttl'], cache['size'], cache['age'])
+
+    self.pool = Pool(self.opt.opts['p_workers'],
+      self.opt.opts['worker_tools'], mods, self.notify, self.registry,
+      self.cache, self.tracer, self.tape)
+    self.pool.start()
+
+    # live metrics
+    if self.opt.opts['metrics']:
+      host, port = self.opt.opts['metrics']
+      self.metrics = Metrics((host, port), self.registry)
+      try:
+        self.metrics.start()
+      except OSError:
+        self.log('metrics', eargs=f'{host}:{port}', _type='err', end='\n')
+      self.log(f'Serving metrics on http://{host}:{port}/metrics\n\n',
+        _type='msg')
+
+    return
+
+
+  def start_tracer(self):
+    """ record spans of the scan (--trace) """
+
+    if self.opt.opts['trace']:
+      self.tracer = Tracer(f'{self.nullscan_dir}/.trace')
+      Tracer.attach(self.tracer)
+
+    return
+
+
+  def end_tracer(self):
+    """ merge spans of all processes into trace.json """
+
+    if self.tracer:
+      Tracer.attach(None)
+      self.tracer.merge(f'{self.nullscan_dir}/trace.json')
+      self.log(f'Trace written to: {self.nullscan_dir}/trace.json\n\n',
+        _type='msg')
+
+    return
+
+
+  def start_tape(self):
+    """ record or replay the external commands of the scan (--record,
+    --replay) """
+
+    tape = self.opt.opts['tape']
+    if not tape['mode']:
+      return
+
+    path = os.path.abspath(tape['path'])
+    if tape['mode'] == 'record':
+      self.file.make_dir(path)
+      self.log(f'Recording commands to: {path}\n\n', _type='msg')
+    else:
+      self.log(f'Replaying commands of: {path}\n\n', _type='msg')
+    self.tape = Tape(path, tape['mode'], self.nullscan_dir, tape['scale'])
+    Tape.attach(self.tape)
+
+    return
+
+
+  def run_node_mode(self):
+    """ run as worker node of a distributed scan: pull tasks from the
+    coordinator until the scan is over """
+
+    host, port = self.opt.opts['connect']
+    self.nullscan_dir = self.file.make_dir(self.opt.opts['nullscan_dir'],
+      incr=True)
+    self.start_tracer()
+    self.start_tape()
+    self.node = Node((host, port), self.opt.opts['remote_key'],
+      self.nullscan_dir)
+    try:
+      setup = self.node.connect()
+    except:
+      self.log('coordinator', eargs=f'{host}:{port}', _type='err', end='\n')
+    self.log(f'Worker node {self.node.node} connected to {host}:{port}\n\n',
+      _type='msg', color='blue')
+
+    self.start_pool(setup['mods'])
+
+    self.log('Shooting tools\n\n', color='green', _type='msg')
+    threads = [threading.Thread(target=self.node.heartbeat, daemon=True)]
+    for _ in range(self.opt.opts['p_workers']):
+      threads.append(threading.Thread(target=self.node.work,
+        args=(self.pool, self.node_status), daemon=True))
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    self.log('\n')
+    if not self.opt.opts['verbose']:
       self.log('\n')
-      if not self.opt.opts['verbose']:
-        self.log('\n')
-      self.log('Tools done\n\n', _type='msg', color='green')
+    self.log('Tools done\n\n', _type='msg', color='green')
+
+    return
+
+
+  def node_status(self, task):
+    """ print status line for task of worker node """
+
+    # host, port or web target (see run_*_mode())
+    target = task['target']
+    if isinstance(target, dict):
+      host = target['host']
+    elif '://' in target:
+      host = requests.utils.urlparse(target).netloc
+    else:
+      host = target
+    stat_line = f"{host} | {'.'.join(task['mod'].split('.')[1:])}." + \
+      f"{task['tool']}" + ' ' * 25
+
+    if self.opt.opts['verbose']:
+      self.log(stat_line, _type='vmsg', end='\n')
+    else:
+      self.log(stat_line, _type='vmsg', flush=True, end='\r')
 
     return
 
@@ -442,19 +779,47 @@ class Controller:
   def start(self):
     """ nullscan starts here with actions """
 
+    # dry-run, nothing is run or written but the plan
+    if self.opt.opts['plan']:
+      self.run_plan_mode()
+      return
+
     self.check.check_uid()
     self.log('Game Started\n\n', _type='msg')
 
-    # create nullscan working, targets and log dir
-    self.nullscan_dir = self.file.make_dir(self.opt.opts['nullscan_dir'],
-      incr=True)
+    # worker node of a distributed scan
+    if self.opt.opts['worker']:
+      self.run_node_mode()
+      return
+
+    # create nullscan working, targets and log dir. a resumed scan goes on in
+    # its existing working dir
+    if self.resume:
+      self.nullscan_dir = self.resume
+      self.log(f'Resuming scan: {self.resume}\n\n', _type='msg')
+    else:
+      self.nullscan_dir = self.file.make_dir(self.opt.opts['nullscan_dir'],
+        incr=True)
+      self.journal = Journal(self.nullscan_dir)
     self.file.make_dir(f'{self.nullscan_dir}/logs/targets')
+
+    # record scan in session journal
+    self.journal.open()
+    if self.resume:
+      self.journal.write('resume')
+    else:
+      self.journal.write('scan', argv=sys.argv, cwd=os.getcwd())
     self.opt.opts['targets_opts']['nullscan_logdir'] = \
       f'{self.nullscan_dir}/logs/targets/'
+    self.accounting = Accounting(f'{self.nullscan_dir}/stats.jsonl')
+    self.start_tracer()
+    self.start_tape()
 
     # run nmap mode first if requested
     if 'hosts' in self.opt.opts['targets']['nmap']:
-      self.parser.parse_nmap_logfile(self.run_nmap_mode())
+      with span('nmap', 'mode'):
+        logfile = self.run_nmap_mode()
+      self.parser.parse_nmap_logfile(logfile)
       self.log('\n')
 
     # delete nmap key
@@ -463,15 +828,45 @@ class Controller:
     # prepare modules for other modes
     self.prepare_modules()
 
+    # start worker pool running the tools of all modes
+    self.start_pool(self.mod.mods)
+
+    # coordinate a distributed scan
+    if self.opt.opts['listen']:
+      host, port = self.opt.opts['listen']
+      self.coord = Coordinator((host, port), self.opt.opts['remote_key'],
+        Hub(self.nullscan_dir, self.opt.opts, self.mod.mods))
+      self.coord.start()
+      self.log(f'Waiting for worker nodes on {host}:{port}\n\n', _type='msg')
+
     # run the nullscan modes now
     self.run_modes()
 
     return
 
 
+  def abort(self):
+    """ kill all running commands (process groups) and workers """
+
+    # killed tools must not be journaled as failed. they are run again when
+    # the scan gets resumed
+    if self.journal:
+      self.journal.close()
+
+    if self.notify.mgr:
+      self.registry.kill()
+      self.notify.stop()
+
+    return
+
+
   def end(self):
     """ program ends here. clean-ups, reporting, etc. """
 
+    if self.opt.opts['plan']:
+      self.log('Game Over\n', _type='msg')
+      return
+
     # go back to root dir
     os.chdir(ROOT_PATH)
 
@@ -479,8 +874,45 @@ class Controller:
     # a singl ebyte (newline) (failed tools)
     self.misc.remove_empty_files_dirs(f'{self.nullscan_dir}/logs/targets/')
 
-    # just to be safe - delete all locks, in case tools didn't
-    self.file.del_file('/tmp/nullscan', _dir=True)
+    # send worker nodes home
+    if self.coord:
+      self.coord.stop()
+
+    if self.metrics:
+      self.metrics.stop()
+
+    # stop worker pool, kill left commands and stop tool dependency
+    # notification service
+    if self.pool:
+      self.pool.stop()
+    self.registry.kill(workers=False)
+    self.notify.stop()
+
+    # worker nodes are done here. logfiles were sent to the coordinator
+    if self.node:
+      if self.cache:
+        self.cache.evict()
+      self.end_tracer()
+      self.log('Game Over\n', _type='msg')
+      self.misc.reset_terminal()
+      return
+
+    # all tools done
+    self.journal.write('end')
+    self.journal.close()
+
+    # result cache stats and eviction
+    if self.cache:
+      self.log(f"Cached results: {self.cache_stats['hit']} hits, " +
+        f"{self.cache_stats['miss']} misses\n\n", _type='msg')
+      self.cache.evict()
+
+    # most expensive tools
+    if self.accounting and self.accounting.tools:
+      self.log('Most expensive tools (see stats.jsonl)\n\n', _type='msg')
+      for line in self.accounting.summary():
+        self.log(f'{line}\n', _type='vmsg')
+      self.log('\n')
 
     # create report
     if self.opt.opts['report']:
@@ -489,8 +921,10 @@ class Controller:
       rep_dir = f'{self.nullscan_dir}/report'
       logs_dir = f'{self.nullscan_dir}/logs'
       self.report = HTML(TODAY, self.opt.opts, tmpl_dir, rep_dir, logs_dir)
-      self.report.make_report()
+      with span('report', 'report'):
+        self.report.make_report()
       self.log('Report done\n\n', _type='msg')
+    self.end_tracer()
     self.log('Game Over\n', _type='msg')
 
     # reset terminal to original state. sometimes fuck up occurs because of
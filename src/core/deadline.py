@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# deadline.py                                                                  #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import time
+import ctypes
+import socket
+import threading
+from contextlib import contextmanager
+
+
+# own imports
+
+
+# seconds after its expiry a deadline raises TimeoutError asynchronously in
+# threads which didn't reach a cancellation point yet
+GRACE = 5
+
+# max seconds between two updates of the default socket timeout
+SOCK_REFRESH = 1.0
+
+
+class Deadline:
+  """ per-task deadline which works in any thread.
+
+  cooperative: commands started while a deadline is active get their timeout
+  capped by the remaining time, dependency waits end with it and sockets
+  created meanwhile block no longer than the latest active deadline. tools
+  check their deadlines at the cancellation points (commands, dependency
+  waits, notify calls), see checkpoint(). a thread works for the deadlines it
+  started and, once bound (bind()), for the ones of the thread owning given
+  deadline (e.g. thread pool threads of a tool).
+
+  watchdog: last resort for pure python loops. a single watchdog thread per
+  process raises TimeoutError asynchronously (once) in the threads working for
+  a deadline which expired GRACE seconds ago. never while a thread is within
+  shield() (e.g. manager calls, whose connection would get out of sync).
+  """
+
+  # active deadlines of this process and deadlines the threads work for
+  # (thread ident -> list, innermost last)
+  active = []
+  stacks = {}
+  shields = {}                # thread ident -> depth of shield()
+  cond = threading.Condition()
+  watchdog = None
+  pid = None
+  sock_timeout = None         # default socket timeout without deadlines
+
+
+  def __init__(self, seconds, name=''):
+    """ constructor """
+
+    self.name = name
+    self.seconds = seconds
+    self.owner = threading.get_ident()
+    self.expires = time.monotonic() + seconds
+    self.threads = {}           # thread ident -> num of bindings
+    self.raised = set()         # threads TimeoutError was raised in
+
+    return
+
+
+  @staticmethod
+  def current():
+    """ get innermost deadline the current thread works for """
+
+    with Deadline.cond:
+      stack = Deadline.stacks.get(threading.get_ident())
+      return stack[-1] if stack else None
+
+
+  @staticmethod
+  def cap(timeout=None):
+    """ cap given timeout (seconds or None) by the current deadline """
+
+    d = Deadline.current()
+    if d is None:
+      return timeout
+
+    left = d.remaining()
+    if timeout is None:
+      return left
+
+    return min(timeout, left)
+
+
+  def remaining(self):
+    """ seconds left until the deadline expires """
+
+    return max(0.0, self.expires - time.monotonic())
+
+
+  def check(self):
+    """ raise TimeoutError if the deadline expired """
+
+    if self.remaining() == 0:
+      raise TimeoutError
+
+    return
+
+
+  @staticmethod
+  def checkpoint():
+    """ cooperative cancellation point: raise TimeoutError if any deadline the
+    current thread works for expired """
+
+    with Deadline.cond:
+      stack = list(Deadline.stacks.get(threading.get_ident(), ()))
+
+    for d in stack:
+      d.check()
+
+    return
+
+
+  def start(self):
+    """ activate deadline for the current thread and make sure the watchdog
+    is running """
+
+    with Deadline.cond:
+      if Deadline.watchdog is None or Deadline.pid != os.getpid():
+        # forked child: the watchdog of the parent didn't survive
+        Deadline.active = []
+        Deadline.stacks = {}
+        Deadline.shields = {}
+        Deadline.pid = os.getpid()
+        Deadline.watchdog = threading.Thread(target=Deadline.watch,
+          daemon=True, name='deadline-watchdog')
+        Deadline.watchdog.start()
+      if not Deadline.active:
+        Deadline.sock_timeout = socket.getdefaulttimeout()
+      Deadline.active.append(self)
+      self.enter(threading.get_ident(), [self])
+      Deadline.set_sock_timeout()
+      Deadline.cond.notify()
+
+    return
+
+
+  def stop(self):
+    """ deactivate deadline. a TimeoutError raised by the watchdog which did
+    not hit the current thread yet is withdrawn """
+
+    with Deadline.cond:
+      if self in Deadline.active:
+        Deadline.active.remove(self)
+      self.leave(threading.get_ident(), [self])
+      Deadline.set_sock_timeout()
+
+    return
+
+
+  def enter(self, ident, deadlines):
+    """ let thread work for given deadlines (lock held) """
+
+    Deadline.stacks.setdefault(ident, []).extend(deadlines)
+    for d in deadlines:
+      d.threads[ident] = d.threads.get(ident, 0) + 1
+
+    return
+
+
+  def leave(self, ident, deadlines):
+    """ thread stops working for given deadlines (lock held) """
+
+    stack = Deadline.stacks.get(ident, [])
+    for d in deadlines:
+      if d in stack:
+        del stack[len(stack) - 1 - stack[::-1].index(d)]
+      d.threads[ident] = d.threads.get(ident, 1) - 1
+      if d.threads[ident] <= 0:
+        del d.threads[ident]
+        if ident in d.raised:
+          Deadline.raise_in(ident, None)
+    if not stack:
+      Deadline.stacks.pop(ident, None)
+
+    return
+
+
+  @staticmethod
+  @contextmanager
+  def bind(deadline):
+    """ let the current thread work for the deadlines of the thread owning
+    given deadline within the with-block. nothing is done if it already
+    works for it or deadline is None """
+
+    ident = threading.get_ident()
+    deadlines = []
+
+    with Deadline.cond:
+      if deadline is not None and \
+        deadline not in Deadline.stacks.get(ident, ()):
+          deadlines = list(Deadline.stacks.get(deadline.owner, [deadline]))
+          deadline.enter(ident, deadlines)
+
+    try:
+      yield
+    finally:
+      if deadlines:
+        with Deadline.cond:
+          deadline.leave(ident, deadlines)
+
+    return
+
+
+  @staticmethod
+  @contextmanager
+  def shield():
+    """ never raise TimeoutError asynchronously within the with-block. a
+    pending one is withdrawn, the next cancellation point raises it """
+
+    ident = threading.get_ident()
+
+    with Deadline.cond:
+      Deadline.raise_in(ident, None)
+      Deadline.shields[ident] = Deadline.shields.get(ident, 0) + 1
+
+    try:
+      yield
+    finally:
+      with Deadline.cond:
+        Deadline.shields[ident] -= 1
+        if Deadline.shields[ident] == 0:
+          del Deadline.shields[ident]
+
+    return
+
+
+  @staticmethod
+  def reset():
+    """ forget deadlines left behind by the current thread, e.g. if a
+    TimeoutError hit the stop() of one """
+
+    ident = threading.get_ident()
+
+    with Deadline.cond:
+      for d in Deadline.stacks.pop(ident, []):
+        d.threads.pop(ident, None)
+        if d.owner == ident and d in Deadline.active:
+          Deadline.active.remove(d)
+      Deadline.raise_in(ident, None)
+      Deadline.set_sock_timeout()
+
+    return
+
+
+  @staticmethod
+  def set_sock_timeout():
+    """ sockets created while deadlines are active block no longer than the
+    latest of them expires (lock held) """
+
+    timeout = Deadline.sock_timeout
+    if Deadline.active:
+      # 0 would make them non-blocking
+      left = max(max(d.remaining() for d in Deadline.active), 0.001)
+      timeout = left if timeout is None else min(timeout, left)
+    socket.setdefaulttimeout(timeout)
+
+    return
+
+
+  @staticmethod
+  def raise_in(ident, exc):
+    """ raise exception asynchronously in given thread (None withdraws) """
+
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident),
+      ctypes.py_object(exc) if exc else None)
+
+    return
+
+
+  @staticmethod
+  def watch():
+    """ watchdog loop: raise TimeoutError in the threads working for deadlines
+    expired GRACE seconds ago, unless shielded. keeps the default socket
+    timeout up to date """
+
+    with Deadline.cond:
+      while True:
+        now = time.monotonic()
+        wait = None
+        if Deadline.active:
+          Deadline.set_sock_timeout()
+          wait = SOCK_REFRESH
+        for d in Deadline.active:
+          if d.expires + GRACE > now:
+            left = d.expires + GRACE - now
+          else:
+            left = None
+            for ident in d.threads:
+              if ident in d.raised:
+                continue
+              if ident in Deadline.shields:
+                left = GRACE
+                continue
+              d.raised.add(ident)
+              Deadline.raise_in(ident, TimeoutError)
+          if left is not None and (wait is None or left < wait):
+            wait = left
+        Deadline.cond.wait(wait)
+
+    return
+
+
+# EOF
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# engine.py                                                                    #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import signal
+import asyncio
+import threading
+import psutil
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+# own imports
+from core.registry import Registry
+from core.deadline import Deadline
+from core.tape import Tape
+
+
+# min and max seconds between two checks of a command (stall detection, peak
+# rss)
+SAMPLE_MIN = 0.1
+STALL_CHECK = 10
+
+
+class Command(asyncio.SubprocessProtocol):
+  """ a running command. its output is captured or streamed in chunks to a
+  sink """
+
+
+  def __init__(self, loop, sink=None, keep=False):
+    """ constructor """
+
+    self.pid = None
+    self.usage = {}             # sampled usage, see Engine.get_usage()
+    self.sink = sink
+    self.keep = keep            # capture streamed output, too (--record)
+    self.chunks = []
+    self.error = None           # sink failed
+    self.loop = loop
+    self.last_output = loop.time()
+    self.exited = loop.create_future()
+    self.closed = loop.create_future()
+
+    return
+
+
+  def pipe_data_received(self, fd, data):
+    """ stream or capture chunk of output """
+
+    self.last_output = self.loop.time()
+
+    if self.error:
+      return
+
+    try:
+      if self.sink:
+        self.sink.write(data)
+      if self.keep or not self.sink:
+        self.chunks.append(data)
+    except Exception as e:
+      self.error = e
+
+    return
+
+
+  def process_exited(self):
+    """ command (process group leader) exited """
+
+    if not self.exited.done():
+      self.exited.set_result(None)
+
+    return
+
+
+  def connection_lost(self, exc):
+    """ command exited and all pipes are closed """
+
+    if not self.closed.done():
+      self.closed.set_result(None)
+
+    return
+
+
+class Job:
+  """ a tool run by the engine: its working dir, which its commands run in,
+  and the usage of its commands. several tools (jobs) of a process share the
+  engine, so nothing of it is per process """
+
+  # job of the current thread (see bind())
+  local = threading.local()
+
+
+  def __init__(self, wdir):
+    """ constructor """
+
+    self.wdir = wdir
+    self.lock = threading.Lock()
+
+    # commands, the ones which hit their timeout and the stalled ones
+    self.commands = 0
+    self.timeouts = 0
+    self.stalls = 0
+
+    # peak rss (bytes) of the commands, their cpu time and bytes read and
+    # written (sampled, see Engine.get_usage()), first failed exit status,
+    # why a command (or the tool) was cancelled (timeout, stall, budget) and
+    # seconds the tool was blocked waiting for other tools
+    self.peak_rss = 0
+    self.usage = {'user': 0.0, 'sys': 0.0, 'read': 0, 'write': 0}
+    self.status = None
+    self.reason = None
+    self.waited = 0.0
+
+    return
+
+
+  @staticmethod
+  def current():
+    """ get job of the current thread """
+
+    return getattr(Job.local, 'job', None)
+
+
+  @contextmanager
+  def bind(self):
+    """ let the current thread work for the job within the with-block """
+
+    prev = Job.current()
+    Job.local.job = self
+
+    try:
+      yield self
+    finally:
+      Job.local.job = prev
+
+    return
+
+
+  def add(self, usage):
+    """ add usage (cpu time, bytes read and written) of a command """
+
+    with self.lock:
+      for k, v in usage.items():
+        self.usage[k] += v
+
+    return
+
+
+  def wait(self, seconds):
+    """ add seconds the tool was blocked waiting for other tools """
+
+    with self.lock:
+      self.waited += seconds
+
+    return
+
+
+class Engine:
+  """ asyncio based engine running external commands. a single event loop per
+  process supervises all child processes (deadlines, output capture, killing)
+  of the tools (jobs) running in it, no matter from which thread they were
+  started """
+
+  # engine of the current process
+  shared = None
+  lock = threading.Lock()
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.pid = os.getpid()
+    self.loop = asyncio.new_event_loop()
+    self.loop.set_default_executor(ThreadPoolExecutor(
+      thread_name_prefix='engine'))
+    self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    self.thread.start()
+
+    return
+
+
+  @staticmethod
+  def get():
+    """ get engine of the current process. a forked child never reuses the
+    engine (event loop) of its parent """
+
+    with Engine.lock:
+      if Engine.shared is None or Engine.shared.pid != os.getpid():
+        Engine.shared = Engine()
+
+    return Engine.shared
+
+
+  def run(self, cmd, timeout=None, on_timeout=None, sink=None, idle=None,
+    on_stall=None, job=None):
+    """ run shell command of job (default: the current thread's one) in the
+    job's working dir and wait until it's done. on_timeout(command) is called
+    (in a thread) if the command exceeds its timeout, on_stall(command) once
+    if it made no progress (no output, no cpu time) for idle seconds. output
+    is streamed in chunks to sink.write() if given, otherwise it's captured.
+    returns the (captured) output and whether the timeout was hit """
+
+    # commands never outlive the deadline of their tool
+    timeout = Deadline.cap(timeout)
+    job = job or Job.current() or Job(os.getcwd())
+
+    fut = asyncio.run_coroutine_threadsafe(self.exec(cmd, job, timeout,
+      on_timeout, sink, idle, on_stall), self.loop)
+
+    return fut.result()
+
+
+  async def exec(self, cmd, job, timeout=None, on_timeout=None, sink=None,
+    idle=None, on_stall=None):
+    """ run shell command of job in the event loop. the command runs in its
+    own process group, which is killed as soon as the command is done, so
+    nothing it started is left behind. with a tape the command is recorded or
+    its recording is replayed """
+
+    timed_out = False
+    status = None
+    tape = Tape.shared
+    cwd = job.wdir
+    run = cmd
+
+    if tape and tape.mode == 'replay':
+      run = await self.loop.run_in_executor(None, tape.play, cmd, cwd)
+    keep = tape is not None and tape.mode == 'record'
+
+    start = self.loop.time()
+    transport, proc = await self.loop.subprocess_shell(
+      lambda: Command(self.loop, sink, keep), run,
+      stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+      start_new_session=True, cwd=cwd)
+    proc.pid = transport.get_pid()
+    job.commands += 1
+    if Registry.shared:
+      Registry.shared.add(proc.pid, {'cmd': cmd, 'cwd': cwd})
+
+    try:
+      try:
+        await self.wait(proc, job, timeout, idle, on_stall)
+      except asyncio.TimeoutError:
+        timed_out = True
+        job.timeouts += 1
+        job.reason = 'timeout'
+        if on_timeout:
+          await self.loop.run_in_executor(None, on_timeout, proc)
+        else:
+          self.kill(proc)
+        await proc.exited
+      self.kill(proc)
+      await proc.closed
+    finally:
+      self.kill(proc)
+      status = transport.get_returncode()
+      if not job.status:
+        job.status = status
+      job.add(proc.usage)
+      transport.close()
+      if Registry.shared:
+        Registry.shared.remove(proc.pid)
+
+    output = b''.join(proc.chunks)
+    if keep:
+      await self.loop.run_in_executor(None, tape.record, cmd, cwd,
+        self.loop.time() - start, status, timed_out, output)
+      if sink:
+        output = b''
+
+    if proc.error:
+      raise proc.error
+
+    return output, timed_out
+
+
+  async def wait(self, proc, job, timeout=None, idle=None, on_stall=None):
+    """ wait until command of job exited. raises TimeoutError after timeout
+    seconds. the process tree of the command is checked for its usage (more
+    often at first) and, with idle given, for progress (output or cpu time).
+    on_stall(command) is called once if it made none for idle seconds """
+
+    end = None if timeout is None else self.loop.time() + timeout
+    cpu = self.get_usage(proc, job)
+    progress = self.loop.time()
+    check = min(STALL_CHECK, idle / 4) if idle else STALL_CHECK
+    wait = SAMPLE_MIN
+
+    while True:
+      if end is not None:
+        wait = min(wait, end - self.loop.time())
+        if wait <= 0:
+          raise asyncio.TimeoutError
+      try:
+        await asyncio.wait_for(asyncio.shield(proc.exited), wait)
+        return
+      except asyncio.TimeoutError:
+        pass
+      wait = min(wait * 2, check)
+      now = self.loop.time()
+      used = self.get_usage(proc, job)
+      if not idle:
+        continue
+      if used > cpu or proc.last_output > progress:
+        cpu = used
+        progress = max(now, proc.last_output)
+      elif now - progress >= idle:
+        job.stalls += 1
+        job.reason = 'stall'
+        if on_stall:
+          await self.loop.run_in_executor(None, on_stall, proc)
+        else:
+          self.kill(proc)
+        await asyncio.wait_for(asyncio.shield(proc.exited),
+          None if end is None else max(0.0, end - self.loop.time()))
+        return
+
+    return
+
+
+  def get_usage(self, proc, job):
+    """ cpu time (seconds) used by command and its (alive) children. keeps
+    their cpu time and bytes read and written as usage of the command and
+    updates the peak rss of job with the rss of all of them """
+
+    usage = {'user': 0.0, 'sys': 0.0, 'read': 0, 'write': 0}
+    rss = 0
+
+    try:
+      procs = psutil.Process(proc.pid)
+      procs = [procs] + procs.children(recursive=True)
+    except psutil.Error:
+      return sum(proc.usage.get(k, 0.0) for k in ('user', 'sys'))
+
+    for p in procs:
+      try:
+        t = p.cpu_times()
+        usage['user'] += t.user + t.children_user
+        usage['sys'] += t.system + t.children_system
+        rss += p.memory_info().rss
+        io = p.io_counters()
+        usage['read'] += io.read_bytes
+        usage['write'] += io.write_bytes
+      except (psutil.Error, AttributeError):
+        pass
+    job.peak_rss = max(job.peak_rss, rss)
+
+    # exited children don't count anymore, keep the highest values
+    for k, v in usage.items():
+      proc.usage[k] = max(proc.usage.get(k, 0), v)
+
+    return proc.usage['user'] + proc.usage['sys']
+
+
+  def kill(self, proc):
+    """ kill process group of process (if still alive) """
+
+    try:
+      os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+      pass
+
+    return
+
+
+# EOF
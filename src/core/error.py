@@ -48,8 +48,15 @@ class Error:
       'r00t': 'You are not r00t. Some tools will fail!',
       'workers': 'Are you kidding me, more than 255 workers? ...',
       'tool_timeout': 'Timeout expired for tool: ',
+      'tool_stalled_kill': 'No progress, killed tool: ',
+      'tool_stalled_flag': 'No progress (still running) for tool: ',
       'tool_interrupt': 'Interrupted by user: ',
       'tool_failed': 'Something went wrong with tool: ',
+      'budget_target': 'Budget exceeded, skipping tools of target: ',
+      'budget_module': 'Budget exceeded, skipping tools of module: ',
+      'node_dead': 'Worker node is gone, running its tools again: ',
+      'breaker': 'Target seems down, skipping its tools: ',
+      'replay_miss': 'No recording, skipping command: ',
       'nmap_verbose': 'Use verbose mode to see the nmap scan progress.',
     }
 
@@ -75,6 +82,11 @@ class Error:
       'report': 'Unknown report format: ',
       'workers': 'Workers must be a number.',
       'timeout': 'Timeout must be a number for seconds.',
+      'budget': 'Budgets must be a number for seconds.',
+      'deadline': 'Deadline must be a number for seconds.',
+      'tool_values': 'Tool values must be tool:number pairs.',
+      'breaker': 'Breaker and probe interval must be numbers, 0 or greater.',
+      'stall': 'Idle times must be seconds, actions kill or flag.',
       'protocol': 'Unknown protocol for host mode: ',
       'port': 'Invalid port specified: ',
       'wwwurl': 'Incorrect www URL specified: ',
@@ -96,6 +108,15 @@ class Error:
       'nmap_root': 'You are not r00t and requested -sU... dumb.',
       'file_del': 'Could not delete file: ',
       'hostrange': 'Wrong host or CIDR range defined: ',
+      'resume': 'No scan to resume found in: ',
+      'address': 'Wrong address specified (host:port): ',
+      'connect': 'Worker nodes need a coordinator to --connect to.',
+      'metrics': 'Could not serve metrics on: ',
+      'tape': 'Options --record and --replay are not allowed together',
+      'tape_scale': 'Replay scale must be a number, 0 or greater.',
+      'tape_replay': 'No recorded commands found in: ',
+      'remote_key': 'Distributed scans need a remote_key in the config file.',
+      'coordinator': 'Could not connect to coordinator: ',
     }
 
     return
@@ -42,27 +42,6 @@ class File:
     return
 
 
-  def destroy_lock(self, tool):
-    """ unlock / remove directory """
-
-    lock = f'/tmp/nullscan/{tool}.lck'
-
-    self.del_file(lock, _dir=True)
-
-    return
-
-
-  def create_lock(self, tool):
-    """ create lock-dir by '/tmp/nullscan/<tool> + '.lck' """
-
-    lock = f'/tmp/nullscan/{tool}.lck'
-
-    if not os.path.isdir(lock):
-      os.makedirs(lock)
-
-    return
-
-
   def del_file(self, _file, _dir=False):
     """ delete a file """
 
@@ -115,6 +94,20 @@ class File:
     return
 
 
+  def read_lines(self, filename):
+    """ read file line by line + strip all leading/trailing w-spaces. lines
+    are read lazily, the file is never loaded as a whole """
+
+    try:
+      with open(filename, 'r', encoding='latin-1', errors='ignore') as f:
+        for line in f:
+          yield line.strip()
+    except OSError:
+      self.log('rfile', eargs=filename, _type='err', end='\n')
+
+    return
+
+
   def read_csv_file(self, filename, delim=';'):
     """ read csv file """
 
@@ -143,7 +136,8 @@ class File:
 
 
   def make_dir(self, path, incr=False):
-    """ create a directory. don't cry if exist: append '-' + <num> """
+    """ create a directory. don't cry if exist: append '-' + <num> if incr,
+    otherwise use the existing one """
 
     i = 0
     suffix = ''
@@ -157,6 +151,8 @@ class File:
         break
       except OSError as err:
         if err.errno == errno.EEXIST:
+          if not incr:
+            break
           i += 1
         else:
           self.log('mkdir', eargs=str(err), _type='err', end='\n')
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# health.py                                                                    #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import socket
+import threading
+import urllib.parse
+
+
+# own imports
+
+
+# seconds a liveness probe waits for a connect
+PROBE_TIMEOUT = 5
+
+# max ports of a target probed
+PROBE_PORTS = 3
+
+# failed probes in a row which trip a target
+PROBE_FAILS = 2
+
+
+class Health:
+  """ per-target health tracker (circuit breaker).
+
+  results of tools are fed in: timeouts, failures and empty output are bad,
+  anything else is good. after a number of bad results in a row the target
+  gets a liveness probe (tcp connect to its known tcp ports, a refused
+  connection means the host is up). targets with running or pending tools are
+  probed periodically, too. a target failing PROBE_FAILS probes in a row is
+  tripped: the scheduler skips its pending tools and kills its running
+  commands. targets without known tcp ports are never tripped.
+  """
+
+
+  def __init__(self, threshold, interval=0):
+    """ constructor """
+
+    self.threshold = threshold  # bad results in a row before probing
+    self.interval = interval    # seconds between periodic probes (0 -> off)
+
+    self.ports = {}             # target -> {(host, port), ...}
+    self.bad = {}               # target -> bad results in a row
+    self.fails = {}             # target -> failed probes in a row
+    self.tripped = set()
+    self.lock = threading.Lock()
+
+    return
+
+
+  def add_target(self, host, target, klass):
+    """ collect the tcp ports to probe out of a target passed to a module of
+    given class (tcp, web, ...). ports of host modules may be udp ones """
+
+    ports = set()
+
+    if klass == 'tcp' and type(target) == dict and target.get('host') and \
+      target.get('port'):
+        ports.add((target['host'], int(target['port'])))
+    elif klass == 'web' and type(target) == str and '://' in target:
+      url = urllib.parse.urlparse(target)
+      if url.scheme in ('http', 'https') and url.hostname:
+        ports.add((url.hostname, url.port or
+          (443 if url.scheme == 'https' else 80)))
+
+    with self.lock:
+      known = self.ports.setdefault(host, set())
+      for p in sorted(ports):
+        if len(known) < PROBE_PORTS:
+          known.add(p)
+
+    return
+
+
+  def record(self, host, bad):
+    """ feed result of a tool. returns True if the target should be probed
+    now """
+
+    with self.lock:
+      if host in self.tripped or not self.ports.get(host):
+        return False
+      if not bad:
+        self.bad[host] = 0
+        return False
+      self.bad[host] = self.bad.get(host, 0) + 1
+      if self.bad[host] < self.threshold:
+        return False
+      self.bad[host] = 0
+
+    return True
+
+
+  def probe(self, host):
+    """ liveness probe of target. returns True if the target is tripped now """
+
+    with self.lock:
+      if host in self.tripped:
+        return False
+      ports = list(self.ports.get(host, ()))
+    if not ports:
+      return False
+
+    alive = False
+    for addr in ports:
+      try:
+        socket.create_connection(addr, PROBE_TIMEOUT).close()
+        alive = True
+        break
+      except ConnectionRefusedError:
+        # closed port, but the host answered
+        alive = True
+        break
+      except OSError:
+        pass
+
+    with self.lock:
+      if alive:
+        self.fails[host] = 0
+        return False
+      self.fails[host] = self.fails.get(host, 0) + 1
+      if self.fails[host] < PROBE_FAILS:
+        return False
+      self.tripped.add(host)
+
+    return True
+
+
+  def is_tripped(self, host):
+    """ check if target is tripped """
+
+    return host in self.tripped
+
+
+# EOF
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# history.py                                                                   #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import json
+import threading
+
+
+# own imports
+from core.constants import *
+
+
+# samples kept per tool
+SAMPLES = 100
+
+
+class History:
+  """ persistent runtime history of all tools across scans. every finished
+  tool run adds a sample (wall time, cpu time, bytes of output). the expected
+  runtime of a tool is the median wall time of its samples """
+
+
+  def __init__(self, path=HISTORY):
+    """ constructor """
+
+    self.path = path
+    self.tools = {}             # tool -> list of [wall, cpu, bytes]
+    self.new = {}               # samples of this scan, not saved yet
+    self.lock = threading.Lock()
+
+    return
+
+
+  def load(self):
+    """ load history. a missing or broken file means no history """
+
+    try:
+      with open(self.path, 'r', encoding='utf-8') as f:
+        self.tools = json.load(f)
+    except:
+      self.tools = {}
+
+    return self
+
+
+  def save(self):
+    """ merge samples of this scan into the history file (other scans may
+    have saved in the meantime) and write it atomically """
+
+    with self.lock:
+      new, self.new = self.new, {}
+    if not new:
+      return
+
+    tmp = f'{self.path}.{os.getpid()}'
+
+    try:
+      tools = History(self.path).load().tools
+      for tool, samples in new.items():
+        tools[tool] = (tools.get(tool, []) + samples)[-SAMPLES:]
+      os.makedirs(os.path.dirname(self.path), exist_ok=True)
+      with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(tools, f)
+      os.replace(tmp, self.path)
+    except:
+      if os.path.exists(tmp):
+        os.unlink(tmp)
+
+    return
+
+
+  def add(self, tool, wall, cpu=0.0, out=0):
+    """ add sample of a finished tool run """
+
+    sample = [round(wall, 3), round(cpu, 3), out]
+
+    with self.lock:
+      self.tools[tool] = (self.tools.get(tool, []) + [sample])[-SAMPLES:]
+      self.new.setdefault(tool, []).append(sample)
+
+    return
+
+
+  def percentile(self, tool, p, field=0):
+    """ get p-th percentile of given field (0: wall, 1: cpu, 2: bytes) of
+    tool's samples or None without history """
+
+    with self.lock:
+      values = sorted(s[field] for s in self.tools.get(tool, []))
+    if not values:
+      return None
+
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+  def expect(self, tool, default=None):
+    """ expected wall time of tool (p50) """
+
+    p50 = self.percentile(tool, 50)
+
+    return default if p50 is None else p50
+
+
+  def stats(self, tool):
+    """ p50/p95 of wall time, cpu time and bytes of output of tool """
+
+    return {f'{k}_p{p}': self.percentile(tool, p, i) for i, k in
+      enumerate(('wall', 'cpu', 'bytes')) for p in (50, 95)}
+
+
+# EOF
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# journal.py                                                                   #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import json
+import time
+import threading
+from collections import deque
+
+
+# own imports
+
+
+# journal file inside nullscan's working dir
+JOURNAL = 'journal.log'
+
+# final task states. anything else (planned, running, failed, skipped because
+# of a budget, a tripped breaker or the planner) is planned again when resuming
+TASK_DONE = ('done',)
+
+
+class Journal:
+  """ append-only session journal of a scan (one json event per line). it
+  records the cmdline, the nmap phase and planned, running and finished
+  (target, module, tool) tasks, so an interrupted scan can be resumed """
+
+
+  def __init__(self, nullscan_dir):
+    """ constructor """
+
+    self.path = os.path.join(nullscan_dir, JOURNAL)
+    self.fd = None
+    self.lock = threading.Lock()
+    self.queue = deque()        # events not written yet (see task())
+
+    # state replayed from an existing journal
+    self.argv = None
+    self.cwd = None
+    self.nmap = None            # None, 'start' or 'done'
+    self.tasks = {}             # (target, module, tool) -> state
+
+    return
+
+
+  def load(self):
+    """ replay existing journal. a torn last line (crash) is ignored """
+
+    try:
+      with open(self.path, 'r', encoding='utf-8') as f:
+        for line in f:
+          try:
+            ev = json.loads(line)
+          except ValueError:
+            continue
+          if ev['ev'] == 'scan':
+            self.argv = ev['argv']
+            self.cwd = ev['cwd']
+          elif ev['ev'] == 'nmap':
+            self.nmap = ev['state']
+          elif ev['ev'] == 'task':
+            self.tasks[tuple(ev['key'])] = ev['state']
+    except OSError:
+      pass
+
+    return self
+
+
+  def open(self):
+    """ open journal for appending """
+
+    self.fd = open(self.path, 'a', encoding='utf-8')
+
+    return
+
+
+  def close(self):
+    """ close journal. later writes are dropped """
+
+    self.flush()
+
+    with self.lock:
+      if self.fd:
+        self.fd.close()
+        self.fd = None
+
+    return
+
+
+  def write(self, ev, **data):
+    """ append event to journal """
+
+    self.queue.append({'ev': ev, 'time': time.time(), **data})
+    self.flush()
+
+    return
+
+
+  def task(self, key, state):
+    """ record state (plan, run, done, failed, skipped) of a task. the event
+    is only queued (e.g. with the scheduler's lock held), flush() writes it """
+
+    self.queue.append({'ev': 'task', 'time': time.time(), 'key': list(key),
+      'state': state})
+
+    return
+
+
+  def flush(self):
+    """ append queued events to journal in order """
+
+    with self.lock:
+      if not self.queue:
+        return
+      while self.queue:
+        ev = self.queue.popleft()
+        if self.fd:
+          self.fd.write(json.dumps(ev) + '\n')
+      if self.fd:
+        self.fd.flush()
+
+    return
+
+
+  def is_done(self, key):
+    """ check if task was finished in a previous run """
+
+    return self.tasks.get(tuple(key)) in TASK_DONE
+
+
+  def was_started(self, key):
+    """ check if task was started but not finished in a previous run """
+
+    return self.tasks.get(tuple(key)) in ('run', 'failed')
+
+
+# EOF
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# manifest.py                                                                  #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import ast
+import glob
+import json
+
+
+# own imports
+from core.constants import *
+
+
+# bump if the layout of the manifest changes
+MANIFEST_VERSION = 1
+
+# timeout classes of tools: (class, max seconds)
+TIMEOUT_CLASSES = (('short', 60), ('medium', 600), ('long', None))
+
+
+class Manifest:
+  """ precomputed manifest of all modules and their tools. built out of the
+  module sources (AST), so modules never need to be imported or grepped for
+  it. entries of modules are rebuilt if the mtime of their file changed, all
+  tool dependencies if any file in libs/ changed """
+
+
+  def __init__(self, mod_path, path=MANIFEST):
+    """ constructor """
+
+    self.mod_path = mod_path
+    self.path = path
+
+    # libs/ helper methods reading logfiles
+    self.lib_reads = None
+
+    self.data = {'version': MANIFEST_VERSION, 'libs': {}, 'modules': {}}
+
+    return
+
+
+  def load(self):
+    """ load manifest from file, update outdated entries and save it again if
+    needed. returns the modules part of the manifest """
+
+    changed = False
+
+    try:
+      with open(self.path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+      if data.get('version') == MANIFEST_VERSION:
+        self.data = data
+    except:
+      pass
+
+    # any change in libs/ may change the dependencies of all tools
+    libs = self.get_mtimes(glob.glob(f'{self.mod_path}libs/*.py'))
+    if libs != self.data['libs']:
+      self.data['libs'] = libs
+      self.data['modules'] = {}
+      changed = True
+
+    mods = {}
+    for py in glob.glob(f'{self.mod_path}**', recursive=True):
+      if '__' not in py and '/libs/' not in py and py.endswith('.py'):
+        mods['.'.join(py.split('/')[-3:]).split('.py')[0]] = py
+
+    for mod in list(self.data['modules']):
+      if mod not in mods:
+        del self.data['modules'][mod]
+        changed = True
+
+    for mod, py in mods.items():
+      mtime = self.get_mtimes([py])[os.path.basename(py)]
+      entry = self.data['modules'].get(mod)
+      if not entry or entry['mtime'] != mtime:
+        self.data['modules'][mod] = self.parse_module(py, mtime)
+        changed = True
+
+    if changed:
+      self.save()
+
+    return self.data['modules']
+
+
+  def save(self):
+    """ write manifest atomically. a non-writable cache is not fatal, the
+    manifest is kept in memory then """
+
+    tmp = f'{self.path}.{os.getpid()}'
+
+    try:
+      os.makedirs(os.path.dirname(self.path), exist_ok=True)
+      with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(self.data, f)
+      os.replace(tmp, self.path)
+    except:
+      if os.path.exists(tmp):
+        os.unlink(tmp)
+
+    return
+
+
+  def get_mtimes(self, files):
+    """ get mtimes of given files (key: basename) """
+
+    return {os.path.basename(f): os.stat(f).st_mtime_ns for f in files}
+
+
+  def parse_module(self, py, mtime):
+    """ build manifest entry of given module file """
+
+    entry = {'mtime': mtime, 'class': None, 'tools': {}}
+
+    try:
+      with open(py, 'r', encoding='latin-1') as f:
+        tree = ast.parse(f.read())
+    except:
+      return entry
+
+    # the module's class is the one derived from Base
+    for cls in [c for c in tree.body if isinstance(c, ast.ClassDef)]:
+      if any(getattr(b, 'id', None) == 'Base' for b in cls.bases):
+        break
+    else:
+      return entry
+    entry['class'] = cls.name
+
+    # class-wide default timeout, e.g.: XSS.timeout
+    cls_timeout = None
+    for node in cls.body:
+      if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+        and any(getattr(t, 'id', None) == 'timeout' for t in node.targets):
+          cls_timeout = node.value.value
+
+    if self.lib_reads is None:
+      self.lib_reads = self.get_lib_reads()
+
+    common = set()    # logfiles read in the constructor
+    for func in [f for f in cls.body if isinstance(f, ast.FunctionDef)]:
+      names, _, _ = self.get_reads(func, libs=self.lib_reads)
+      if func.name == '__init__':
+        common |= names
+      elif not func.name.startswith('_'):
+        entry['tools'][func.name] = self.parse_tool(func, cls_timeout)
+        entry['tools'][func.name]['deps'] = names
+    for name, tool in entry['tools'].items():
+      tool['deps'] = sorted((tool['deps'] | common) - {name})
+
+    # same order as dir() on the class
+    entry['tools'] = dict(sorted(entry['tools'].items()))
+
+    return entry
+
+
+  def parse_tool(self, func, cls_timeout=None):
+    """ get description, used tools, flag (int, ext, priv) and in-built
+    timeout of given tool function node """
+
+    descr = ''
+    tools = []
+    flag = None
+
+    docstr = (ast.get_docstring(func) or '').split()
+    if 'DESCR:' in docstr and 'TOOLS:' in docstr:
+      d_idx = docstr.index('DESCR:')
+      t_idx = docstr.index('TOOLS:')
+      descr = ' '.join(docstr[d_idx + 1:t_idx])
+      tools = docstr[t_idx + 1:]
+    for f in ('int', 'ext', 'priv'):
+      if descr.endswith(f'({f})'):
+        flag = f
+
+    # biggest in-built timeout passed to any call of the tool
+    timeouts = []
+    for node in ast.walk(func):
+      if not isinstance(node, ast.Call):
+        continue
+      for kw in node.keywords:
+        if kw.arg != 'timeout':
+          continue
+        if isinstance(kw.value, ast.Constant) and \
+          isinstance(kw.value.value, (int, float)):
+            timeouts.append(kw.value.value)
+        elif isinstance(kw.value, ast.Attribute) and \
+          kw.value.attr == 'timeout' and cls_timeout:
+            timeouts.append(cls_timeout)
+    timeout = max(timeouts) if timeouts else None
+
+    return {'descr': descr, 'tools': tools, 'flag': flag, 'timeout': timeout,
+      'tclass': self.get_timeout_class(timeout)}
+
+
+  def get_timeout_class(self, timeout):
+    """ map in-built timeout (seconds) to timeout class. tools without an
+    in-built timeout run until the user's timeout (-t) or until done """
+
+    if timeout is None:
+      return None
+
+    for tclass, secs in TIMEOUT_CLASSES:
+      if secs is None or timeout <= secs:
+        return tclass
+
+
+  def get_lib_reads(self):
+    """ get the logfiles each libs/ helper method reads. literal logfile names
+    and positions of arguments passed to _read_log() are collected """
+
+    reads = {}
+
+    for py in glob.glob(f'{self.mod_path}libs/*.py'):
+      try:
+        with open(py, 'r', encoding='latin-1') as f:
+          tree = ast.parse(f.read())
+      except:
+        continue    # template.py
+      for func in ast.walk(tree):
+        if isinstance(func, ast.FunctionDef) and func.name.startswith('_'):
+          params = [a.arg for a in func.args.args[1:]]
+          names, args, calls = self.get_reads(func, params)
+          reads[func.name] = {'names': names, 'args': args, 'calls': calls}
+
+    # resolve helpers calling other helpers until nothing changes anymore
+    changed = True
+    while changed:
+      changed = False
+      for r in reads.values():
+        for c in r['calls']:
+          if c in reads and not reads[c]['names'] <= r['names']:
+            r['names'] |= reads[c]['names']
+            changed = True
+
+    return reads
+
+
+  def get_reads(self, func, params=(), libs=None):
+    """ get logfile names read by given function node """
+
+    names = set()     # literal logfile names
+    args = {}         # param name -> index, passed to _read_log()
+    calls = set()     # self._<helper>() calls
+
+    for node in ast.walk(func):
+      if not isinstance(node, ast.Call) or \
+        not isinstance(node.func, ast.Attribute):
+          continue
+      name = node.func.attr
+      if name == '_read_log' and node.args:
+        arg = node.args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+          names.add(arg.value)
+        elif isinstance(arg, ast.Name) and arg.id in params:
+          args[arg.id] = params.index(arg.id)
+      elif name.startswith('_'):
+        calls.add(name)
+        if libs and name in libs:
+          names |= libs[name]['names']
+          # literal logfile names passed to helpers reading their args
+          for param, idx in libs[name]['args'].items():
+            for kw in node.keywords:
+              if kw.arg == param and isinstance(kw.value, ast.Constant) and \
+                isinstance(kw.value.value, str):
+                  names.add(kw.value.value)
+            if idx < len(node.args) and \
+              isinstance(node.args[idx], ast.Constant) and \
+              isinstance(node.args[idx].value, str):
+                names.add(node.args[idx].value)
+
+    return names, args, calls
+
+
+# EOF
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# metrics.py                                                                   #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# own imports
+from core.scheduler import LOCAL
+
+
+# upper bounds (seconds) of the tool duration histogram buckets
+BUCKETS = (1, 5, 30, 60, 300, 900, 1800, 3600, 7200)
+
+
+class Metrics:
+  """ live metrics of a scan in prometheus text format (--metrics).
+
+  counters (finished tasks, tool durations, timeouts, bytes logged, spawned
+  commands) are fed by the schedulers and cover the whole scan. gauges (queue
+  depth, running tasks) are read from the scheduler of the current mode, which
+  also hands out the tasks of worker nodes (running tasks are labeled by
+  node). targets of the schedulers of earlier modes (e.g. lan) are kept, so
+  the target gauge covers the whole scan, too. processes are read from the
+  registry.
+  """
+
+
+  def __init__(self, address, registry=None):
+    """ constructor """
+
+    self.address = address
+    self.registry = registry
+    self.sched = None           # scheduler of the current mode
+    self.hosts = {}             # host -> done, of earlier schedulers
+    self.server = None
+
+    self.tasks = {}             # state -> num tasks
+    self.durations = {}         # tool -> {'buckets', 'sum', 'count'}
+    self.timeouts = {}          # tool -> timed out or stalled commands
+    self.bytes = {}             # tool -> bytes logged
+    self.commands = 0           # spawned commands
+    self.lock = threading.Lock()
+
+    return
+
+
+  def set_scheduler(self, sched):
+    """ read gauges of given scheduler from now on. targets of the previous
+    one are kept """
+
+    if self.sched is not None:
+      hosts = self.get_hosts(self.sched)
+      with self.lock:
+        for host, done in hosts.items():
+          self.hosts[host] = self.hosts.get(host, True) and done
+
+    self.sched = sched
+
+    return
+
+
+  def get_hosts(self, sched):
+    """ targets of given scheduler (host -> all modules done) """
+
+    hosts = {}
+
+    with sched.cond:
+      for g in sched.groups.values():
+        hosts[g.host] = hosts.get(g.host, True) and g.done
+
+    return hosts
+
+
+  def finished(self, state):
+    """ count finished (done, failed, skipped) task """
+
+    with self.lock:
+      self.tasks[state] = self.tasks.get(state, 0) + 1
+
+    return
+
+
+  def observe(self, tool, wall, stats):
+    """ add runtime and stats of a tool run """
+
+    if stats['cached'] == 'hit':
+      return
+
+    with self.lock:
+      d = self.durations.setdefault(tool, {'buckets': [0] * len(BUCKETS),
+        'sum': 0.0, 'count': 0})
+      for i, b in enumerate(BUCKETS):
+        if wall <= b:
+          d['buckets'][i] += 1
+      d['sum'] += wall
+      d['count'] += 1
+      self.timeouts[tool] = self.timeouts.get(tool, 0) + stats['timeouts']
+      self.bytes[tool] = self.bytes.get(tool, 0) + stats['bytes']
+      self.commands += stats.get('commands', 0)
+
+    return
+
+
+  def get_sched_gauges(self):
+    """ queue depth and running tasks per module and node of the current
+    scheduler, targets per state of all schedulers """
+
+    with self.lock:
+      hosts = dict(self.hosts)
+
+    queued = 0
+    running = {}
+    run_hosts = set()
+    sched = self.sched
+    if sched is not None:
+      with sched.cond:
+        queued = sched.num_ready
+        for t in sched.running:
+          key = (t.group.mod, sched.affinity.get(t.group.host, LOCAL))
+          running[key] = running.get(key, 0) + 1
+        run_hosts = set(sched.run_hosts)
+      for host, done in self.get_hosts(sched).items():
+        hosts[host] = hosts.get(host, True) and done
+
+    targets = {'running': len(run_hosts), 'pending': 0, 'done': 0}
+    for host, done in hosts.items():
+      if host in run_hosts:
+        continue
+      targets['done' if done else 'pending'] += 1
+
+    return queued, running, targets
+
+
+  def render(self):
+    """ all metrics in prometheus text format """
+
+    out = []
+
+    def add(name, kind, descr, samples):
+      out.append(f'# HELP {name} {descr}')
+      out.append(f'# TYPE {name} {kind}')
+      for labels, value in samples:
+        out.append(f'{name}{labels} {value}')
+
+    queued, running, targets = self.get_sched_gauges()
+    procs, workers = self.registry.count() if self.registry else (0, 0)
+
+    add('nullscan_queue_depth', 'gauge', 'Ready tasks waiting for a worker.',
+      [('', queued)])
+    add('nullscan_tasks_running', 'gauge',
+      'Running tasks per module and node.',
+      [(f'{{module="{m}",node="{d}"}}', n)
+        for (m, d), n in sorted(running.items())])
+    add('nullscan_targets', 'gauge', 'Targets per state.',
+      [(f'{{state="{s}"}}', n) for s, n in sorted(targets.items())])
+    add('nullscan_processes', 'gauge', 'Running commands (process groups).',
+      [('', procs)])
+    add('nullscan_workers', 'gauge', 'Worker processes.', [('', workers)])
+
+    with self.lock:
+      add('nullscan_tasks_total', 'counter', 'Finished tasks per state.',
+        [(f'{{state="{s}"}}', n) for s, n in sorted(self.tasks.items())])
+      add('nullscan_commands_total', 'counter', 'Spawned commands.',
+        [('', self.commands)])
+      add('nullscan_tool_timeouts_total', 'counter',
+        'Timed out or stalled commands per tool.',
+        [(f'{{tool="{t}"}}', n) for t, n in sorted(self.timeouts.items())])
+      add('nullscan_tool_bytes_total', 'counter', 'Bytes logged per tool.',
+        [(f'{{tool="{t}"}}', n) for t, n in sorted(self.bytes.items())])
+      samples = []
+      for t, d in sorted(self.durations.items()):
+        for b, n in zip(BUCKETS, d['buckets']):
+          samples.append((f'_bucket{{tool="{t}",le="{b}"}}', n))
+        samples.append((f'_bucket{{tool="{t}",le="+Inf"}}', d['count']))
+        samples.append((f'_sum{{tool="{t}"}}', round(d['sum'], 3)))
+        samples.append((f'_count{{tool="{t}"}}', d['count']))
+      add('nullscan_tool_duration_seconds', 'histogram',
+        'Runtime of tools.', samples)
+
+    return '\n'.join(out) + '\n'
+
+
+  def start(self):
+    """ serve metrics on given address in a thread """
+
+    metrics = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.server = ThreadingHTTPServer(self.address, Handler)
+    self.server.daemon_threads = True
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    return
+
+
+  def stop(self):
+    """ stop serving metrics """
+
+    if self.server:
+      self.server.shutdown()
+      self.server.server_close()
+
+    return
+
+
+# EOF
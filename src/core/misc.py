@@ -21,7 +21,6 @@
 # sys imports
 import shutil
 import glob
-import subprocess
 import termios
 import sys
 from concurrent.futures import ThreadPoolExecutor
@@ -63,41 +62,6 @@ class Misc:
     return
 
 
-  def grep_tools(self, py_file):
-    """ Find all tools (method names) of given file """
-
-    tools = []
-
-    lines = self.file.read_file(py_file)
-    for line in lines:
-      if 'def ' in line:
-        method = line.split()[1].split('(')[0]
-        if not method.startswith('_'):
-          tools.append(method)
-
-    return sorted(list(set(tools)))
-
-
-  def find_py_files(self, root_path):
-    """ Find all py files with some exceptions of given root_path """
-
-    py_files = []
-
-    files = glob.glob(f'{root_path}/*/*.py', recursive=True)
-    [py_files.append(x) for x in files if '__ini' not in x and '/libs' not in x]
-
-    return sorted(list(set(py_files)))
-
-
-  def kill_process(self, pattern, signal='TERM'):
-    """ kill (all) processes matched by pattern """
-
-    cmd = ['pkill', f'-{signal}', '-f', pattern]
-    subprocess.run(cmd)
-
-    return
-
-
   def remove_empty_files_dirs(self, rootpath):
     """ delete empty (log-)files and directories """
 
@@ -21,15 +21,16 @@
 # sys imports
 import os
 import importlib
-import itertools
 import glob
-from concurrent.futures import ProcessPoolExecutor
 
 
 # own imports
 from core.constants import *
 from core.logger import Logger
 from core.file import File
+from core.manifest import Manifest
+from core.deadline import Deadline
+from core.engine import Job
 
 
 class Module:
@@ -57,34 +58,29 @@ class Module:
     # docstrings for all tools
     self.docstrings = {}
 
+    # precomputed manifest of all modules and tools
+    self.manifest = None
+
     return
 
 
+  def get_manifest(self):
+    """ load the precomputed manifest of all modules and tools """
+
+    if self.manifest is None:
+      self.manifest = Manifest(self.mod_path).load()
+
+    return self.manifest
+
+
   def get_docstrings(self):
     """ get a list of docstrings from all nullscan tools """
 
-    tools = []    # tools from sub classes
-
-    for mod in self.mods:
-      self.load_module(mod)
-      cls = next(iter(self.lmod[mod].keys()))
-      for tool in self.lmod[mod][cls]:
-        modsplit = mod.split('.')
-        moddir = modsplit[1]
-        module = modsplit[2]
-        if 'Base' not in str(cls):
-          t_attr = getattr(cls, tool)
-        docstr = ' '.join(t_attr.__doc__.split()).split()
-        try:
-          d_idx = docstr.index('DESCR:')
-          t_idx = docstr.index('TOOLS:')
-        except:
-          pass
-        descr = ' '.join((docstr[d_idx + 1:t_idx]))
-        tools.append(docstr[t_idx + 1:])
-        unique_tools = list(set(itertools.chain.from_iterable(tools)))
-        self.docstrings[tool] = {'moddir': moddir, 'module': module,
-          'descr': descr, 'tools': unique_tools }
+    for mod, entry in self.get_manifest().items():
+      modsplit = mod.split('.')
+      for tool, t in entry['tools'].items():
+        self.docstrings[tool] = {'moddir': modsplit[1], 'module': modsplit[2],
+          'descr': t['descr'], 'tools': t['tools']}
 
     return
 
@@ -163,54 +159,91 @@ class Module:
     return
 
 
-  def run_module(self, mod, target, opts, wdir):
-    """ load and run module with its tools """
+  def get_tools(self, mod, opts):
+    """ get the tools (method names) of given module. in-/ex-cluded ones are
+    filtered out, except for default modules """
+
+    tools = []
+    entry = self.get_manifest().get(mod)
+
+    if not entry or not entry['class']:
+      self.log('mod_import', eargs=f'{mod} -> no such module', _type='err',
+        end='\n')
+      return tools
+
+    for t in entry['tools']:
+      # filter in-/ex-cluded tools by user
+      if not mod.endswith('.default'):
+        if opts['tools']['in_tools']:
+          if t not in opts['tools']['in_tools']:
+            continue
+        if t in opts['tools']['ex_tools']:
+          continue
+      tools.append(t)
+
+    return tools
+
+
+  def get_deps(self, mod):
+    """ get the tools (logfiles) each tool of given module depends on """
+
+    entry = self.get_manifest().get(mod, {'tools': {}})
+
+    return {t: set(v['deps']) for t, v in entry['tools'].items()}
+
 
-    # change temp working dir for tool logs
-    rootdir = os.getcwd()
-    os.chdir(self.file.make_dir(wdir))
+  def get_tclasses(self, mod):
+    """ get the timeout class (short, medium, long or None) of each tool of
+    given module """
+
+    entry = self.get_manifest().get(mod, {'tools': {}})
+
+    return {t: v['tclass'] for t, v in entry['tools'].items()}
+
+
+  def run_tool(self, mod, tool, target, opts, wdir, deadline=None):
+    """ load module and run given tool of it (called in workers). the tool
+    is cancelled after deadline seconds. its logfiles and commands go to wdir,
+    the current working dir is never changed, so several tools run at once """
+
+    # load module and get class
+    self.load_module(mod)
+    cls = next(iter(self.lmod[mod].keys()))
+
+    # run tool as job of the engine within its (budget) deadline. the object
+    # is created within both, so it gets its working dir from the job and the
+    # tool's thread pools work for the deadline, too
+    job = Job.current()
+    if job is None or job.wdir != wdir:
+      job = Job(wdir)
+    Deadline.reset()
+    d = Deadline(deadline, tool) if deadline is not None else None
+    if d:
+      d.start()
+    try:
+      with job.bind():
+        getattr(cls(target, opts), tool)()
+    except TimeoutError:
+      # budget ran out, results are committed already (@tool)
+      if d is None or d.remaining() > 0:
+        raise
+      job.reason = job.reason or 'budget'
+    finally:
+      if d:
+        d.stop()
+
+    return
+
+
+  def commit_tool(self, mod, tool, target, opts, wdir):
+    """ commit results of given tool of module without running it (e.g.
+    logfiles restored from the result cache) """
 
-    # load module, get class and create object of
     self.load_module(mod)
     cls = next(iter(self.lmod[mod].keys()))
-    c = cls(target, opts['targets_opts'])
-
-    # for status line
-    cur_tool = 0
-    sum_tool = len(self.lmod[mod][cls])
-
-    # get method (tool) string, create object and run desired tool
-    with ProcessPoolExecutor(opts['p_workers']) as exe:
-      for t in self.lmod[mod][cls]:
-        cur_tool += 1
-        if 'host' in target:
-          target_head = target['host']
-        else:
-          target_head = target
-        stat_line = f"{target_head} | {'.'.join(mod.split('.')[1:])}.{t}" + \
-          f' ({cur_tool}/{sum_tool})' + ' ' * 25
-        tool = getattr(c, t)
-
-        # filter in-/ex-cluded tools by user
-        if '.default' not in repr(cls):
-          if opts['tools']['in_tools']:
-            if t not in opts['tools']['in_tools']:
-              continue
-          if t in opts['tools']['ex_tools']:
-            continue
 
-        # run tool
-        try:
-          if opts['verbose']:
-            self.log(stat_line, _type='vmsg', end='\n')
-          else:
-            self.log(stat_line, _type='vmsg', flush=True, end='\r')
-          exe.submit(tool)
-        except:
-          self.log('tool_failed', eargs=t, _type='err', end='\n')
-
-    # done, move bitch...
-    os.chdir(rootdir)
+    with Job(wdir).bind():
+      cls(target, opts)._commit_tool(tool)
 
     return
 
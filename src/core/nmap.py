@@ -21,12 +21,14 @@
 # sys imports
 import sys
 import os
+import time
 import subprocess
 
 
 # own imports
 from core.logger import Logger
 from core.checks import Check
+from core.tape import Tape
 
 
 class Nmap:
@@ -87,13 +89,33 @@ class Nmap:
     else:
       self.cmd.append(self.opts['opts'])  # nmap options given on cmdline
     [self.cmd.append(o) for o in ['-oA', self.logfile]]
-    [self.cmd.append(o) for o in self.opts['hosts']]
+
+    # targets are read from file as cidr blocks and hostnames, never expanded
+    with open(f'{self.logfile}.targets', 'w') as f:
+      for spec in self.opts['hosts'].specs():
+        f.write(f'{spec}\n')
+    [self.cmd.append(o) for o in ['-iL', f'{self.logfile}.targets']]
+
+    return
+
+
+  def build_resume_cmd(self):
+    """ build nmap command line continuing an interrupted scan """
+
+    self.cmd = ['nmap', '--resume', f'{self.logfile}.gnmap']
 
     return
 
 
   def scan(self, output=None, debug=False):
-    """ start a scan """
+    """ start a scan. with a tape the scan and its logfiles are recorded or
+    replayed """
+
+    tape = Tape.shared
+    cmd = self.cmd
+    logdir = os.path.dirname(os.path.abspath(self.logfile))
+    if tape and tape.mode == 'replay':
+      cmd = ['sh', '-c', tape.play(' '.join(self.cmd), logdir)]
 
     try:
       if output:
@@ -102,8 +124,13 @@ class Nmap:
         f = '/dev/stdout'
       else:
         f = os.devnull
+      start = time.monotonic()
       with open(f, 'w') as fd:
-        subprocess.run(self.cmd, stdout=fd, stderr=subprocess.STDOUT)
+        proc = subprocess.run(cmd, stdout=fd, stderr=subprocess.STDOUT)
+      if tape and tape.mode == 'record':
+        tape.record(' '.join(self.cmd), logdir, time.monotonic() - start,
+          proc.returncode, False, files=[f'{self.logfile}.{ext}' for ext in
+          ('xml', 'nmap', 'gnmap')])
     except KeyboardInterrupt:
       self.log('nmap_abort', _type='err', end='\n')
     except Exception as err:
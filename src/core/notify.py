@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# notify.py                                                                    #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import signal
+import threading
+from multiprocessing.managers import BaseManager
+
+
+# own imports
+from core.deadline import Deadline
+
+
+class Board:
+  """ readiness state of all scheduled tools and index of their logfiles'
+  contents. lives in the manager process. keys are (scan, target, module,
+  tool) tuples """
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.state = {}
+    self.mods = {}              # (scan, target, tool) -> modules
+    self.digests = {}           # key -> sha256 of committed logfile
+    self.index = {}             # (scan, tool) -> sha256 -> targets
+    self.cond = threading.Condition()
+
+    return
+
+
+  def register(self, keys):
+    """ register tools which are going to commit results """
+
+    with self.cond:
+      for key in keys:
+        if key not in self.state:
+          self.state[key] = False
+          scan, target, module, tool = key
+          self.mods.setdefault((scan, target, tool), set()).add(module)
+
+    return
+
+
+  def commit(self, key, digest=None):
+    """ mark tool as done, index digest of its logfile and wake up waiting
+    tools """
+
+    with self.cond:
+      if digest:
+        self.add_digest(key, digest)
+      if key in self.state:
+        self.state[key] = True
+        self.cond.notify_all()
+
+    return
+
+
+  def add_digest(self, key, digest):
+    """ index digest of the logfile of given tool """
+
+    scan, target, module, tool = key
+    old = self.digests.get(key)
+    if old == digest:
+      return
+
+    # a tool of the target may have logged (and committed) before
+    if old and not any(self.digests.get((scan, target, m, tool)) == old
+      for m in self.mods.get((scan, target, tool), ()) if m != module):
+        self.index[(scan, tool)][old].discard(target)
+    self.digests[key] = digest
+    self.index.setdefault((scan, tool), {}).setdefault(digest, set()).add(
+      target)
+
+    return
+
+
+  def get_digests(self, scan, target, tool):
+    """ digests of given tool's logfiles of all modules of the target """
+
+    with self.cond:
+      mods = self.mods.get((scan, target, tool), ())
+      return {self.digests[(scan, target, m, tool)] for m in mods
+        if (scan, target, m, tool) in self.digests}
+
+
+  def duplicate(self, scan, target, tool, digest=None):
+    """ check if a logfile of given tool with the same content (digest, or
+    the target's own committed logfile) exists for another target """
+
+    digests = {digest} if digest else self.get_digests(scan, target, tool)
+
+    with self.cond:
+      index = self.index.get((scan, tool), {})
+      return any(index.get(d, set()) - {target} for d in digests)
+
+
+  def resolve(self, key):
+    """ keys to wait for. the given module's tool if registered, otherwise the
+    tool of all modules of the target """
+
+    if key in self.state:
+      return [key]
+
+    scan, target, module, tool = key
+    mods = self.mods.get((scan, target, tool), ())
+
+    return [(scan, target, m, tool) for m in mods]
+
+
+  def wait(self, key, timeout=None):
+    """ block until tool is done. unknown tools are never waited for """
+
+    with self.cond:
+      keys = self.resolve(key)
+      return self.cond.wait_for(lambda: all(self.state[k] for k in keys),
+        timeout)
+
+
+class BoardManager(BaseManager):
+  """ manager serving the board to all processes """
+
+  pass
+
+
+BoardManager.register('Board', Board)
+
+
+class Notify:
+  """ dependency notification service. tools waiting for results of other tools
+  block without busy-waiting and are woken up as soon as the producing tool
+  committed its results. calls of the board are shielded from asynchronous
+  TimeoutErrors, waits and checks are cancellation points (see Deadline) """
+
+  # instance attached to the current (worker) process
+  shared = None
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.mgr = None
+    self.board = None
+
+    return
+
+
+  def __getstate__(self):
+    """ only the board proxy is passed to the workers """
+
+    return {'mgr': None, 'board': self.board}
+
+
+  @staticmethod
+  def attach(notify):
+    """ attach notify service to current process (worker initializer) """
+
+    Notify.shared = notify
+
+    return
+
+
+  def start(self):
+    """ start the manager process. ctrl+c is handled by nullscan itself """
+
+    self.mgr = BoardManager()
+    self.mgr.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+    self.board = self.mgr.Board()
+    Notify.attach(self)
+
+    return
+
+
+  def stop(self):
+    """ stop the manager process """
+
+    if self.mgr:
+      self.mgr.shutdown()
+      self.mgr = None
+    Notify.shared = None
+
+    return
+
+
+  def register(self, keys):
+    """ register tools which are going to commit results """
+
+    with Deadline.shield():
+      self.board.register(list(keys))
+
+    return
+
+
+  def commit(self, key, digest=None):
+    """ commit results of tool and digest of its logfile """
+
+    with Deadline.shield():
+      self.board.commit(key, digest)
+
+    return
+
+
+  def duplicate(self, scan, target, tool, digest=None):
+    """ check if another target has a logfile of tool with same content """
+
+    Deadline.checkpoint()
+    with Deadline.shield():
+      dup = self.board.duplicate(scan, target, tool, digest)
+
+    return dup
+
+
+  def wait(self, key, timeout=None):
+    """ block until tool committed its results """
+
+    Deadline.checkpoint()
+    with Deadline.shield():
+      done = self.board.wait(key, timeout)
+    Deadline.checkpoint()
+
+    return done
+
+
+# EOF
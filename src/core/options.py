@@ -24,6 +24,7 @@ import ast
 
 # own imports
 from core.constants import *
+from core.logger import Logger
 
 
 class Option:
@@ -34,6 +35,8 @@ class Option:
     """ init """
 
     self.argv = argv
+    self.logger = Logger()
+    self.log = self.logger.log
     self.declare_options()
 
     return
@@ -126,8 +129,8 @@ class Option:
   def update_generic_opts(self):
     """ update generic options """
 
-    opts = ('t_workers', 'm_workers', 'p_workers', 'timeout', 'report',
-      'verbose', 'debug')
+    opts = ('t_workers', 'm_workers', 'p_workers', 'c_workers', 'timeout',
+      't_budget', 'm_budget', 'report', 'verbose', 'debug')
 
     # if an option is not set get option from nullscan config file (if defined)
     for opt in opts:
@@ -137,9 +140,57 @@ class Option:
         else:
           self.opts[opt] = self.copts[opt]
 
-    self.opts['t_workers'] = int(self.opts['t_workers'])
-    self.opts['m_workers'] = int(self.opts['m_workers'])
-    self.opts['p_workers'] = int(self.opts['p_workers'])
+    # values which are no numbers are fatal here already, the checks (see
+    # Check.check_generic_opts()) get the converted ones
+    try:
+      self.opts['t_workers'] = int(self.opts['t_workers'])
+      self.opts['m_workers'] = int(self.opts['m_workers'])
+      self.opts['p_workers'] = int(self.opts['p_workers'])
+
+      # max running tools per worker process
+      self.opts['worker_tools'] = int(self.copts.get('worker_tools') or 1)
+
+      # per module class workers -> {'web': 5, 'wifi': 1, ...}
+      c_workers = self.opts['c_workers']
+      if type(c_workers) != list:
+        c_workers = [c_workers]
+      self.opts['c_workers'] = {c.split(':')[0].strip(): int(c.split(':')[1])
+        for c in filter(None, c_workers)}
+    except (ValueError, IndexError):
+      self.log('workers', _type='err', end='\n')
+
+    # time budgets per target and module. 0 -> no budget
+    try:
+      for b in ('t_budget', 'm_budget'):
+        self.opts[b] = float(self.opts[b] or 0)
+    except ValueError:
+      self.log('budget', _type='err', end='\n')
+
+    # circuit breaker: bad tool results in a row before a target is probed
+    # and seconds between liveness probes. 0 -> off
+    try:
+      self.opts['breaker'] = int(self.copts.get('breaker') or 0)
+      self.opts['probe_interval'] = float(self.copts.get('probe_interval') or
+        0)
+    except ValueError:
+      self.log('breaker', _type='err', end='\n')
+
+    # stall detection: idle seconds (no output, no cpu time) and action (kill,
+    # flag) per tool -> {'wpscan': (120.0, 'kill'), ...}. 0 -> off
+    tools = self.copts.get('stall_tools', [])
+    if type(tools) != list:
+      tools = [tools]
+    tools = [t.split(':') for t in tools if t.strip()]
+    action = (self.copts.get('stall_action') or 'kill').strip()
+    try:
+      self.opts['targets_opts']['stall'] = {
+        'idle': float(self.copts.get('stall_idle') or 0),
+        'action': action,
+        'tools': {t[0].strip(): (float(t[1]), t[2].strip() if len(t) > 2 else
+          action) for t in tools},
+      }
+    except (ValueError, IndexError):
+      self.log('stall', _type='err', end='\n')
 
     # copy timeout option
     if self.opts['timeout'] == '0.0' or self.opts['timeout'] == '0':
@@ -149,6 +200,54 @@ class Option:
     return
 
 
+  def update_cache_opts(self):
+    """ update result cache options """
+
+    # ttl per nullscan-tool -> {'whois_domain': 604800, ...}
+    ttls = self.copts.get('cache_ttl', [])
+    if type(ttls) != list:
+      ttls = [ttls]
+    ttls = {t.split(':')[0].strip(): float(t.split(':')[1])
+      for t in ttls if t.strip()}
+
+    # --no-cache. recorded and replayed scans run every tool
+    if self.opts.get('no_cache') or self.opts['tape']['mode']:
+      ttls = {}
+
+    # max size in MB and max age in seconds of the cache. 0 -> unlimited
+    self.opts['cache'] = {
+      'ttl': ttls,
+      'size': int(float(self.copts.get('cache_size') or 0) * 1024 * 1024),
+      'age': float(self.copts.get('cache_age') or 0),
+    }
+
+    return
+
+
+  def update_planner_opts(self):
+    """ update scan planner options """
+
+    # scan deadline in seconds. 0 -> run all tools
+    if 'deadline' not in self.opts:
+      self.opts['deadline'] = self.copts.get('deadline', 0)
+    try:
+      self.opts['deadline'] = float(self.opts['deadline'] or 0)
+    except ValueError:
+      self.log('deadline', _type='err', end='\n')
+
+    # value weight per nullscan-tool -> {'nikto_web': 5.0, ...}
+    values = self.copts.get('tool_values', [])
+    if type(values) != list:
+      values = [values]
+    try:
+      self.opts['tool_values'] = {v.split(':')[0].strip():
+        float(v.split(':')[1]) for v in values if v.strip()}
+    except (ValueError, IndexError):
+      self.log('tool_values', _type='err', end='\n')
+
+    return
+
+
   def update_opts(self):
     """ delete/merge options from cmdline and config file """
 
@@ -158,6 +257,12 @@ class Option:
     self.update_generic_opts()
     self.update_mod_tools_opts()
     self.update_extra_opts()
+    self.update_cache_opts()
+
+    # shared secret of coordinator and worker nodes
+    self.opts['remote_key'] = self.copts.get('remote_key', '')
+
+    self.update_planner_opts()
 
     # we don't need options from config file anymore
     del self.opts['config']
@@ -230,6 +335,28 @@ class Option:
     # nullscan's default work, log and report dir
     self.opts['nullscan_dir'] = NULLSCAN_DIR
 
+    # don't use cached tool results (--no-cache)
+    self.opts['no_cache'] = False
+
+    # dry-run: write plan of the scan to given file or stdout (-) (--plan)
+    self.opts['plan'] = None
+
+    # distributed scan: address of coordinator (--listen), worker node mode
+    # (--worker) and address to connect to (--connect)
+    self.opts['listen'] = None
+    self.opts['worker'] = False
+    self.opts['connect'] = None
+
+    # address of the live metrics endpoint (--metrics)
+    self.opts['metrics'] = None
+
+    # record spans of the scan into trace.json (--trace)
+    self.opts['trace'] = False
+
+    # record the commands of the scan to given dir (--record) or replay them
+    # (--replay), runtimes scaled by given factor (--replay-scale)
+    self.opts['tape'] = {'mode': None, 'path': None, 'scale': 1.0}
+
     return
 
 
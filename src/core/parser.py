@@ -34,6 +34,7 @@ from core.usage import Usage
 from core.constants import *
 from core.file import File
 from core.misc import Misc
+from core.targets import Targets
 
 
 class Parser:
@@ -77,6 +78,21 @@ class Parser:
     return
 
 
+  def parse_address(self, args):
+    """ parse address of coordinator (--listen, --connect) or metrics endpoint
+    (--metrics) -> (host, port) """
+
+    try:
+      host, port = args.rsplit(':', 1)
+      port = int(port)
+      if port < PORT_MIN or port > PORT_MAX:
+        raise ValueError
+    except:
+      self.log('address', eargs=args, _type='err', end='\n')
+
+    return host, port
+
+
   def parse_add_module_tool(self, args, dest):
     """ parse add module/tool option (-m/-a) """
 
@@ -173,41 +189,20 @@ class Parser:
 
 
   def parse_nmap_targets(self, targets):
-    """ parse nmap targets to scan from either ranges or from file (-t) """
+    """ parse nmap targets to scan from either ranges or from file (-t). they
+    stay symbolic and are expanded lazily (see Targets) """
 
-    hosts = []
+    hosts = self.opts['targets']['nmap'].get('hosts') or Targets()
 
-    if os.path.isfile(targets):
-      hosts = self.file.read_file(targets)
-    else:
-      try:
-        # host range format
-        if '-' in targets:
-          splitted = targets.split('-')
-          try:
-            start = ipaddress.IPv4Address(splitted[0])
-            end = ipaddress.IPv4Address(splitted[1])
-            for i in range(int(start), int(end) + 1):
-              ipaddr = str(ipaddress.IPv4Address(i))
-              hosts.append(ipaddr)
-          except:
-            # must be a hostname/domain then
-            if ',' in targets:
-              hosts = targets.split(',')
-            else:
-              hosts.append(targets)
-        # cidr range format
-        elif '/' in targets:
-          for ipaddr in ipaddress.IPv4Network(targets).hosts():
-            hosts.append(str(ipaddr))
-        # multiple single hosts
-        elif ',' in targets:
-          hosts = targets.split(',')
-        # single host
-        else:
-          hosts.append(targets)
-      except Exception as e:
-        self.log('hostrange', eargs=repr(e.args[0]), _type='err', end='\n')
+    try:
+      if os.path.isfile(targets):
+        # lines nmap understands but we don't are passed as given
+        for line in self.file.read_lines(targets):
+          hosts.add(line, verbatim=True)
+      else:
+        hosts.add(targets)
+    except Exception as e:
+      self.log('hostrange', eargs=repr(e.args[0]), _type='err', end='\n')
 
     if hosts:
       self.opts['targets']['nmap']['hosts'] = hosts
@@ -324,7 +319,9 @@ class Parser:
 
     try:
       opts, args = getopt.getopt(self.opts['cmdline'][1:],
-        't:u:l:o:i:I:x:X:T:M:P:k:rR:c:vdCp:m:a:VH')
+        't:u:l:o:i:I:x:X:T:M:P:k:b:B:rR:c:vdCp:m:a:VH', ['resume=',
+        'no-cache', 'listen=', 'worker', 'connect=', 'deadline=', 'plan=',
+        'metrics=', 'trace', 'record=', 'replay=', 'replay-scale='])
     except getopt.GetoptError as err:
       self.log('default', eargs=repr(err), _type='err', end='\n')
 
@@ -381,6 +378,10 @@ class Parser:
         self.opts['p_workers'] = a
       elif o == '-k':
         self.opts['timeout'] = a
+      elif o == '-b':
+        self.opts['t_budget'] = a
+      elif o == '-B':
+        self.opts['m_budget'] = a
       elif o == '-r':
           self.opts['report'] = True
       elif o == '-R':
@@ -411,6 +412,33 @@ class Parser:
           os._exit(SUCCESS)
         else:
           self.parse_add_module_tool(a, 'add_tool')
+      elif o == '--resume':
+        pass    # see Controller.get_resume_argv()
+      elif o == '--no-cache':
+        self.opts['no_cache'] = True
+      elif o == '--listen':
+        self.opts['listen'] = self.parse_address(a)
+      elif o == '--worker':
+        self.opts['worker'] = True
+      elif o == '--connect':
+        self.opts['connect'] = self.parse_address(a)
+      elif o == '--deadline':
+        self.opts['deadline'] = a
+      elif o == '--plan':
+        self.opts['plan'] = a
+      elif o == '--metrics':
+        self.opts['metrics'] = self.parse_address(a)
+      elif o == '--trace':
+        self.opts['trace'] = True
+      elif o in ('--record', '--replay'):
+        if self.opts['tape']['mode'] not in (None, o[2:]):
+          self.log('tape', _type='err', end='\n')
+        self.opts['tape'].update({'mode': o[2:], 'path': a})
+      elif o == '--replay-scale':
+        try:
+          self.opts['tape']['scale'] = float(a)
+        except ValueError:
+          self.log('tape_scale', _type='err', end='\n')
       elif o == '-V':
         self.log(VERSION, _type='msg', end='\n')
         os._exit(SUCCESS)
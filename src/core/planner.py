@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# planner.py                                                                   #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import math
+import heapq
+
+
+# own imports
+
+
+# capacity units of the knapsack
+UNITS = 1000
+
+
+class Planner:
+  """ picks the tools of a scan which fit into a deadline (--deadline).
+
+  the work of a tool is the expected runtime of all its tasks, its value the
+  number of tasks times the tool's value weight (config, default: 1). tools of
+  default modules are always run. the other tools are chosen by a 0/1 knapsack
+  over the worker-seconds left until the deadline.
+  """
+
+
+  def __init__(self, values=None):
+    """ constructor """
+
+    self.values = values or {}  # tool -> value weight
+
+    return
+
+
+  def get_items(self, tasks):
+    """ sum up work (seconds) and value of the given tasks per tool """
+
+    items = {}
+
+    for t in tasks:
+      item = items.setdefault(t.tool, {'tasks': 0, 'work': 0.0, 'value': 0.0})
+      item['tasks'] += 1
+      item['work'] += t.cost
+      item['value'] += self.values.get(t.tool, 1.0)
+
+    return items
+
+
+  def select(self, items, capacity):
+    """ 0/1 knapsack: tools with the max. value fitting into capacity. the
+    work is scaled to UNITS (rounded up), so the result always fits """
+
+    if sum(i['work'] for i in items.values()) <= capacity:
+      return set(items)
+    if capacity <= 0:
+      return set()
+
+    scale = capacity / UNITS
+    tools = sorted(items)
+    weights = [math.ceil(items[t]['work'] / scale) for t in tools]
+
+    # best[c]: max value with capacity c, keep[i][c]: tool i taken
+    best = [0.0] * (UNITS + 1)
+    keep = []
+    for i, t in enumerate(tools):
+      w = weights[i]
+      taken = [False] * (UNITS + 1)
+      for c in range(UNITS, w - 1, -1):
+        v = best[c - w] + items[t]['value']
+        if v > best[c]:
+          best[c] = v
+          taken[c] = True
+      keep.append(taken)
+
+    chosen = set()
+    c = UNITS
+    for i in range(len(tools) - 1, -1, -1):
+      if keep[i][c]:
+        chosen.add(tools[i])
+        c -= weights[i]
+
+    return chosen
+
+
+  def plan(self, tasks, seconds, workers):
+    """ plan given tasks for a deadline in seconds. returns the plan: tools to
+    run and to drop, their items and the projected runtime in seconds """
+
+    fixed = [t for t in tasks if t.group.mod.endswith('.default')]
+    items = self.get_items([t for t in tasks
+      if not t.group.mod.endswith('.default')])
+
+    capacity = seconds * workers - sum(t.cost for t in fixed)
+    chosen = self.select(items, capacity)
+    work = sum(t.cost for t in fixed) + sum(items[t]['work'] for t in chosen)
+
+    return {
+      'keep': sorted(chosen), 'drop': sorted(set(items) - chosen),
+      'items': items, 'fixed': len(fixed), 'runtime': work / workers,
+    }
+
+
+  def get_after(self, task):
+    """ tasks which must be done before given task """
+
+    after = set(task.after)
+    for g in task.group.after:
+      after.update(g.tasks)
+
+    return after
+
+
+  def simulate(self, tasks, workers):
+    """ simulate a run of given tasks (shortest expected first) with the
+    given number of workers. limits of targets, modules and module classes
+    are ignored. returns the expected runtime and max. concurrency """
+
+    tasks = [t for t in tasks if not t.done]
+    waiting = {t: len([a for a in self.get_after(t) if not a.done])
+      for t in tasks}
+    dependents = {}
+    for t in tasks:
+      for a in self.get_after(t):
+        if not a.done:
+          dependents.setdefault(a, []).append(t)
+
+    index = {t: i for i, t in enumerate(tasks)}
+    ready = [(t.cost, index[t], t) for t in tasks if waiting[t] == 0]
+    heapq.heapify(ready)
+    running = []
+    now = 0.0
+    concurrency = 0
+
+    while ready or running:
+      while ready and len(running) < workers:
+        cost, i, t = heapq.heappop(ready)
+        heapq.heappush(running, (now + cost, i, t))
+      concurrency = max(concurrency, len(running))
+      now, i, t = heapq.heappop(running)
+      for d in dependents.get(t, ()):
+        waiting[d] -= 1
+        if waiting[d] == 0:
+          heapq.heappush(ready, (d.cost, index[d], d))
+
+    return now, concurrency
+
+
+# EOF
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# pool.py                                                                      #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import glob
+import time
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# own imports
+from core.constants import *
+from core.modules import Module
+from core.notify import Notify
+from core.registry import Registry
+from core.deadline import Deadline
+from core.engine import Job
+from core.tracer import Tracer, span
+from core.tape import Tape
+
+
+# max size of the placeholder of empty logfiles (see @tool)
+PLACEHOLDER = 2
+
+
+# module handler and result cache of the current worker process
+worker_mod = None
+worker_cache = None
+
+
+def init_worker(notify, registry, cache=None, tracer=None, tape=None):
+  """ worker initializer: attach notify service, child registry, tracer and
+  tape, create module handler """
+
+  global worker_mod, worker_cache
+
+  Notify.attach(notify)
+  Registry.attach(registry)
+  Tracer.attach(tracer)
+  Tape.attach(tape)
+  if registry:
+    registry.add(os.getpid(), 'worker', group=False)
+  worker_mod = Module(MOD_PATH)
+  worker_cache = cache
+
+  return
+
+
+def serve(conn, tools, initargs):
+  """ worker process: run the tools requested over conn, up to tools of them
+  at once. each one runs in its own thread, all of them share the engine
+  (event loop) of the process. results (stats or exception) are sent back
+  over conn """
+
+  init_worker(*initargs)
+
+  lock = threading.Lock()
+  exe = ThreadPoolExecutor(tools, thread_name_prefix='tool')
+
+  def run(rid, args):
+    try:
+      res = (rid, run_tool(*args), None)
+    except BaseException as e:
+      res = (rid, None, e)
+    with Deadline.shield(), lock:
+      try:
+        conn.send(res)
+      except Exception:
+        # exception can't be pickled
+        conn.send((rid, None, RuntimeError(repr(res[2]))))
+
+    return
+
+  conn.send((None, None, None))
+  while True:
+    try:
+      req = conn.recv()
+    except EOFError:
+      break
+    if req is None:
+      break
+    exe.submit(run, *req)
+  exe.shutdown(wait=True)
+
+  return
+
+
+def run_tool(mod, tool, target, opts, wdir, deadline=None):
+  """ run given tool of module in the current thread of a worker process as
+  job of its engine. returns its resource usage (wall and cpu time, peak rss,
+  bytes read and written, see get_stats()), seconds blocked waiting for other
+  tools, bytes of output, number of spawned and of timed out or stalled
+  commands, first failed exit status, why a command was cancelled and 'hit' or
+  'miss' for cached tools """
+
+  job = Job(wdir)
+
+  def run():
+    worker_mod.run_tool(mod, tool, target, opts, wdir, deadline)
+
+  def keep():
+    # results of cancelled tools (timeout, stall, budget) and empty ones are
+    # not cached. many scanners exit nonzero on findings, so the exit status
+    # doesn't count
+    return not job.reason and get_output(wdir, tool) > 0
+
+  def commit():
+    worker_mod.commit_tool(mod, tool, target, opts, wdir)
+
+  start = time.monotonic()
+  cpu = time.thread_time()
+
+  cached = None
+  with job.bind(), span(tool, 'tool', module=mod, wdir=wdir):
+    if worker_cache and worker_cache.enabled(tool):
+      entry = worker_mod.get_manifest()[mod]
+      cached = worker_cache.run(mod, tool, target, opts, wdir, entry, run,
+        keep, commit)
+    else:
+      run()
+
+  out = get_output(wdir, tool)
+
+  stats = get_stats(job, time.thread_time() - cpu)
+  stats.update({'wall': time.monotonic() - start, 'waited': job.waited,
+    'bytes': out, 'cached': cached, 'timeouts': job.timeouts + job.stalls,
+    'commands': job.commands, 'status': job.status, 'reason': job.reason})
+
+  return stats
+
+
+def get_output(wdir, tool):
+  """ bytes of output the tool logged. the placeholder written by @tool for
+  tools without any output doesn't count """
+
+  out = 0
+
+  for log in glob.glob(f'{wdir}/{tool}.log') + \
+    glob.glob(f'{wdir}/{tool}_*.log'):
+      size = os.path.getsize(log)
+      if size <= PLACEHOLDER:
+        with open(log, 'rb') as f:
+          if not f.read().strip():
+            continue
+      out += size
+
+  return out
+
+
+def get_stats(job, cpu):
+  """ resource usage of a tool out of the usage of its commands sampled by
+  the engine and the cpu time of the tool's own thread. the worker process is
+  shared with other tools, so its resource usage doesn't tell """
+
+  usage = job.usage
+  user = usage['user'] + cpu
+
+  return {
+    'user': user,
+    'sys': usage['sys'],
+    'cpu': user + usage['sys'],
+    'rss': job.peak_rss,
+    'read': usage['read'],
+    'write': usage['write'],
+  }
+
+
+class Worker:
+  """ worker process of the pool and the tools running in it """
+
+
+  def __init__(self, ctx, tools, initargs):
+    """ constructor """
+
+    self.conn, conn = ctx.Pipe()
+    self.proc = ctx.Process(target=serve, args=(conn, tools, initargs))
+    self.proc.start()
+    conn.close()
+
+    self.jobs = {}              # request id -> future of running tools
+    self.lock = threading.Lock()
+    self.ready = threading.Event()
+    self.dead = False
+
+    threading.Thread(target=self.collect, daemon=True).start()
+
+    return
+
+
+  def collect(self):
+    """ hand results of the worker to the waiting callers. if the worker
+    died, its running tools fail """
+
+    while True:
+      try:
+        rid, stats, exc = self.conn.recv()
+      except (EOFError, OSError):
+        break
+      if rid is None:
+        self.ready.set()
+        continue
+      with self.lock:
+        fut = self.jobs.pop(rid)
+      if exc is None:
+        fut.set_result(stats)
+      else:
+        fut.set_exception(exc)
+
+    with self.lock:
+      self.dead = True
+      jobs, self.jobs = self.jobs, {}
+    self.ready.set()
+    for fut in jobs.values():
+      fut.set_exception(BrokenProcessPool('worker process died'))
+
+    return
+
+
+  def submit(self, rid, args):
+    """ request tool run. returns its future """
+
+    fut = Future()
+
+    with self.lock:
+      if self.dead:
+        raise BrokenProcessPool('worker process died')
+      self.jobs[rid] = fut
+      self.conn.send((rid, args))
+
+    return fut
+
+
+  def stop(self):
+    """ let worker finish its running tools and exit """
+
+    with self.lock:
+      if not self.dead:
+        try:
+          self.conn.send(None)
+        except OSError:
+          pass
+    self.proc.join()
+    self.conn.close()
+
+    return
+
+
+class Pool:
+  """ persistent pool of pre-forked workers running the tools of the whole
+  scan. workers are forked off a forkserver which already imported the module
+  tree and the libs it pulls in, so running a tool costs a pipe hop only. a
+  worker process runs several tools at once, their commands are supervised
+  by the engine (event loop) of the process """
+
+
+  def __init__(self, workers, tools=1, mods=(), notify=None, registry=None,
+    cache=None, tracer=None, tape=None):
+    """ constructor """
+
+    self.workers = workers      # max running tools
+    self.tools = tools          # max running tools per worker process
+    self.notify = notify
+    self.registry = registry
+    self.cache = cache
+    self.tracer = tracer
+    self.tape = tape
+
+    # modules to preload in the forkserver
+    self.preload = ['modules.libs.base'] + sorted(mods)
+
+    self.ctx = None
+    self.procs = []
+    self.ids = itertools.count()
+    self.lock = threading.Lock()
+
+    return
+
+
+  def spawn(self):
+    """ fork a worker process """
+
+    return Worker(self.ctx, self.tools, (self.notify, self.registry,
+      self.cache, self.tracer, self.tape))
+
+
+  def start(self):
+    """ start forkserver and as many workers as needed for the max running
+    tools """
+
+    self.ctx = multiprocessing.get_context('forkserver')
+    self.ctx.set_forkserver_preload(self.preload)
+
+    num = max(1, -(-self.workers // self.tools))
+    self.procs = [self.spawn() for _ in range(num)]
+    for w in self.procs:
+      w.ready.wait()
+
+    return
+
+
+  def pick(self):
+    """ get the worker running the fewest tools. dead workers (which died
+    hard) are replaced first """
+
+    with self.lock:
+      for i, w in enumerate(self.procs):
+        if w.dead:
+          w.proc.join()
+          self.procs[i] = self.spawn()
+
+      return min(self.procs, key=lambda w: len(w.jobs))
+
+
+  def run(self, mod, tool, target, opts, wdir, deadline=None):
+    """ run tool in a worker and wait until it's done. the tool is cancelled
+    after deadline seconds. returns the tool's stats (see run_tool()) """
+
+    fut = self.pick().submit(next(self.ids), (mod, tool, target, opts, wdir,
+      deadline))
+
+    return fut.result()
+
+
+  def stop(self):
+    """ stop all workers """
+
+    with self.lock:
+      procs, self.procs = self.procs, []
+    for w in procs:
+      w.stop()
+
+    return
+
+
+# EOF
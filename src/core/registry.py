@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# registry.py                                                                  #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import signal
+import threading
+
+
+# own imports
+from core.notify import BoardManager
+from core.deadline import Deadline
+
+
+class Children:
+  """ all worker processes and process groups of running commands. lives in
+  the manager process """
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.workers = {}           # pid -> info
+    self.groups = {}            # pgid -> {'cmd', 'cwd'}
+    self.lock = threading.Lock()
+
+    return
+
+
+  def add(self, pid, info, group=True):
+    """ add worker or process group """
+
+    with self.lock:
+      if group:
+        self.groups[pid] = info
+      else:
+        self.workers[pid] = info
+
+    return
+
+
+  def remove(self, pid):
+    """ remove worker or process group """
+
+    with self.lock:
+      self.groups.pop(pid, None)
+      self.workers.pop(pid, None)
+
+    return
+
+
+  def get(self):
+    """ get process groups and workers """
+
+    with self.lock:
+      return dict(self.groups), dict(self.workers)
+
+
+BoardManager.register('Children', Children)
+
+
+class Registry:
+  """ central registry of the nullscan workers and the process groups of all
+  commands started by tools. every command runs in its own process group, so
+  on timeout, abort and end of scan the whole process tree gets killed """
+
+  # instance attached to the current (worker) process
+  shared = None
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.children = None
+
+    return
+
+
+  def __getstate__(self):
+    """ only the proxy is passed to the workers """
+
+    return {'children': self.children}
+
+
+  @staticmethod
+  def attach(registry):
+    """ attach registry to current process (worker initializer) """
+
+    Registry.shared = registry
+
+    return
+
+
+  def start(self, mgr):
+    """ create registry in the (already running) manager process """
+
+    self.children = mgr.Children()
+    Registry.attach(self)
+
+    return
+
+
+  def add(self, pid, info, group=True):
+    """ add worker or process group. registry errors never break a tool """
+
+    try:
+      with Deadline.shield():
+        self.children.add(pid, info, group)
+    except:
+      pass
+
+    return
+
+
+  def remove(self, pid):
+    """ remove worker or process group """
+
+    try:
+      with Deadline.shield():
+        self.children.remove(pid)
+    except:
+      pass
+
+    return
+
+
+  def count(self):
+    """ num process groups and workers """
+
+    try:
+      with Deadline.shield():
+        groups, procs = self.children.get()
+    except:
+      return 0, 0
+
+    return len(groups), len(procs)
+
+
+  def kill(self, workers=True):
+    """ kill all process groups and (optional) the workers """
+
+    try:
+      with Deadline.shield():
+        groups, procs = self.children.get()
+    except:
+      return
+
+    for pgid in groups:
+      try:
+        os.killpg(pgid, signal.SIGKILL)
+      except OSError:
+        pass
+      self.remove(pgid)
+
+    if workers:
+      for pid in procs:
+        try:
+          os.kill(pid, signal.SIGKILL)
+        except OSError:
+          pass
+        self.remove(pid)
+
+    return
+
+
+  def kill_dir(self, path):
+    """ kill process groups of commands started in (or below) given dir, e.g.
+    all commands of a target """
+
+    try:
+      with Deadline.shield():
+        groups, _ = self.children.get()
+    except:
+      return
+
+    for pgid, info in groups.items():
+      if not f"{info['cwd']}/".startswith(path):
+        continue
+      try:
+        os.killpg(pgid, signal.SIGKILL)
+      except OSError:
+        pass
+
+    return
+
+
+# EOF
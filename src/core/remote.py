@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# remote.py                                                                    #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import time
+import socket
+import threading
+from multiprocessing.managers import BaseManager
+
+
+# own imports
+from core.logger import Logger
+
+
+# nodes not seen for this many seconds are dead, their tasks are run again
+LEASE = 60
+
+# seconds a node waits for a task per request
+POLL = 5
+
+
+class RemoteManager(BaseManager):
+  """ manager serving the hub of the coordinator to the worker nodes """
+
+  pass
+
+
+class Hub:
+  """ coordinator side of a distributed scan. lives in the main process of the
+  coordinator and hands out the tasks of its scheduler to worker nodes
+  (nullscan --worker --connect host:port).
+
+  all tasks of a target are run on the same node (target affinity), since the
+  tools of a target read each other's logfiles. logfiles written by a task are
+  sent back when it's done, so the coordinator ends up with the usual
+  logs/targets/<host>/... layout. a node gets the logfiles the coordinator
+  already has for a target with the first task of it.
+
+  tool commits and logfile digests stay on the notify board of the node
+  running the task, so tools skipping results already logged for another
+  target (see _logentry_exists()) only see the targets of their own node.
+  """
+
+
+  def __init__(self, nullscan_dir, opts, mods):
+    """ constructor """
+
+    self.nullscan_dir = nullscan_dir
+    self.opts = opts
+    self.mods = mods
+
+    self.logger = Logger()
+    self.log = self.logger.log
+
+    self.sched = None           # scheduler of the current mode(s)
+    self.nodes = {}             # node -> {'seen', 'tasks', 'hosts'}
+    self.num_nodes = 0
+    self.mtimes = {}            # path -> mtime of last received logfile
+    self.closing = False
+    self.lock = threading.Lock()
+    self.wlock = threading.Lock()
+
+    return
+
+
+  def set_scheduler(self, sched):
+    """ hand out the tasks of given scheduler from now on """
+
+    self.sched = sched
+
+    return
+
+
+  def hello(self, name):
+    """ register a new node. returns its id and what it needs to run tasks """
+
+    with self.lock:
+      self.num_nodes += 1
+      node = f'{name}#{self.num_nodes}'
+      self.nodes[node] = {'seen': time.monotonic(), 'tasks': {}, 'hosts': set()}
+
+    self.log(f'Worker node connected: {node}' + ' ' * 30 + '\n', _type='msg')
+
+    return node, {'targets_opts': self.opts['targets_opts'], 'mods': self.mods}
+
+
+  def ping(self, node):
+    """ heartbeat of node. returns False if the node is gone """
+
+    with self.lock:
+      if node not in self.nodes:
+        return False
+      self.nodes[node]['seen'] = time.monotonic()
+
+    return True
+
+
+  def get(self, node):
+    """ get next task for node. returns None if there is no task (yet) and
+    {'end': True} if the scan is over """
+
+    if self.closing or not self.ping(node):
+      return {'end': True}
+
+    sched = self.sched
+    if sched is None:
+      time.sleep(POLL)
+      return None
+
+    task, deadline = sched.take(node, POLL)
+    if task is None:
+      return None
+
+    group = task.group
+    with self.lock:
+      info = self.nodes.get(node)
+      if info is None:
+        sched.release(task, node)
+        return {'end': True}
+      info['tasks'][id(task)] = task
+      files = []
+      if group.host not in info['hosts']:
+        info['hosts'].add(group.host)
+        files = read_files(self.nullscan_dir,
+          os.path.relpath(f'{group.scan}{group.host}', self.nullscan_dir))
+
+    return {
+      'id': id(task), 'mod': group.mod, 'tool': task.tool,
+      'target': group.target, 'deadline': deadline, 'files': files,
+      'wdir': os.path.relpath(group.wdir, self.nullscan_dir),
+    }
+
+
+  def put(self, node, files):
+    """ store logfiles sent by node """
+
+    self.ping(node)
+    with self.wlock:
+      write_files(self.nullscan_dir, files, self.mtimes)
+
+    return
+
+
+  def done(self, node, tid, state, stats=None):
+    """ task of node is done """
+
+    with self.lock:
+      task = self.nodes.get(node, {'tasks': {}})['tasks'].pop(tid, None)
+    if task is None:
+      return False
+
+    self.sched.finish_remote(task, state, stats)
+
+    return True
+
+
+  def reap(self):
+    """ give back the tasks of dead nodes (runs in a thread) """
+
+    while not self.closing:
+      time.sleep(POLL)
+      now = time.monotonic()
+      with self.lock:
+        dead = [n for n, i in self.nodes.items() if now - i['seen'] > LEASE]
+        for node in dead:
+          info = self.nodes.pop(node)
+          for task in info['tasks'].values():
+            self.sched.release(task, node)
+      for node in dead:
+        self.log('node_dead', eargs=node + ' ' * 30 + '\n', _type='warn')
+
+    return
+
+
+class Coordinator:
+  """ serves the hub to worker nodes on given address """
+
+
+  def __init__(self, address, key, hub):
+    """ constructor """
+
+    self.hub = hub
+
+    RemoteManager.register('Hub', callable=lambda: hub)
+    self.mgr = RemoteManager(address=address, authkey=key.encode())
+    self.server = None
+
+    return
+
+
+  def start(self):
+    """ accept worker nodes in a thread """
+
+    self.server = self.mgr.get_server()
+    self.server.stop_event = threading.Event()
+    threading.Thread(target=self.server.accepter, daemon=True).start()
+    threading.Thread(target=self.hub.reap, daemon=True).start()
+
+    return
+
+
+  def stop(self):
+    """ send all nodes home. the listener dies with the process """
+
+    self.hub.closing = True
+
+    return
+
+
+class Node:
+  """ worker node of a distributed scan. pulls tasks from the coordinator,
+  runs them in the local worker pool and sends the logfiles back """
+
+
+  def __init__(self, address, key, nullscan_dir):
+    """ constructor """
+
+    RemoteManager.register('Hub')
+    self.mgr = RemoteManager(address=address, authkey=key.encode())
+    self.nullscan_dir = nullscan_dir
+    self.hub = None
+    self.node = None
+    self.setup = None
+    self.done = threading.Event()
+
+    return
+
+
+  def connect(self):
+    """ connect to coordinator and register node """
+
+    self.mgr.connect()
+    self.hub = self.mgr.Hub()
+    self.node, self.setup = self.hub.hello(socket.gethostname())
+
+    # same layout as on the coordinator, below our own working dir
+    self.setup['targets_opts']['nullscan_logdir'] = \
+      f'{self.nullscan_dir}/logs/targets/'
+
+    return self.setup
+
+
+  def heartbeat(self):
+    """ tell the coordinator we are alive (runs in a thread) """
+
+    while not self.done.wait(LEASE / 4):
+      try:
+        if not self.hub.ping(self.node):
+          break
+      except Exception:
+        break
+
+    self.done.set()
+
+    return
+
+
+  def work(self, pool, status=None):
+    """ worker loop: get tasks, run them and send the logfiles back """
+
+    while not self.done.is_set():
+      try:
+        task = self.hub.get(self.node)
+      except Exception:
+        break
+      if task is None:
+        continue
+      if task.get('end'):
+        break
+
+      write_files(self.nullscan_dir, task['files'])
+      wdir = os.path.join(self.nullscan_dir, task['wdir'])
+      os.makedirs(wdir, exist_ok=True)
+      if status:
+        status(task)
+
+      since = time.time() - 1
+      state = 'done'
+      stats = None
+      try:
+        stats = pool.run(task['mod'], task['tool'], task['target'],
+          self.setup['targets_opts'], wdir, task['deadline'])
+      except:
+        state = 'failed'
+
+      try:
+        self.hub.put(self.node, read_files(self.nullscan_dir, task['wdir'],
+          since))
+        self.hub.done(self.node, task['id'], state, stats)
+      except Exception:
+        break
+
+    self.done.set()
+
+    return
+
+
+def read_files(root, path, since=0):
+  """ read files under path (relative to root) modified since given time.
+  returns (relative path, mtime, content) tuples """
+
+  files = []
+
+  for d, _, names in os.walk(os.path.join(root, path)):
+    for n in names:
+      f = os.path.join(d, n)
+      try:
+        mtime = os.path.getmtime(f)
+        if mtime >= since:
+          with open(f, 'rb') as fd:
+            files.append((os.path.relpath(f, root), mtime, fd.read()))
+      except OSError:
+        pass
+
+  return files
+
+
+def write_files(root, files, mtimes=None):
+  """ write files (see read_files()) below root. files outside of root's logs
+  dir are refused. if mtimes is given, older versions of a file are dropped """
+
+  logs = os.path.join(os.path.abspath(root), 'logs') + os.sep
+
+  for rel, mtime, data in files:
+    path = os.path.abspath(os.path.join(root, rel))
+    if not path.startswith(logs):
+      continue
+    if mtimes is not None:
+      if mtimes.get(path, 0) > mtime:
+        continue
+      mtimes[path] = mtime
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+      f.write(data)
+    os.utime(path, (mtime, mtime))
+
+  return
+
+
+# EOF
@@ -0,0 +1,973 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# scheduler.py                                                                 #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+
+
+# own imports
+from core.logger import Logger
+from core.file import File
+from core.history import History
+from core.health import Health
+from core.registry import Registry
+from core.tracer import Tracer
+
+
+# node name of the workers of this process (distributed scans)
+LOCAL = 'local'
+
+# expected runtime (seconds) of tools without history per timeout class
+COSTS = {'short': 30, 'medium': 300, 'long': 1800, None: 300}
+
+# min seconds between two sweeps for tasks out of budget
+SWEEP = 1.0
+
+
+class Group:
+  """ a module run against a single target (all tools of one module) """
+
+
+  def __init__(self, mod, target, host, wdir, scan):
+    """ constructor """
+
+    self.mod = mod              # e.g.: modules.tcp.http
+    self.target = target        # target passed to the module class
+    self.host = host            # target's logdir name
+    self.wdir = wdir            # working (log) dir of the module
+    self.scan = scan            # targets logdir of the scan
+    self.klass = mod.split('.')[1]
+
+    # module path inside target's logdir, e.g.: tcp/80/http
+    self.module = os.path.relpath(wdir, f'{scan}{host}')
+
+    self.tasks = []             # tool tasks of this module
+    self.ready = []             # heap of ready tasks: (cost, seq, task)
+    self.after = []             # groups which must be done before
+    self.dependents = []        # groups waiting for this group
+    self.waiting = 0            # num groups in self.after not done yet
+    self.pending = 0            # num tasks not done yet
+    self.running = 0            # num tasks currently running
+    self.start = None           # start time of first task (budget)
+    self.traced = None          # start time of first task (trace)
+    self.done = False
+
+    return
+
+
+class Task:
+  """ a single nullscan-tool run: (target, module, tool) """
+
+
+  def __init__(self, group, tool, deps, cost):
+    """ constructor """
+
+    self.group = group
+    self.tool = tool
+    self.deps = deps            # logfiles (tool names) the tool reads
+    self.cost = cost            # expected runtime in seconds
+    self.started = None         # start time (monotonic)
+
+    # readiness key: (scan, target, module, tool)
+    self.key = (group.scan, group.host, group.module, tool)
+
+    self.after = set()          # tasks which must be done before
+    self.dependents = set()     # tasks waiting for this task
+    self.queued = False
+    self.done = False
+
+    return
+
+
+  def ready(self):
+    """ check if task can be run now """
+
+    return not self.after and self.group.waiting == 0
+
+
+class Scheduler:
+  """ global scheduler for all (target, module, tool) tasks.
+
+  all tasks share a single pool of workers (-P). -T limits the number of
+  targets with running tools, -M the number of running modules per target and
+  c_workers the number of running tools per module class (host, tcp, web, ...).
+  out of all runnable tasks the one with the shortest expected runtime
+  (runtime history) is run first, so fast results don't get stuck behind slow
+  tools. long tools are backfilled into free workers.
+
+  ready tasks are kept in a heap per group. targets are kept in a heap per
+  node (targets not bound to a node yet in a shared one), ordered by their
+  cheapest ready task. entries of targets whose cheapest task changed are
+  dropped lazily, so getting the next task doesn't look at every ready task.
+
+  targets (-b) and modules (-B) may have a time budget, counted from the start
+  of their first tool. tasks are run with a deadline at the end of the budget
+  and left tasks are skipped once it ran out.
+
+  targets which seem to be down (see core/health.py) are tripped: their left
+  tasks are skipped and their running commands are killed.
+
+  in distributed scans (--listen) worker nodes take tasks too (see
+  core/remote.py). all tasks of a target are run by the same node.
+  """
+
+
+  def __init__(self, mod, opts, pool, notify=None, journal=None):
+    """ constructor """
+
+    self.mod = mod              # module handler
+    self.opts = opts
+    self.pool = pool            # worker pool running the tools
+    self.notify = notify        # tool dependency notifications
+    self.journal = journal      # session journal (resume)
+
+    self.logger = Logger()
+    self.log = self.logger.log
+    self.file = File()
+
+    # limits
+    self.workers = opts['p_workers']
+    self.max_targets = opts['t_workers']
+    self.max_mods = opts['m_workers']
+    self.max_class = opts['c_workers']
+
+    # time budgets per target and module
+    self.t_budget = opts['t_budget']
+    self.m_budget = opts['m_budget']
+    self.host_start = {}
+    self.skipped = set()        # targets and modules with skipped tasks
+
+    # groups not done yet and start of first task (trace) per target
+    self.host_groups = {}
+    self.host_traced = {}
+
+    # circuit breaker per target (0 -> off)
+    self.health = None
+    if opts.get('breaker'):
+      self.health = Health(opts['breaker'], opts.get('probe_interval', 0))
+    self.running_sched = threading.Event()
+
+    # all groups (key: wdir) and tasks per target
+    self.groups = {}
+    self.hosts = {}
+
+    # groups with ready tasks, valid heap entry (cost, seq) and heaps of
+    # targets per node (None: not bound to a node yet), all per target and
+    # module class. ready tasks of targets or modules out of budget are moved
+    # to expired_tasks
+    self.ready_groups = {}
+    self.host_best = {}
+    self.heaps = {}
+    self.classes = set()
+    self.seq = itertools.count()
+    self.num_ready = 0
+    self.expired_tasks = deque()
+    self.swept = 0.0
+
+    # running tasks per target, running modules per target and running tasks
+    # per module class
+    self.run_hosts = {}
+    self.run_mods = {}
+    self.run_class = {}
+
+    # node running the tasks of a target
+    self.affinity = {}
+
+    # num groups not done yet
+    self.num_groups = 0
+
+    # status line
+    self.num_tasks = 0
+    self.num_done = 0
+
+    # runtime history, expected runtime of tasks not started yet and running
+    # tasks (eta)
+    self.history = History().load()
+    self.cost_left = 0.0
+    self.running = set()
+
+    # result cache hits and misses
+    self.cache_stats = {'hit': 0, 'miss': 0}
+
+    # live metrics (--metrics) and resource usage of the tools (stats.jsonl)
+    self.metrics = None
+    self.accounting = None
+
+    self.cond = threading.Condition()
+
+    return
+
+
+  def add(self, mod, target, host, wdir, after=()):
+    """ add a module run for target. returns the (existing) group """
+
+    with self.cond:
+      group = self.add_group(mod, target, host, wdir, after)
+    self.flush_journal()
+
+    return group
+
+
+  def add_group(self, mod, target, host, wdir, after=()):
+    """ add a module run for target (lock held) """
+
+    if wdir in self.groups:
+      return self.groups[wdir]
+
+    group = Group(mod, target, host, wdir,
+      self.opts['targets_opts']['nullscan_logdir'])
+    self.groups[wdir] = group
+    if self.health:
+      self.health.add_target(host, target, group.klass)
+    self.num_groups += 1
+    self.host_groups[host] = self.host_groups.get(host, 0) + 1
+    if not self.opts['plan']:
+      self.file.make_dir(wdir)
+
+    for g in after:
+      if not g.done:
+        group.after.append(g)
+        g.dependents.append(group)
+        group.waiting += 1
+
+    deps = self.mod.get_deps(mod)
+    tclasses = self.mod.get_tclasses(mod)
+    for tool in self.mod.get_tools(mod, self.opts):
+      cost = self.history.expect(tool, COSTS[tclasses.get(tool)])
+      group.tasks.append(Task(group, tool, deps.get(tool, set()), cost))
+    self.num_tasks += len(group.tasks)
+    if self.notify:
+      self.notify.register(t.key for t in group.tasks)
+
+    # tasks finished by a previous (resumed) run of the scan
+    for t in group.tasks:
+      if self.journal and self.journal.is_done(t.key[1:]):
+        t.done = True
+        self.num_done += 1
+        if self.notify:
+          self.notify.commit(t.key)
+      else:
+        group.pending += 1
+        self.cost_left += t.cost
+        if self.journal:
+          # drop partial log of an interrupted run
+          log = f'{wdir}/{t.tool}.log'
+          if self.journal.was_started(t.key[1:]) and os.path.isfile(log):
+            self.file.del_file(log)
+          self.journal.task(t.key[1:], 'plan')
+
+    self.link_tasks(group)
+
+    if group.pending == 0:
+      self.group_done(group)
+    else:
+      for t in group.tasks:
+        self.push(t)
+
+    return group
+
+
+  def link_tasks(self, group):
+    """ make tasks of group and tasks of same target wait for the tools
+    (logfiles) they read """
+
+    host = self.hosts.setdefault(group.host, {'tools': {}, 'wants': {}})
+
+    for t in group.tasks:
+      host['tools'].setdefault(t.tool, []).append(t)
+      for d in t.deps:
+        host['wants'].setdefault(d, []).append(t)
+
+    for t in group.tasks:
+      # new tasks reading tools of the target
+      for d in t.deps:
+        for p in host['tools'].get(d, []):
+          self.link(t, p)
+      # tasks of the target reading new tools
+      for c in host['wants'].get(t.tool, []):
+        if c.group is not group:
+          self.link(c, t)
+
+    return
+
+
+  def link(self, task, producer):
+    """ let task wait for producer, unless this would end up in a cycle """
+
+    if task.queued or producer.done or producer in task.after or \
+      self.waits_for(producer, task):
+        return
+
+    task.after.add(producer)
+    producer.dependents.add(task)
+
+    return
+
+
+  def waits_for(self, task, other):
+    """ check if task (indirectly) waits for other task """
+
+    seen = set()
+    stack = [task]
+
+    while stack:
+      t = stack.pop()
+      if t is other:
+        return True
+      if t in seen:
+        continue
+      seen.add(t)
+      stack.extend(t.after)
+      for g in t.group.after:
+        stack.extend(g.tasks)
+
+    return False
+
+
+  def push(self, task):
+    """ push ready task to the heap of its group """
+
+    if task.queued or task.done or not task.ready():
+      return
+
+    group = task.group
+    key = (group.host, group.klass)
+    task.queued = True
+    heapq.heappush(group.ready, (task.cost, next(self.seq), task))
+    self.ready_groups.setdefault(key, set()).add(group)
+    self.classes.add(group.klass)
+    self.num_ready += 1
+    best = self.host_best.get(key)
+    if best is None or task.cost < best[0]:
+      self.rank(key)
+    self.cond.notify_all()
+
+    return
+
+
+  def rank(self, key):
+    """ (re-)add (target, class) to the heap of its node, ordered by its
+    cheapest ready task. older entries of it get invalid """
+
+    groups = self.ready_groups.get(key)
+    if not groups:
+      self.ready_groups.pop(key, None)
+      self.host_best.pop(key, None)
+      return
+
+    cost = min(g.ready[0][0] for g in groups)
+    seq = next(self.seq)
+    self.host_best[key] = (cost, seq)
+    node = self.affinity.get(key[0])
+    heapq.heappush(self.heaps.setdefault((node, key[1]), []),
+      (cost, seq, key[0]))
+
+    return
+
+
+  def rank_host(self, host):
+    """ (re-)add target to the heaps of its node (affinity changed) """
+
+    for klass in self.classes:
+      if (host, klass) in self.ready_groups:
+        self.rank((host, klass))
+
+    return
+
+
+  def take_task(self, group):
+    """ remove cheapest ready task of group """
+
+    key = (group.host, group.klass)
+    task = heapq.heappop(group.ready)[2]
+    self.num_ready -= 1
+    if not group.ready:
+      self.ready_groups[key].discard(group)
+    self.rank(key)
+
+    return task
+
+
+  def purge(self, group):
+    """ remove done tasks from the ready tasks of group """
+
+    key = (group.host, group.klass)
+    ready = [e for e in group.ready if not e[2].done]
+    self.num_ready -= len(group.ready) - len(ready)
+    heapq.heapify(ready)
+    group.ready = ready
+    if not ready and key in self.ready_groups:
+      self.ready_groups[key].discard(group)
+    self.rank(key)
+
+    return
+
+
+  def class_full(self, klass):
+    """ check if the limit of running tasks of module class is reached """
+
+    return klass in self.max_class and \
+      self.run_class.get(klass, 0) >= self.max_class[klass]
+
+
+  def best_group(self, host, klass):
+    """ group of target and class with the cheapest ready task which may run
+    now (module limit) or None """
+
+    best = None
+
+    for g in self.ready_groups.get((host, klass), ()):
+      if g.running == 0 and self.run_mods.get(host, 0) >= self.max_mods:
+        continue
+      if best is None or g.ready[0] < best.ready[0]:
+        best = g
+
+    return best
+
+
+  def expired(self, task):
+    """ check if target or module budget of task ran out or the target is
+    tripped """
+
+    now = time.monotonic()
+    group = task.group
+
+    if self.health and self.health.is_tripped(group.host):
+      return 'tripped'
+    if self.t_budget and group.host in self.host_start and \
+      now - self.host_start[group.host] >= self.t_budget:
+        return 'target'
+    if self.m_budget and group.start is not None and \
+      now - group.start >= self.m_budget:
+        return 'module'
+
+    return None
+
+
+  def budget_left(self, task):
+    """ seconds left of the target and module budget of task (or None) """
+
+    now = time.monotonic()
+    group = task.group
+    left = []
+
+    if self.t_budget:
+      left.append(self.t_budget - (now - self.host_start[group.host]))
+    if self.m_budget:
+      left.append(self.m_budget - (now - group.start))
+
+    return max(0.0, min(left)) if left else None
+
+
+  def sweep(self):
+    """ move ready tasks of tripped targets and of targets and modules out of
+    budget to the expired tasks. runs at most every SWEEP seconds """
+
+    now = time.monotonic()
+    if not (self.t_budget or self.m_budget or self.health) or \
+      now - self.swept < SWEEP:
+        return
+    self.swept = now
+
+    for key in list(self.ready_groups):
+      for g in list(self.ready_groups[key]):
+        if self.expired(g.ready[0][2]):
+          self.num_ready -= len(g.ready)
+          self.expired_tasks.extend(e[2] for e in sorted(g.ready))
+          g.ready = []
+          self.ready_groups[key].discard(g)
+      self.rank(key)
+
+    return
+
+
+  def find(self, node=LOCAL):
+    """ find and remove an expired task or the allowed task with the shortest
+    expected runtime """
+
+    self.sweep()
+    if self.expired_tasks:
+      return self.expired_tasks.popleft()
+
+    best = None
+    classes = [k for k in self.classes if not self.class_full(k)]
+
+    # max targets running: only the running ones may run more tasks
+    if len(self.run_hosts) >= self.max_targets:
+      for host in self.run_hosts:
+        if self.affinity.get(host, node) != node:
+          continue
+        for klass in classes:
+          g = self.best_group(host, klass)
+          if g and (best is None or g.ready[0] < best.ready[0]):
+            best = g
+      return self.take_task(best) if best else None
+
+    # cheapest target per class out of the ones of this node and the not
+    # bound ones. targets skipped (module limit) are running ones, so only a
+    # few are looked at
+    taken = []
+    for klass in classes:
+      heaps = [self.heaps.setdefault((node, klass), []),
+        self.heaps.setdefault((None, klass), [])]
+      while True:
+        heap = min((h for h in heaps if h), key=lambda h: h[0], default=None)
+        if heap is None:
+          break
+        entry = heapq.heappop(heap)
+        if self.host_best.get((entry[2], klass), (0, None))[1] != entry[1]:
+          continue    # invalid entry
+        taken.append((heap, entry))
+        g = self.best_group(entry[2], klass)
+        if g:
+          if best is None or g.ready[0] < best.ready[0]:
+            best = g
+          break
+    for heap, entry in taken:
+      heapq.heappush(heap, entry)
+
+    return self.take_task(best) if best else None
+
+
+  def pop(self, node=LOCAL):
+    """ get next allowed task. tasks out of budget are skipped """
+
+    while True:
+      task = self.find(node)
+      if task is None:
+        return None
+      budget = self.expired(task)
+      if not budget:
+        return task
+      self.skip(task, budget)
+
+
+  def get_pending(self):
+    """ get all tasks not done yet """
+
+    with self.cond:
+      return [t for g in self.groups.values() for t in g.tasks if not t.done]
+
+
+  def drop(self, tools):
+    """ skip all pending tasks of given tools, except the ones of default
+    modules (planner) """
+
+    with self.cond:
+      groups = set()
+      for task in self.get_pending():
+        if task.tool not in tools or task.group.mod.endswith('.default'):
+          continue
+        self.finish(task, 'skipped')
+        groups.add(task.group)
+      for group in groups:
+        self.purge(group)
+    self.flush_journal()
+
+    return
+
+
+  def finished(self):
+    """ check if all added groups are done """
+
+    return self.num_groups == 0
+
+
+  def start_task(self, task, node=LOCAL):
+    """ account a task as running on given node """
+
+    group = task.group
+    if self.affinity.get(group.host) != node:
+      # target's ready tasks move to the heap of the node
+      self.affinity[group.host] = node
+      self.rank_host(group.host)
+    task.started = time.monotonic()
+    self.cost_left -= task.cost
+    self.running.add(task)
+    if group.start is None:
+      group.start = time.monotonic()
+      if Tracer.shared:
+        group.traced = Tracer.now()
+        self.host_traced.setdefault(group.host, group.traced)
+    self.host_start.setdefault(group.host, group.start)
+    if group.running == 0:
+      self.run_mods[group.host] = self.run_mods.get(group.host, 0) + 1
+    group.running += 1
+    self.run_hosts[group.host] = self.run_hosts.get(group.host, 0) + 1
+    self.run_class[group.klass] = self.run_class.get(group.klass, 0) + 1
+
+    if self.journal:
+      self.journal.task(task.key[1:], 'run')
+
+    return
+
+
+  def stop_task(self, task):
+    """ account a task as not running anymore """
+
+    group = task.group
+    self.running.discard(task)
+    group.running -= 1
+    if group.running == 0:
+      self.run_mods[group.host] -= 1
+    self.run_hosts[group.host] -= 1
+    if self.run_hosts[group.host] == 0:
+      del self.run_hosts[group.host]
+    self.run_class[group.klass] -= 1
+
+    return
+
+
+  def task_done(self, task, state='done'):
+    """ account a running task as done (or failed) """
+
+    self.stop_task(task)
+    self.finish(task, state)
+
+    return
+
+
+  def take(self, node, timeout=None):
+    """ take next task for a worker node. waits at most timeout seconds.
+    returns the task and its deadline or (None, None) """
+
+    deadline = None
+    with self.cond:
+      task = self.pop(node)
+      if task is None and not self.finished():
+        self.cond.wait(timeout)
+        task = self.pop(node)
+      if task is not None:
+        self.start_task(task, node)
+        self.status(task)
+        deadline = self.budget_left(task)
+    self.flush_journal()
+
+    return task, deadline
+
+
+  def finish_remote(self, task, state='done', stats=None):
+    """ task of a worker node is done """
+
+    with self.cond:
+      rec = self.record(task, state, stats)
+      self.stop_task(task)
+      self.finish(task, state)
+    self.flush_journal()
+    self.account(rec)
+    self.check_health(task, state, stats)
+
+    return
+
+
+  def record(self, task, state, stats):
+    """ add runtime of finished task to the history and metrics and count
+    cache hits and misses. returns the record of the resource accounting,
+    which is written by account() once the lock is released """
+
+    rec = None
+    if self.accounting:
+      rec = self.accounting.get_record(task, state, stats,
+        self.affinity.get(task.group.host))
+
+    if not stats:
+      return rec
+
+    if self.metrics:
+      self.metrics.observe(task.tool, time.monotonic() - task.started, stats)
+
+    if stats['cached']:
+      self.cache_stats[stats['cached']] += 1
+    # cache hits tell nothing about the runtime of a tool. time blocked
+    # waiting for other tools isn't its own runtime
+    if state == 'done' and stats['cached'] != 'hit':
+      self.history.add(task.tool, max(0.0, stats['wall'] -
+        stats.get('waited', 0.0)), stats['cpu'], stats['bytes'])
+
+    return rec
+
+
+  def flush_journal(self):
+    """ write the task events queued with the lock held to the journal.
+    never called with the lock held """
+
+    if self.journal:
+      self.journal.flush()
+
+    return
+
+
+  def account(self, rec):
+    """ write record of finished task to the resource accounting. never
+    called with the lock held """
+
+    if rec:
+      self.accounting.add(rec)
+
+    return
+
+
+  def check_health(self, task, state, stats):
+    """ feed result of finished task to the circuit breaker. failures,
+    timeouts, stalls and empty output are bad. never called with the lock
+    held, the liveness probe may take a while """
+
+    if not self.health or (stats and stats['cached'] == 'hit'):
+      return
+
+    bad = state == 'failed' or not stats or stats.get('timeouts', 0) > 0 or \
+      stats['bytes'] == 0
+    host = task.group.host
+    if self.health.record(host, bad) and self.health.probe(host):
+      self.trip(host)
+
+    return
+
+
+  def trip(self, host):
+    """ target is down: skip its left tasks and kill its running commands.
+    commands run by worker nodes end with their timeout """
+
+    self.log('breaker', eargs=host + ' ' * 30 + '\n', _type='warn')
+
+    scan = self.opts['targets_opts']['nullscan_logdir']
+    if Registry.shared:
+      Registry.shared.kill_dir(f'{scan}{host}/')
+
+    with self.cond:
+      self.skipped.add(host)
+      self.swept = 0.0
+      self.cond.notify_all()
+
+    return
+
+
+  def probe(self):
+    """ probe targets with running or pending tasks every probe_interval
+    seconds (runs in a thread) """
+
+    while not self.running_sched.wait(self.health.interval):
+      with self.cond:
+        hosts = set(self.run_hosts)
+        hosts.update(host for host, _ in self.ready_groups)
+      for host in sorted(hosts):
+        if self.health.probe(host):
+          self.trip(host)
+
+    return
+
+
+  def eta(self):
+    """ expected seconds until all known tasks are done """
+
+    now = time.monotonic()
+    left = self.cost_left + sum(max(0.0, t.cost - (now - t.started))
+      for t in self.running)
+
+    return left / max(self.workers, len(self.running))
+
+
+  def release(self, task, node):
+    """ give back running task of a dead worker node. its targets may be
+    taken by any node again """
+
+    with self.cond:
+      self.stop_task(task)
+      for host in [h for h, n in self.affinity.items() if n == node]:
+        del self.affinity[host]
+        self.rank_host(host)
+      if self.journal:
+        self.journal.task(task.key[1:], 'plan')
+      task.started = None
+      self.cost_left += task.cost
+      task.queued = False
+      self.push(task)
+    self.flush_journal()
+
+    return
+
+
+  def skip(self, task, budget):
+    """ skip task of target or module out of budget or of tripped target """
+
+    group = task.group
+    what = f'{group.host}/{group.module}' if budget == 'module' else group.host
+    if budget == 'tripped':
+      # already logged by trip()
+      self.skipped.add(what)
+    elif what not in self.skipped:
+      self.skipped.add(what)
+      self.log(f'budget_{budget}', eargs=what + ' ' * 30 + '\n', _type='warn')
+
+    self.finish(task, 'skipped')
+
+    return
+
+
+  def finish(self, task, state='done'):
+    """ mark task as done and push ready dependents """
+
+    group = task.group
+    task.done = True
+    self.num_done += 1
+    if task.started is None:
+      self.cost_left -= task.cost
+
+    if self.journal:
+      self.journal.task(task.key[1:], state)
+    if self.metrics:
+      self.metrics.finished(state)
+
+    # in case the tool died (or was skipped) before committing its results
+    if self.notify:
+      self.notify.commit(task.key)
+
+    for t in task.dependents:
+      t.after.discard(task)
+      self.push(t)
+
+    group.pending -= 1
+    if group.pending == 0:
+      self.group_done(group)
+
+    self.cond.notify_all()
+
+    return
+
+
+  def group_done(self, group):
+    """ mark group as done and release waiting groups """
+
+    group.done = True
+    self.num_groups -= 1
+    self.host_groups[group.host] -= 1
+    self.trace(group)
+
+    for g in group.dependents:
+      g.waiting -= 1
+      if g.waiting == 0:
+        for t in g.tasks:
+          self.push(t)
+
+    return
+
+
+  def trace(self, group):
+    """ add spans of done group and its target (if all its groups are done)
+    to the trace. groups without any run task are left out """
+
+    tracer = Tracer.shared
+    if not tracer or group.traced is None:
+      return
+
+    tracer.add_async(f'{group.host}/{group.module}', 'module', id(group),
+      group.traced, args={'module': group.mod})
+    if self.host_groups[group.host] == 0 and group.host in self.host_traced:
+      tracer.add_async(group.host, 'target', group.host,
+        self.host_traced.pop(group.host))
+
+    return
+
+
+  def status(self, task):
+    """ print status line for given task """
+
+    group = task.group
+    eta = int(self.eta())
+    stat_line = f"{group.host} | {'.'.join(group.mod.split('.')[1:])}." + \
+      f'{task.tool} ({self.num_done}/{self.num_tasks}, ETA ' + \
+      f'{eta // 3600}:{eta // 60 % 60:02d}:{eta % 60:02d})' + ' ' * 25
+
+    if self.opts['verbose']:
+      self.log(stat_line, _type='vmsg', end='\n')
+    else:
+      self.log(stat_line, _type='vmsg', flush=True, end='\r')
+
+    return
+
+
+  def worker(self):
+    """ worker loop: get tasks and run them in the worker pool """
+
+    while True:
+      with self.cond:
+        task = self.pop()
+        while task is None:
+          if self.finished():
+            break
+          self.cond.wait()
+          task = self.pop()
+        if task is not None:
+          self.start_task(task)
+          self.status(task)
+          deadline = self.budget_left(task)
+      self.flush_journal()
+      if task is None:
+        return
+
+      group = task.group
+      state = 'done'
+      stats = None
+      try:
+        stats = self.pool.run(group.mod, task.tool, group.target,
+          self.opts['targets_opts'], group.wdir, deadline)
+      except:
+        state = 'failed'
+        self.log('tool_failed', eargs=task.tool + ' ' * 30 + '\n',
+          _type='warn')
+
+      with self.cond:
+        rec = self.record(task, state, stats)
+        self.task_done(task, state)
+      self.flush_journal()
+      self.account(rec)
+      self.check_health(task, state, stats)
+
+    return
+
+
+  def run(self):
+    """ run all added tasks until all groups are done """
+
+    threads = []
+
+    self.running_sched.clear()
+    if self.health and self.health.interval:
+      threading.Thread(target=self.probe, daemon=True).start()
+
+    for _ in range(self.workers):
+      t = threading.Thread(target=self.worker, daemon=True)
+      t.start()
+      threads.append(t)
+    for t in threads:
+      t.join()
+
+    self.running_sched.set()
+    self.history.save()
+
+    return
+
+
+# EOF
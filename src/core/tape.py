@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# tape.py                                                                      #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import glob
+import json
+import shlex
+import hashlib
+import threading
+
+
+# own imports
+from core.constants import ROOT_PATH
+from core.logger import Logger
+
+
+class Tape:
+  """ recording of the external commands of a scan (--record, --replay).
+
+  recording appends every command (command line, working dir, runtime, exit
+  status, timeout) to a file per process in the tape dir, its output and
+  result files go to out/<sha1> (stored once). paths of the working dir of the
+  scan and of nullscan itself are replaced by placeholders, so a recording
+  matches the commands of another scan with the same targets and options.
+
+  replaying runs a stand-in for every recorded command: it sleeps for the
+  recorded runtime (scaled), restores the result files, prints the output and
+  exits with the recorded status. the stand-in is a real process, so timeouts,
+  stall detection, killing and resource accounting work like in the recorded
+  scan. commands without a recording print nothing and exit with 127.
+  """
+
+  # tape attached to the current process
+  shared = None
+
+
+  def __init__(self, path, mode, scandir, scale=1.0):
+    """ constructor """
+
+    self.path = path            # tape dir
+    self.mode = mode            # 'record' or 'replay'
+    self.scandir = scandir      # working dir of the scan
+    self.scale = scale          # factor of the replayed runtimes
+
+    # paths replaced by placeholders, longest first
+    paths = {os.path.abspath(scandir): '{scan}',
+      ROOT_PATH.rstrip('/'): '{root}'}
+    if len(scandir) > 1:
+      paths.setdefault(scandir.rstrip('/'), '{scan}')
+    self.paths = sorted(paths.items(), key=lambda p: -len(p[0]))
+
+    self.pid = None
+    self.fd = None
+    self.index = None           # (cwd, cmd) -> recordings
+    self.played = {}            # (cwd, cmd) -> num replays
+    self.lock = threading.Lock()
+
+    self.logger = Logger()
+    self.log = self.logger.log
+
+    return
+
+
+  def __getstate__(self):
+    """ only the settings are passed to the workers """
+
+    return {'path': self.path, 'mode': self.mode, 'scandir': self.scandir,
+      'scale': self.scale}
+
+
+  def __setstate__(self, state):
+    """ fresh tape in the worker """
+
+    self.__init__(**state)
+
+    return
+
+
+  @staticmethod
+  def attach(tape):
+    """ attach tape to current process (worker initializer) """
+
+    Tape.shared = tape
+
+    return
+
+
+  def normalize(self, s):
+    """ replace paths of the scan and nullscan by placeholders """
+
+    for path, name in self.paths:
+      s = s.replace(path, name)
+
+    return s
+
+
+  def expand(self, s):
+    """ replace placeholders by paths of the current scan """
+
+    s = s.replace('{scan}', os.path.abspath(self.scandir))
+
+    return s.replace('{root}', ROOT_PATH.rstrip('/'))
+
+
+  def store(self, data):
+    """ store data in out/ once. returns its sha1 """
+
+    sha = hashlib.sha1(data).hexdigest()
+    path = f'{self.path}/out/{sha}'
+
+    if not os.path.isfile(path):
+      os.makedirs(f'{self.path}/out', exist_ok=True)
+      tmp = f'{path}.{os.getpid()}.{threading.get_ident()}'
+      with open(tmp, 'wb') as f:
+        f.write(data)
+      os.replace(tmp, path)
+
+    return sha
+
+
+  def record(self, cmd, cwd, duration, status, timed_out, output=b'',
+    files=()):
+    """ record finished command, its output and the result files it wrote """
+
+    res = {}
+    for path in files:
+      try:
+        with open(path, 'rb') as f:
+          res[self.normalize(os.path.abspath(path))] = self.store(f.read())
+      except OSError:
+        pass
+
+    rec = {'cmd': self.normalize(cmd), 'cwd': self.normalize(cwd),
+      'duration': round(duration, 3), 'status': status,
+      'timeout': timed_out, 'out': self.store(output), 'files': res}
+
+    with self.lock:
+      if self.pid != os.getpid():
+        # forked child: never write into the file of the parent
+        self.pid = os.getpid()
+        os.makedirs(self.path, exist_ok=True)
+        self.fd = open(f'{self.path}/{self.pid}.jsonl', 'a')
+      self.fd.write(json.dumps(rec) + '\n')
+      self.fd.flush()
+
+    return
+
+
+  def load(self):
+    """ read the recordings of all processes """
+
+    self.index = {}
+
+    for path in sorted(glob.glob(f'{self.path}/*.jsonl')):
+      with open(path, 'r') as f:
+        for line in f:
+          try:
+            rec = json.loads(line)
+          except ValueError:
+            continue    # last line of a killed process
+          self.index.setdefault((rec['cwd'], rec['cmd']), []).append(rec)
+
+    return
+
+
+  def play(self, cmd, cwd):
+    """ stand-in (shell command) replaying the recording of given command """
+
+    key = (self.normalize(cwd), self.normalize(cmd))
+
+    with self.lock:
+      if self.index is None:
+        self.load()
+      recs = self.index.get(key)
+      if not recs:
+        self.log('replay_miss', eargs=f'{cmd[:60]}' + ' ' * 30 + '\n',
+          _type='warn', flush=True)
+        return 'exit 127'
+      # same command run again: next recording of it, the last one for good
+      num = self.played.get(key, 0)
+      self.played[key] = num + 1
+      rec = recs[min(num, len(recs) - 1)]
+
+    out = f'{self.path}/out'
+    standin = []
+    duration = rec['duration'] * self.scale
+    if duration > 0:
+      standin.append(f'sleep {duration:.3f}')
+    for path, sha in rec['files'].items():
+      standin.append(f'cp {shlex.quote(f"{out}/{sha}")} ' +
+        shlex.quote(self.expand(path)))
+    standin.append(f'cat {shlex.quote(f"{out}/" + rec["out"])}')
+    status = rec['status'] or 0
+    standin.append(f'exit {128 - status if status < 0 else status}')
+
+    return '; '.join(standin)
+
+
+# EOF
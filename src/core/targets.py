@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# targets.py                                                                   #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import re
+import ipaddress
+
+
+# own imports
+
+
+# addresses per page of the bitmap (8 kB)
+PAGE = 65536
+
+
+class Bitmap:
+  """ sparse bitmap of ipv4 addresses. pages are allocated on first use, so a
+  /8 takes 2 MB no matter how it was added """
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.pages = {}             # page num -> bytearray of PAGE bits
+
+    return
+
+
+  def add(self, start, end):
+    """ set addresses start..end (ints, inclusive) """
+
+    while start <= end:
+      num, first = divmod(start, PAGE)
+      last = min(end - num * PAGE, PAGE - 1)
+      page = self.pages.get(num)
+      if page is None:
+        page = self.pages[num] = bytearray(PAGE // 8)
+
+      # single bits up to the first full byte, full bytes, rest of the bits
+      i = first
+      while i <= last and i % 8:
+        page[i >> 3] |= 0x80 >> (i & 7)
+        i += 1
+      full = (last + 1 - i) // 8
+      if full > 0:
+        page[i >> 3:(i >> 3) + full] = b'\xff' * full
+        i += full * 8
+      while i <= last:
+        page[i >> 3] |= 0x80 >> (i & 7)
+        i += 1
+
+      start = num * PAGE + last + 1
+
+    return
+
+
+  def __len__(self):
+    """ num of set addresses """
+
+    return sum(bin(int.from_bytes(p, 'big')).count('1')
+      for p in self.pages.values())
+
+
+  def runs(self):
+    """ ranges (start, end) of set addresses in ascending order """
+
+    run = None
+
+    for num in sorted(self.pages):
+      page = self.pages[num]
+      # full bytes in one go, bits of the other non-empty ones
+      for m in re.finditer(rb'\xff+|[^\x00\xff]', page):
+        addr = num * PAGE + (m.start() << 3)
+        byte = page[m.start()]
+        if byte == 0xff:
+          bits = [(addr, num * PAGE + (m.end() << 3) - 1)]
+        else:
+          bits = [(addr + i, addr + i) for i in range(8) if byte & (0x80 >> i)]
+        for start, end in bits:
+          if run and run[1] == start - 1:
+            run[1] = end
+          else:
+            if run:
+              yield tuple(run)
+            run = [start, end]
+
+    if run:
+      yield tuple(run)
+
+    return
+
+
+class Targets:
+  """ targets of the nmap mode (-t). host ranges, cidr ranges and addresses
+  stay symbolic in a bitmap (which drops duplicates), hostnames and anything
+  else nmap understands are kept as given. hosts are expanded lazily when
+  iterated, nmap gets cidr blocks """
+
+
+  def __init__(self):
+    """ constructor """
+
+    self.bitmap = Bitmap()
+    self.names = {}             # hostnames (ordered set)
+
+    return
+
+
+  def add(self, spec, verbatim=False):
+    """ add target spec: host range (a.b.c.d-e.f.g.h), cidr range, single
+    hosts (comma separated) or hostname. with verbatim a spec not parsable is
+    kept as given, otherwise ValueError is raised """
+
+    spec = spec.strip()
+    if not spec:
+      return
+
+    try:
+      if '-' in spec:
+        try:
+          start, end = [ipaddress.IPv4Address(a) for a in spec.split('-')]
+          self.bitmap.add(int(start), int(end))
+        except ValueError:
+          # must be a hostname/domain then
+          for host in spec.split(','):
+            self.add_host(host)
+      elif '/' in spec:
+        net = ipaddress.IPv4Network(spec)
+        start, end = int(net.network_address), int(net.broadcast_address)
+        if net.prefixlen < 31:
+          start, end = start + 1, end - 1     # hosts() only
+        self.bitmap.add(start, end)
+      else:
+        for host in spec.split(','):
+          self.add_host(host)
+    except ValueError:
+      if not verbatim:
+        raise
+      self.names[spec] = None
+
+    return
+
+
+  def add_host(self, host):
+    """ add single address or hostname """
+
+    host = host.strip()
+    if not host:
+      return
+
+    try:
+      addr = int(ipaddress.IPv4Address(host))
+      self.bitmap.add(addr, addr)
+    except ValueError:
+      self.names[host] = None
+
+    return
+
+
+  def __bool__(self):
+    """ any targets """
+
+    return bool(self.bitmap.pages or self.names)
+
+
+  def __len__(self):
+    """ num of hosts """
+
+    return len(self.bitmap) + len(self.names)
+
+
+  def __iter__(self):
+    """ hosts one by one """
+
+    for start, end in self.bitmap.runs():
+      for addr in range(start, end + 1):
+        yield str(ipaddress.IPv4Address(addr))
+    yield from self.names
+
+    return
+
+
+  def specs(self):
+    """ targets as nmap specs: cidr blocks and hostnames """
+
+    for start, end in self.bitmap.runs():
+      for net in ipaddress.summarize_address_range(
+        ipaddress.IPv4Address(start), ipaddress.IPv4Address(end)):
+          yield str(net)
+    yield from self.names
+
+    return
+
+
+# EOF
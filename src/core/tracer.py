@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- ########################################################
+#               ____                     _ __                                  #
+#    ___  __ __/ / /__ ___ ______ ______(_) /___ __                            #
+#   / _ \/ // / / (_-</ -_) __/ // / __/ / __/ // /                            #
+#  /_//_/\_,_/_/_/___/\__/\__/\_,_/_/ /_/\__/\_, /                             #
+#                                           /___/ team                         #
+#                                                                              #
+# nullscan                                                                     #
+# A modular framework designed to chain and automate security tests            #
+#                                                                              #
+# FILE                                                                         #
+# tracer.py                                                                    #
+#                                                                              #
+# AUTHOR                                                                       #
+# noptrix@nullsecurity.net                                                     #
+#                                                                              #
+################################################################################
+
+
+# sys imports
+import os
+import glob
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+
+
+# own imports
+
+
+class Tracer:
+  """ records spans of a scan (--trace): modes, modules, tools, commands,
+  dependency waits and the report. every process appends its spans to its own
+  file, the main process merges them into a trace.json (chrome trace event
+  format) for chrome://tracing or perfetto at the end of the scan """
+
+  # tracer attached to the current process
+  shared = None
+
+
+  def __init__(self, path):
+    """ constructor """
+
+    self.path = path            # dir of the per-process span files
+    self.pid = None
+    self.fd = None
+    self.lock = threading.Lock()
+
+    return
+
+
+  def __getstate__(self):
+    """ only the path is passed to the workers """
+
+    return {'path': self.path}
+
+
+  def __setstate__(self, state):
+    """ fresh tracer in the worker """
+
+    self.__init__(state['path'])
+
+    return
+
+
+  @staticmethod
+  def attach(tracer):
+    """ attach tracer to current process (worker initializer) """
+
+    Tracer.shared = tracer
+
+    return
+
+
+  @staticmethod
+  def now():
+    """ current time in microseconds """
+
+    return time.time_ns() // 1000
+
+
+  def write(self, event):
+    """ append event to the span file of the current process """
+
+    event.setdefault('pid', os.getpid())
+    event.setdefault('tid', threading.get_ident())
+
+    with self.lock:
+      if self.pid != os.getpid():
+        # forked child: never write into the file of the parent
+        self.pid = os.getpid()
+        os.makedirs(self.path, exist_ok=True)
+        self.fd = open(f'{self.path}/{self.pid}.jsonl', 'a')
+      self.fd.write(json.dumps(event, default=str) + '\n')
+      self.fd.flush()
+
+    return
+
+
+  def add(self, name, cat, start, end=None, args=None):
+    """ add complete span. start and end in microseconds """
+
+    end = self.now() if end is None else end
+    self.write({'name': name, 'cat': cat, 'ph': 'X', 'ts': start,
+      'dur': max(0, end - start), 'args': args or {}})
+
+    return
+
+
+  def add_async(self, name, cat, key, start, end=None, args=None):
+    """ add span which may overlap others of the same thread (e.g. modules) """
+
+    end = self.now() if end is None else end
+    self.write({'name': name, 'cat': cat, 'ph': 'b', 'id': key, 'ts': start,
+      'args': args or {}})
+    self.write({'name': name, 'cat': cat, 'ph': 'e', 'id': key, 'ts': end})
+
+    return
+
+
+  def merge(self, outfile, main=None):
+    """ merge span files of all processes into outfile and remove them """
+
+    events = []
+    main = main or os.getpid()
+
+    for path in sorted(glob.glob(f'{self.path}/*.jsonl')):
+      pid = int(os.path.basename(path).split('.')[0])
+      events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+        'args': {'name': 'nullscan' if pid == main else f'worker {pid}'}})
+      with open(path, 'r') as f:
+        for line in f:
+          try:
+            events.append(json.loads(line))
+          except ValueError:
+            pass    # last line of a killed process
+
+    with open(outfile, 'w') as f:
+      json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    shutil.rmtree(self.path, ignore_errors=True)
+
+    return
+
+
+@contextmanager
+def span(name, cat, **args):
+  """ record span of the with-block (if tracing) """
+
+  tracer = Tracer.shared
+  start = Tracer.now() if tracer else None
+
+  try:
+    yield
+  finally:
+    if tracer:
+      tracer.add(name, cat, start, args=args)
+
+  return
+
+
+# EOF
@@ -317,15 +317,30 @@ class Usage:
       '  -I <tools>   - include tools (default: all) - ? for info\n'
       '  -x <mods>    - exclude modules (default: see nullscan.cfg) - ? for info\n'
       '  -X <tools>   - exclude tools (default: see nullscan.cfg) - ? for info\n'
-      '  -T <num>     - num workers for parallel target checks (default: 15)\n'
-      '  -M <num>     - num workers to run parallel modules (default: 10)\n'
-      '  -P <num>     - num workers to run parallel tools (default: 15)\n'
+      '  -T <num>     - max targets to check in parallel (default: 15)\n'
+      '  -M <num>     - max modules per target in parallel (default: 10)\n'
+      '  -P <num>     - num workers to run parallel tools (default: 50)\n'
       '  -k <sec>     - num seconds for tool (global) timeout (default: 0.0)\n'
+      '  -b <sec>     - time budget per target in seconds (default: 0.0)\n'
+      '  -B <sec>     - time budget per module in seconds (default: 0.0)\n'
+      '  --deadline <sec> - run only the tools fitting into deadline\n'
+      '  --plan <file> - write plan (json) of the scan to file (- for stdout),\n'
+      '                  don\'t run anything\n'
       '  -r           - generate an html report\n'
       '  -R <dir>     - work, log and report dir (default: pwd + date)\n'
       '  -c <file>    - config file (default: /etc/nullscan.conf)\n'
       '  -v           - verbose mode (default: false)\n'
-      '  -d           - debug mode (default: false)\n\n'
+      '  -d           - debug mode (default: false)\n'
+      '  --resume <dir> - resume interrupted scan in given work dir\n'
+      '  --no-cache   - don\'t use cached tool results (see nullscan.conf)\n'
+      '  --listen <host:port>  - coordinate a distributed scan\n'
+      '  --worker --connect <host:port> - run tasks of a coordinator\n'
+      '  --metrics <host:port> - serve live metrics (prometheus), e.g.:\n'
+      '                          127.0.0.1:9150\n'
+      '  --trace      - write spans of the scan to trace.json\n'
+      '  --record <dir> - record the commands (output, runtime) to dir\n'
+      '  --replay <dir> - replay recorded commands instead of running them\n'
+      '  --replay-scale <num> - factor of replayed runtimes (default: 1.0)\n\n'
       + Style.BRIGHT + 'misc' + Style.RESET_ALL + '\n\n'
       '  -C           - check for missing tools (recommended)\n'
       '  -p <args>    - print tools and exit - ? for info\n'
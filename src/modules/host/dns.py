@@ -213,7 +213,8 @@ class DNS(Base):
           for x in cf.as_completed(futures):
             if x.result():
               pairs.append(x.result())
-        with open('all_subdomains_ips.log', 'a', encoding='latin-1') as log:
+        with open(self._path('all_subdomains_ips.log'), 'a',
+          encoding='latin-1') as log:
           for p in pairs:
             if p[0] != '0.0.0.0' and '0.0.0.0' not in p[1]:
               print(p[0], ",".join(p[1]), file=log)
@@ -49,7 +49,7 @@ class Whois(Base):
     with timeout(self.opts['timeout']):
       if not self.target['privip']:
         res = self._whois('domain')
-        with open('whois_domain.log', 'w') as log:
+        with open(self._path('whois_domain.log'), 'w') as log:
           for line in res:
             print(line, file=log)
 
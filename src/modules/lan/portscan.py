@@ -50,7 +50,7 @@ class PortScan(Base):
 
     self._portscan(opts, 'tcp_portscan')
 
-    msg = f'TCP portscan results saved in: {os.getcwd()}'
+    msg = f'TCP portscan results saved in: {self._wdir}'
     self._log('tcp_portscan', msg)
 
     return
@@ -68,7 +68,7 @@ class PortScan(Base):
 
     self._portscan(opts, 'udp_portscan')
 
-    msg = f'UDP portscan results saved in: {os.getcwd()}'
+    msg = f'UDP portscan results saved in: {self._wdir}'
     self._log('udp_portscan', msg)
 
     return
@@ -22,7 +22,6 @@
 import sys
 import os
 import subprocess
-from threading import Timer
 import traceback
 import functools
 import psutil
@@ -33,6 +32,9 @@ from contextlib import contextmanager
 # own imports
 from core.logger import Logger
 from core.file import File
+from core.engine import Engine
+from core.deadline import Deadline
+from core.tracer import span
 from modules.libs.helper import Helper
 from modules.libs.tools import Tools
 from modules.libs.parser import Parser
@@ -43,7 +45,7 @@ from modules.libs.toolshelper import ToolsHelper
 #   an-exception-logging-decorator/
 def tool(func):
   """
-  A decorator that takes care of exception printing and file.destroy_lock
+  A decorator that takes care of exception printing and committing the results
   """
 
   @functools.wraps(func)
@@ -51,55 +53,99 @@ def tool(func):
     try:
       self = args[0]
       ret = func(*args, **kwargs)
-      log = f'{os.getcwd()}/{func.__name__}.log'
+      log = f'{self._wdir}/{func.__name__}.log'
       if not os.path.isfile(log) or os.path.getsize(log) == 0:
         with open(log, 'a') as f:
           print(' ', file=f)
-      self.file.destroy_lock(func.__name__)
+      self._commit_tool(func.__name__)
       return ret
     except:
-      self.file.destroy_lock(func.__name__)
+      self._commit_tool(func.__name__)
       #traceback.print_exc()
+      # a deadline ran out: cancel the caller, too
+      Deadline.checkpoint()
 
     return None
 
   return wrapper
 
 
+class LogStream:
+  """ writes output chunks of a command to its logfile (and stdout in debug
+  mode). ansi escape-codes are stripped per chunk, an incomplete escape-code at
+  the end of a chunk is kept back for the next one """
+
+
+  def __init__(self, logfile, strip=None, debug=False):
+    """ constructor """
+
+    self.logfile = logfile
+    self.strip = strip          # ansi escape-codes strip function
+    self.debug = debug
+    self.rest = ''
+
+    return
+
+
+  def write(self, chunk):
+    """ write chunk of output """
+
+    data = self.rest + chunk.decode('latin-1')
+    self.rest = ''
+
+    if self.strip:
+      data = self.strip(data)
+      esc = data.rfind('\x1b')
+      if esc != -1 and len(data) - esc < 32:
+        data, self.rest = data[:esc], data[esc:]
+
+    self.logfile.write(data)
+    if self.debug:
+      sys.stdout.write(data)
+
+    return
+
+
+  def close(self):
+    """ write kept back rest """
+
+    if self.rest:
+      rest, self.rest = self.rest, ''
+      self.strip = None
+      self.write(rest.encode('latin-1'))
+
+    return
+
+
 @contextmanager
 def timeout(time_out, name='', ctx=None):
-  """ timeout contextmanager function """
-
-  # Source:
-  # - https://www.jujens.eu/posts/en/2018/Jun/02/python-timeout-function/
-  def __raise_timeout(signum, frame):
-    if ctx: ctx._log('timeout', f"__raise_timeout --> {name} ({time_out})")
-    raise TimeoutError
+  """ timeout contextmanager function. works in threads and pool workers """
 
   if isinstance(time_out, str):
     if len(time_out) > 0:
       time_out = int(time_out.split('.')[0])
     else:
-      # empty timeout option, set it to an extra high value
+      # empty timeout option
       time_out = False
   elif time_out is None or int(time_out) == 0:
-    # empty timeout option, set it to an extra high value
+    # empty timeout option
     time_out = False
 
-  if time_out:
-    signal.signal(signal.SIGALRM, __raise_timeout)
-    signal.alarm(time_out)
+  deadline = Deadline(float(time_out), name) if time_out else None
+  if deadline:
+    deadline.start()
 
   try:
-    yield
+    yield deadline
   except TimeoutError:
     if ctx: ctx._log('timeout', f"got TimeoutError for {name} ({time_out})")
   finally:
-    # Unregister the signal so it won't be triggered
-    # if the timeout is not reached.
     if ctx: ctx._log('timeout', f"finished timeout function {name} ({time_out})")
-    if time_out:
-      signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    if deadline:
+      deadline.stop()
+
+  # an outer deadline (e.g. the tool's budget) ran out, too
+  Deadline.checkpoint()
 
   return
 
@@ -125,25 +171,57 @@ class Base(Helper, ToolsHelper, Tools, Parser):
 
 
   def _kill(self, proc, cbkill=None, nullscan_tool=None):
-    """ kill process and all childs """
-
-    if not nullscan_tool:
-      nullscan_tool = proc.args.split()[0]
+    """ kill process group of command (process and all childs) """
 
     self.log('tool_timeout', eargs=f"{nullscan_tool} {proc.pid}" + ' ' * 30 + \
       '\n', _type='warn', flush=True)
 
     if cbkill is None:
-      # remove quotes from options. this still needs to be improved...
-      # cmd = cmd.translate({ord(c): None for c in "\"'"})
-      #self._run_cmd(f"pkill --signal SIGKILL -f '{cmd}'")
-      self._run_cmd(f'kill -9 {proc.pid}')
+      try:
+        os.killpg(proc.pid, signal.SIGKILL)
+      except OSError:
+        pass
     else:
       cbkill()
 
     return
 
 
+  def _stall(self, proc, action, cbkill=None, nullscan_tool=None):
+    """ command made no progress for its idle time: flag or kill it """
+
+    self.log(f'tool_stalled_{action}', eargs=f"{nullscan_tool} {proc.pid}" + \
+      ' ' * 30 + '\n', _type='warn', flush=True)
+
+    if action != 'kill':
+      return
+
+    if cbkill is None:
+      try:
+        os.killpg(proc.pid, signal.SIGKILL)
+      except OSError:
+        pass
+    else:
+      cbkill()
+
+    return
+
+
+  def _get_idle_policy(self, cmd, nullscan_tool=None):
+    """ get idle seconds and action (kill, flag) of command. precedence:
+    nullscan-tool > real tool called in cmd > default. 0 seconds -> no stall
+    detection """
+
+    stall = self.opts.get('stall') or {}
+    tools = stall.get('tools', {})
+
+    for name in [nullscan_tool] + cmd.split():
+      if name in tools:
+        return tools[name]
+
+    return stall.get('idle', 0), stall.get('action', 'kill')
+
+
   def _set_cmd_timeout(self, timeout):
     """ set command timeout """
 
@@ -164,9 +242,9 @@ class Base(Helper, ToolsHelper, Tools, Parser):
     # set default logfile if not given by caller
     if not logfile:
       if nullscan_tool:
-        self.logfile = f'{nullscan_tool}.log'
+        self.logfile = self._path(f'{nullscan_tool}.log')
     else:
-      self.logfile = f'{logfile}.log'
+      self.logfile = self._path(f'{logfile}.log')
 
     return
 
@@ -187,12 +265,12 @@ class Base(Helper, ToolsHelper, Tools, Parser):
     try:
       if nullscan_tool:
         with open(self.logfile, 'a') as f:
-          output = func(cmd)
-          if escape_codes:
-            output = self._strip_ansi_codes(output)
-          f.write(output)
-          if self.opts['debug']:
-            sys.stdout.write(output)
+          strip = self._strip_ansi_codes if escape_codes else None
+          stream = LogStream(f, strip, self.opts['debug'])
+          try:
+            func(cmd, stream)
+          finally:
+            stream.close()
         if newlines:
           self._add_newlines(self.logfile)
           if self.opts['debug']:
@@ -212,6 +290,7 @@ class Base(Helper, ToolsHelper, Tools, Parser):
       return # don't exit. continue with other tools
     except:
       #traceback.print_exc() # print stacktrace for debuging
+      Deadline.checkpoint() # a deadline ran out: cancel the tool
       return # don't exit. continue with other tools
 
     return
@@ -221,18 +300,22 @@ class Base(Helper, ToolsHelper, Tools, Parser):
     timeout=None, cbkill=None, escape_codes=False):
     """ <descr> """
 
-    def cb_exec(cmd):
-      proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT)
-      # from: http://www.blog.pythonlibrary.org/2016/05/17/python-101-how-
-      #    to-timeout-a-subprocess/
-      my_timer = Timer(self.opts['timeout'], self._kill, [proc, cbkill,
-        nullscan_tool])
-      try:
-        my_timer.start()
-        stdout, _ = proc.communicate()
-      finally:
-        my_timer.cancel()
+    name = nullscan_tool or cmd.split()[0]
+    idle, action = self._get_idle_policy(cmd, nullscan_tool)
+
+    def cb_kill(proc):
+      self._kill(proc, cbkill, name)
+
+    def cb_stall(proc):
+      self._stall(proc, action, cbkill, name)
+
+    def cb_exec(cmd, sink=None):
+      # cancellation points: no command after the deadline
+      with Deadline.bind(self._deadline), span(name, 'cmd', cmd=cmd):
+        Deadline.checkpoint()
+        stdout, _ = Engine.get().run(cmd, self.opts['timeout'], cb_kill, sink,
+          idle, cb_stall, self._job)
+        Deadline.checkpoint()
 
       return stdout.decode('latin-1')
 
@@ -22,13 +22,19 @@
 import os
 import glob
 import filecmp
+import hashlib
 import urllib
 import psutil
 import re
+import time
 
 
 # own imports
 import core.nmap
+from core.notify import Notify
+from core.deadline import Deadline
+from core.engine import Job
+from core.tracer import span
 
 
 class Helper():
@@ -46,9 +52,23 @@ class Helper():
     else:
       self._target = self.target
 
+    # engine job of the tool and module's working (log) dir, which relative
+    # paths of logfiles and commands are in (see _path())
+    self._job = Job.current()
+    self._wdir = self._job.wdir if self._job else os.getcwd()
+
+    # deadline of the tool, thread pool threads of it work for it, too
+    self._deadline = Deadline.current()
+
     return
 
 
+  def _path(self, _file):
+    """ path of given file. relative ones are in the working dir """
+
+    return os.path.join(self._wdir, _file)
+
+
   def _strip_ansi_codes(self, line, ecodes=r'\x1B[@-_][0-?]*[ -/]*[@-~]'):
     """ strip ansi escape-codes (special color codes) from given line """
 
@@ -83,6 +103,19 @@ class Helper():
     subdomain scanner multiple times against the same domain.
     """
 
+    # digests of all committed logfiles are indexed by the notify service.
+    # worker nodes have their own, so targets of other nodes are not seen
+    if Notify.shared:
+      scan, target, _, tool = self._tool_key(logfile)
+      with Deadline.bind(self._deadline):
+        if Notify.shared.duplicate(scan, target, tool):
+          return True
+        own = f'{self._wdir}/{logfile}.log'
+        if os.path.isfile(own):
+          return Notify.shared.duplicate(scan, target, tool,
+            self._log_digest(own))
+      return False
+
     curlog = None
     curpath = f"{self.opts['nullscan_logdir']}{self._target}/**/{logfile}.log"
 
@@ -119,7 +152,7 @@ class Helper():
     """ add newlines to logfile for multiple results (appended)"""
 
     try:
-      with open(logfile, 'a') as log:
+      with open(self._path(logfile), 'a') as log:
         print('\n--- next run ---\n', file=log)
     except:
       pass
@@ -128,21 +161,85 @@ class Helper():
 
 
   def _read_log(self, nullscan_tool):
-    """ find given nullscan_tool's log and read the file. dirty (tmp) hack :( """
-
-    while True:
-      # Here we look for new log files created by the tools
-      logs = self._get_all_log_files()
-      for log in logs:
-        if f'/{nullscan_tool}.log' in log:
-          if os.path.getsize(log) != 0:
-            return self._read_file(log)
-      else:
-        continue
+    """ find given nullscan_tool's log and read the file. blocks until the tool
+    committed its results. own module's log is preferred """
+
+    self._wait_tool(nullscan_tool)
+
+    logs = self._get_all_log_files()
+    own = f'{self._wdir}/{nullscan_tool}.log'
+    if own in logs:
+      logs.insert(0, own)
+
+    for log in logs:
+      if f'/{nullscan_tool}.log' in log:
+        if os.path.getsize(log) != 0:
+          return self._read_file(log, block=False)
+
+    return []
+
+
+  def _tool_key(self, nullscan_tool, logfile=None):
+    """ build tool dependency key (scan, target, module, tool) for given
+    nullscan_tool or for logfile (path) of any target's tool """
+
+    scan = self.opts['nullscan_logdir']
+    path = self._wdir
+    if logfile and logfile.startswith(scan):
+      path = os.path.dirname(logfile)
+
+    parts = os.path.relpath(path, scan).split('/', 1)
+    if len(parts) < 2:
+      parts.append('.')
+
+    return (scan, parts[0], parts[1], nullscan_tool)
+
+
+  def _wait_tool(self, nullscan_tool, logfile=None):
+    """ block until given nullscan_tool committed its results. waits at most
+    until the tool's deadline """
+
+    if Notify.shared:
+      start = time.monotonic()
+      try:
+        with Deadline.bind(self._deadline), \
+          span(f'wait {nullscan_tool}', 'wait', logfile=logfile):
+            Notify.shared.wait(self._tool_key(nullscan_tool, logfile),
+              Deadline.cap())
+      finally:
+        if self._job:
+          self._job.wait(time.monotonic() - start)
+
+    return
+
+
+  def _commit_tool(self, nullscan_tool):
+    """ commit results (and digest of the logfile) of given nullscan_tool and
+    wake up waiting tools """
+
+    if Notify.shared:
+      log = f'{self._wdir}/{nullscan_tool}.log'
+      digest = self._log_digest(log) if os.path.isfile(log) else None
+      Notify.shared.commit(self._tool_key(nullscan_tool), digest)
 
     return
 
 
+  def _log_digest(self, logfile):
+    """ sha256 of given logfile """
+
+    h = hashlib.sha256()
+
+    try:
+      with open(logfile, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+          h.update(chunk)
+    except OSError:
+      return None
+
+    return h.hexdigest()
+
+
   def _get_all_log_files(self, pattern_match=None):
     """
     returns all log files under self._target,
@@ -157,10 +254,12 @@ class Helper():
     return logs
 
 
-  def _read_file(self, _file, csv=False, delim=' '):
+  def _read_file(self, _file, csv=False, delim=' ', block=True):
     """ wrapper for File.read_file() """
 
-    self._check_file(_file)
+    _file = self._path(_file)
+    if not self._check_file(_file, block):
+      return []
 
     if not csv:
       return self.file.read_file(_file)
@@ -171,22 +270,15 @@ class Helper():
 
 
   def _check_file(self, _file, block=True):
-    """ check if file exists and check if not empty (block until) """
+    """ check if file exists and check if not empty (block until tool done) """
 
-    # block until lockfile removed / tool done
-    if '.log' in _file:
-      lock = f"/tmp/nullscan/{_file.split('.log')[0].split('/')[-1]}.lck"
-      while os.path.isdir(lock):
-        continue
+    _file = self._path(_file)
 
-    if not block:
-      if os.path.isfile(_file):
-        return True
+    # block until tool committed its results
+    if block and '.log' in _file:
+      self._wait_tool(_file.split('.log')[0].split('/')[-1], _file)
 
-    # block until file and file is greater than 0 bytes
-    while not os.path.isfile(_file) and os.path.getsize(_file) == 0:
-      continue
-    else:
+    if os.path.isfile(_file) and os.path.getsize(_file) != 0:
       return True
 
     return False
@@ -195,7 +287,7 @@ class Helper():
   def _log(self, logfile, data, mode='a', data_end=''):
     """ wrapper around File.write_file() """
 
-    self.file.write_file(f'{logfile}.log', data, mode, data_end)
+    self.file.write_file(self._path(f'{logfile}.log'), data, mode, data_end)
 
     return
 
@@ -623,9 +623,9 @@ class Tools(ToolsAttr):
     """ wrapper to perform nmap portscan """
 
     nmap = core.nmap.Nmap(nmap_opts)
-    nmap.set_logfile(logfile)
+    nmap.set_logfile(self._path(logfile))
     nmap.build_cmd()
-    nmap.scan(output=output)
+    nmap.scan(output=self._path(output) if output else None)
 
     return
 
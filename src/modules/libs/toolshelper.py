@@ -112,6 +112,7 @@ class ToolsHelper():
     """ will run over all files in cwd and append .log if needed """
 
     bin_file_ext = set(['.bin', '.cap', '.pcap', '.sqlite'])
+    cwd = self._path(cwd)
 
     for el in os.listdir(cwd):
       try:
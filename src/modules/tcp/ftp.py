@@ -121,8 +121,8 @@ class FTP(Base):
 
     self._run_cmd('mv ftp_bounce.nmap ftp_bounce.log')
 
-    self.file.del_file('ftp_bounce.xml')
-    self.file.del_file('ftp_bounce.gnmap')
+    self.file.del_file(self._path('ftp_bounce.xml'))
+    self.file.del_file(self._path('ftp_bounce.gnmap'))
 
     return
 
@@ -55,7 +55,8 @@ class ISAKMP(Base):
     # PSK hash
     opts = f"--tcp -A --id=1 -Pvpn.key {self.target['host']}"
     self._run_tool('ike-scan', opts, create_log=False)
-    if os.path.isfile('vpn.key') and os.path.getsize('vpn.key') > 0:
+    key = self._path('vpn.key')
+    if os.path.isfile(key) and os.path.getsize(key) > 0:
       self._run_cmd('cat vpn.key >> ikescan_pskhash.log')
 
     return
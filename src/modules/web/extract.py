@@ -148,7 +148,7 @@ class Extract(Base):
     TOOLS: photon
     """
 
-    logdir = f'{os.getcwd()}/photon/'
+    logdir = self._path('photon/')
     opts = f'--timeout 3 -t 25 -l 2 --keys --wayback -o {logdir}'
     opts += f" --user-agent '{self.useragent}'"
 
@@ -163,8 +163,8 @@ class Extract(Base):
       data = [f'{data}\n' for data in self.file.read_file(log)]
       self._log(name, data)
 
-    self.file.del_file('photon.log')
-    self.file.del_file('photon', _dir=True)
+    self.file.del_file(self._path('photon.log'))
+    self.file.del_file(self._path('photon'), _dir=True)
 
     return
 
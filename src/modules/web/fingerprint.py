@@ -123,7 +123,7 @@ class Fingerprint(Base):
     opts = f"--user-agent '{self.useragent}' -u {self.target}"
     self._run_tool('cmseek', opts, precmd='echo -e "\\n" |', create_log=False)
 
-    jsonlog = ''.join(glob.glob(f'Result/{self.host}*/cms.json'))
+    jsonlog = ''.join(glob.glob(self._path(f'Result/{self.host}*/cms.json')))
     with open(jsonlog, 'r') as jf:
       log = json.load(jf)
     self._log('cmseek', json.dumps(log, indent=2, sort_keys=True), mode='w')
@@ -140,7 +140,8 @@ class Fingerprint(Base):
 
     self._lbmap(self.host, self.port, self.scheme)
 
-    self.file.copy_files(f'lbmap_{self.scheme}.log', 'lbmap_web.log', move=True)
+    self.file.copy_files(self._path(f'lbmap_{self.scheme}.log'),
+      self._path('lbmap_web.log'), move=True)
 
     return
 
@@ -50,8 +50,9 @@ class Eap(Base):
     pcaps = self._get_wifi_pcaps()
     for idx, pcap in enumerate(pcaps):
       self._run_tool(tool_name, f"-f {pcap} --xml")
-      if os.path.exists('eapeak.xml'):
-        os.rename('eapeak.xml', f"{tool_name}_{idx}.xml.log")
+      xml = self._path('eapeak.xml')
+      if os.path.exists(xml):
+        os.rename(xml, self._path(f"{tool_name}_{idx}.xml.log"))
 
     return
 
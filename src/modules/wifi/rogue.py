@@ -90,7 +90,8 @@ class Rogue(Base):
         handshake_path = line[len(search_line):-1].rstrip('\n')
         break
     if handshake_path is not None and os.path.exist(handshake_path):
-      shutil.copyfile(handshake_path, 'eaphammer_wpa_handshakes.hccapx.log')
+      shutil.copyfile(handshake_path,
+        self._path('eaphammer_wpa_handshakes.hccapx.log'))
 
     return
 
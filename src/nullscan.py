@@ -26,7 +26,6 @@ import warnings
 from core.usage import Usage
 from core.controller import Controller
 from core.logger import Logger
-from core.misc import Misc
 
 
 if __name__ == '__main__':
@@ -34,7 +33,6 @@ if __name__ == '__main__':
     warnings.simplefilter('ignore')
     Usage.banner()
     ctrl = Controller()
-    misc = Misc()
     l = Logger()
     log = l.log
     ctrl.prepare()
@@ -43,10 +41,8 @@ if __name__ == '__main__':
     ctrl.end()
   except:
     log('aborted', _type='err', exit=False, end='\n')
-    # kill left nullscan processes if ctrl+c was hit. this is a dirty hack and it
-    # it will be replaced later with semaphores or queues to have a nice
-    # communication channel between each proc
-    misc.kill_process('python*.*nullscan', 'KILL')
+    # kill all running commands and workers if ctrl+c was hit
+    ctrl.abort()
 
 
 # EOF